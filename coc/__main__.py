@@ -0,0 +1,27 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+import sys
+
+from coc.lib.logger import LOGGER
+
+# importing the core logs at debug level, keep stderr quiet until --log-level is known
+LOGGER.setLevel("WARNING")
+
+from coc.cli import main  # noqa: E402
+
+sys.exit(main())
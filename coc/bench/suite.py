@@ -0,0 +1,198 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from coc import config
+from coc.core import roll
+from coc.core.gender import Gender
+from coc.core.investigator import Attribute, Investigator
+from coc.core.roll import Roll, D100
+from coc.lib import database
+from coc.lib.logger import LOGGER, log_level_value
+
+
+class Benchmark:
+    """
+    A named micro benchmark: a callable that is timed `number` times per repetition
+    """
+
+    def __init__(self, name: str, func: Callable[[], object], number: int = 1000):
+        self.name = name
+        self.func = func
+        self.number = number
+
+    def __repr__(self):
+        return f"Benchmark({self.name}, number={self.number})"
+
+    def _loop(self, number: int) -> float:
+        """
+        Call the benchmarked function a number of times
+        :param number: number of calls
+        :return: elapsed time in seconds
+        """
+        func = self.func
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        return time.perf_counter() - start
+
+    def run(self, seed: int, repeat: int = 5, scale: float = 1.0) -> dict:
+        """
+        Run the benchmark
+        :param seed: seed for the random generators (see roll.seed), set before every repetition
+        :param repeat: number of timed repetitions
+        :param scale: factor applied to the number of calls per repetition
+        :return: dict with timings and allocations
+        """
+        number = max(1, int(self.number * scale))
+        timings = []
+        for _ in range(repeat):
+            roll.seed(seed)
+            timings.append(self._loop(number))
+
+        roll.seed(seed)
+        tracemalloc.start()
+        try:
+            before = tracemalloc.take_snapshot()
+            tracemalloc.reset_peak()
+            self._loop(number)
+            _, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
+        stats = after.compare_to(before, "lineno")
+        net_blocks = sum(stat.count_diff for stat in stats)
+        net_bytes = sum(stat.size_diff for stat in stats)
+
+        best = min(timings)
+        return {"name": self.name,
+                "number": number,
+                "repeat": repeat,
+                "best_s": best,
+                "mean_s": sum(timings) / len(timings),
+                "ops_per_s": number / best if best > 0 else None,
+                "peak_bytes": peak,
+                "net_bytes": net_bytes,
+                "net_blocks": net_blocks}
+
+
+def _attribute_checks(attribute: Attribute) -> Callable[[], object]:
+    def checks():
+        attribute.is_regular(None)
+        attribute.is_hard(None)
+        attribute.is_extreme(None)
+
+    return checks
+
+
+def _new_investigator() -> Investigator:
+    return Investigator(firstname="Jessy", surname="Williams", gender=Gender.FEMALE, occupation="Writer",
+                        birthplace="Boston", residence="Arkham", age=roll.generator().randint(15, 89))
+
+
+def default_benchmarks() -> list:
+    """
+    The standard benchmark set
+    :return: list of Benchmark
+    """
+    three_d6 = Roll("3D6")
+    attribute = Attribute("Benchmark", "BNC", 50)
+    return [Benchmark("roll.parse", lambda: Roll("2D6+6"), 20000),
+            Benchmark("roll.roll.d100", D100.roll, 50000),
+            Benchmark("roll.roll.3d6", three_d6.roll, 20000),
+            Benchmark("roll.spread", lambda: Roll.spread(40, 3), 20000),
+            Benchmark("database.get_random_row",
+                      lambda: database.get_random_row(config.CSV_FIRST_NAMES, where="lang = 'NL'"), 200),
+            Benchmark("database.get_first_name", lambda: database.get_first_name(gender=Gender.MALE), 200),
+            Benchmark("database.get_last_name", lambda: database.get_last_name(language="EN"), 200),
+            Benchmark("attribute.checks", _attribute_checks(attribute), 20000),
+            Benchmark("investigator.create", _new_investigator, 1000)]
+
+
+def run_benchmarks(benchmarks: list = None, seed: int = 0, repeat: int = 5, scale: float = 1.0,
+                   name_filter: Optional[str] = None, log_level: str = "WARNING") -> dict:
+    """
+    Run a set of benchmarks and collect the results in a JSON serializable dict
+    :param benchmarks: benchmarks to run, by default the standard set
+    :param seed: seed for the random generator
+    :param repeat: number of timed repetitions per benchmark
+    :param scale: factor applied to the number of calls per repetition
+    :param name_filter: only run benchmarks whose name contains this text
+    :param log_level: log level during the run. Logging is part of the cost, but by default only warnings are kept
+    :return: dict with meta information and a list of results
+    """
+    if benchmarks is None:
+        benchmarks = default_benchmarks()
+    old_level = LOGGER.level
+    LOGGER.setLevel(log_level_value(log_level))
+    results = []
+    try:
+        for benchmark in benchmarks:
+            if name_filter is not None and name_filter not in benchmark.name:
+                continue
+            results.append(benchmark.run(seed, repeat=repeat, scale=scale))
+    finally:
+        LOGGER.setLevel(old_level)
+    return {"meta": {"timestamp": datetime.now(timezone.utc).isoformat(),
+                     "python": platform.python_version(),
+                     "implementation": platform.python_implementation(),
+                     "platform": platform.platform(),
+                     "machine": platform.machine(),
+                     "seed": seed,
+                     "repeat": repeat,
+                     "scale": scale,
+                     "log_level": log_level},
+            "results": results}
+
+
+def main(argv: list = None) -> int:
+    """
+    Command line entry: python -m coc.bench
+    :param argv: command line arguments
+    :return: exit code
+    """
+    parser = argparse.ArgumentParser(prog="python -m coc.bench", description="Run the coc micro benchmarks")
+    parser.add_argument("--seed", type=int, default=0, help="random seed")
+    parser.add_argument("--repeat", type=int, default=5, help="timed repetitions per benchmark")
+    parser.add_argument("--scale", type=float, default=1.0, help="factor applied to the number of calls")
+    parser.add_argument("--filter", dest="name_filter", default=None, help="only run benchmarks containing this text")
+    parser.add_argument("--log-level", default="WARNING", choices=["CRITICAL", "ERROR", "WARNING", "INFO", "DEBUG"])
+    parser.add_argument("--output", default=None, help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(seed=args.seed, repeat=args.repeat, scale=args.scale, name_filter=args.name_filter,
+                            log_level=args.log_level)
+    text = json.dumps(report, indent=2)
+    if args.output is None:
+        print(text)
+    else:
+        with open(args.output, "w", encoding="utf-8") as out:
+            out.write(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
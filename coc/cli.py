@@ -0,0 +1,313 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+import argparse
+import csv
+import json
+import math
+import sys
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+from coc.core import roll
+from coc.core.dice import compile_expression
+from coc.core.gender import Gender
+from coc.core.generator import iter_investigators, CHUNK_SIZE
+from coc.core.investigator import CHARACTERISTICS
+from coc.core.roll import random_func
+from coc.core.rules import Era, AGE_MIN, AGE_MAX
+from coc.lib import database, sheet, profiling
+from coc.lib.logger import LOGGER, LOG_LEVEL_NAMES
+from coc.lib.names import UniqueNames, NamespaceExhausted
+
+JSONL = "jsonl"
+CSV = "csv"
+FORMATS = (JSONL, CSV, sheet.TEXT, sheet.MARKDOWN, sheet.HTML)
+CSV_COLUMNS = (["firstname", "surname", "gender", "age", "occupation", "birthplace", "residence"] +
+               [code for code, _, _, _ in CHARACTERISTICS] + ["HP", "MOV", "BUILD", "DB", "SAN", "era"])
+ROLL_CHUNK = 65536
+PROGRESS_INTERVAL = 2.0
+
+
+class Progress:
+    """
+    Throughput readout on stderr, at most once per interval
+    """
+
+    def __init__(self, total: int, label: str, stream=None, interval: float = PROGRESS_INTERVAL):
+        """
+        :param total: number of items expected
+        :param label: what is counted
+        :param stream: output, by default stderr
+        :param interval: seconds between readouts, 0 for none
+        """
+        self.total = total
+        self.label = label
+        self.stream = sys.stderr if stream is None else stream
+        self.interval = interval
+        self.count = 0
+        self.start = time.perf_counter()
+        self._next = self.start + interval
+
+    def _report(self, now: float) -> None:
+        elapsed = now - self.start
+        rate = self.count / elapsed if elapsed > 0 else 0.0
+        self.stream.write(f"{self.count}/{self.total} {self.label} in {elapsed:.1f}s ({rate:.0f}/s)\n")
+        self.stream.flush()
+
+    def track(self, items):
+        """
+        Count the items of an iterable while passing them on
+        :param items: iterable
+        :return: generator of the same items
+        """
+        for item in items:
+            self.count += 1
+            yield item
+            if self.interval and self.count % 256 == 0:
+                now = time.perf_counter()
+                if now >= self._next:
+                    self._report(now)
+                    self._next = now + self.interval
+
+    def finish(self) -> None:
+        """
+        Final readout
+        """
+        if self.interval:
+            self._report(time.perf_counter())
+
+
+@contextmanager
+def _output(file_path: Optional[str]):
+    """
+    :param file_path: output file, None or - for stdout
+    :return: context manager giving a text stream
+    """
+    if file_path is None or file_path == "-":
+        yield sys.stdout
+        sys.stdout.flush()
+    else:
+        with open(file_path, "w", encoding="utf-8", newline="") as output:
+            yield output
+
+
+def _gender(code: Optional[str]) -> Optional[Gender]:
+    return None if code is None else {"M": Gender.MALE, "F": Gender.FEMALE, "X": Gender.X}[code]
+
+
+def _positive(text: str) -> int:
+    """
+    argparse type of counts and sizes
+    :param text: command line value
+    :return: int of at least 1
+    """
+    try:
+        value = int(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not an integer: {text}")
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1: {value}")
+    return value
+
+
+def _csv_row(investigator, era: str) -> list:
+    return ([investigator.firstname, investigator.surname, investigator.gender.name, investigator.age,
+             investigator.occupation, investigator.birthplace, investigator.residence] +
+            [investigator.chars[code].regular for code, _, _, _ in CHARACTERISTICS] +
+            [investigator.hit_max, investigator.movement, investigator.build, investigator.damage_bonus,
+             investigator.sanity.regular, era])
+
+
+def generate(args) -> int:
+    """
+    generate subcommand: write a stream of investigators
+    :param args: parsed arguments
+    :return: exit code
+    """
+    investigators = iter_investigators(args.count, workers=args.workers, seed=args.seed, unique=args.unique,
+                                       chunk_size=args.chunk_size, gender=_gender(args.gender),
+                                       language=args.language, age=(args.min_age, args.max_age),
+                                       name_source=database.SYNTHETIC if args.synthetic else database.CORPUS,
+                                       era=Era[args.era])
+    progress = Progress(args.count, "investigators", interval=args.progress)
+    investigators = progress.track(investigators)
+    era = args.era
+    with _output(args.output) as output:
+        if args.format == JSONL:
+            for investigator in investigators:
+                record = investigator.as_dict()
+                record["era"] = era
+                output.write(json.dumps(record) + "\n")
+        elif args.format == CSV:
+            writer = csv.writer(output)
+            writer.writerow(CSV_COLUMNS)
+            for investigator in investigators:
+                writer.writerow(_csv_row(investigator, era))
+        else:
+            sheet.write_sheets(investigators, output, args.format)
+    progress.finish()
+    return 0
+
+
+def roll_dice(args) -> int:
+    """
+    roll subcommand: roll an expression a number of times
+    :param args: parsed arguments
+    :return: exit code
+    """
+    if args.seed is not None:
+        roll.seed(args.seed)
+    expression = compile_expression(args.expression)
+    count, total, squares = 0, 0, 0
+    minimum, maximum = math.inf, -math.inf
+    with _output(args.output) as output:
+        while count < args.count:
+            values = expression.roll_many(min(ROLL_CHUNK, args.count - count), random_func)
+            count += len(values)
+            if args.stats:
+                total += sum(values)
+                squares += sum(value * value for value in values)
+                minimum, maximum = min(minimum, min(values)), max(maximum, max(values))
+            if not args.quiet:
+                output.write("\n".join(map(str, values)) + "\n")
+        if args.stats and count:
+            mean = total / count
+            deviation = math.sqrt(max(0.0, squares / count - mean * mean))
+            stats = {"expression": expression.text, "count": count, "mean": mean, "stdev": deviation,
+                     "min": minimum, "max": maximum, "possible_min": expression.minimum,
+                     "possible_max": expression.maximum}
+            try:
+                distribution = expression.distribution()
+                stats["exact_mean"] = sum(value * probability for value, probability in distribution.items())
+            except ValueError as e:
+                LOGGER.info(f"No exact distribution for {expression.text}: {e}")
+            output.write(json.dumps(stats) + "\n")
+    return 0
+
+
+def names(args) -> int:
+    """
+    names subcommand: write full names, one per line
+    :param args: parsed arguments
+    :return: exit code
+    """
+    if args.seed is not None:
+        roll.seed(args.seed)
+    gender = _gender(args.gender)
+    progress = Progress(args.count, "names", interval=args.progress)
+    with _output(args.output) as output:
+        if args.unique:
+            generator = UniqueNames(gender=gender, language=args.language)
+            try:
+                for first, last in progress.track(generator.next_name() for _ in range(args.count)):
+                    output.write(f"{first} {last}\n")
+            except NamespaceExhausted as e:
+                LOGGER.error(f"{e}, wrote {progress.count} names")
+                return 1
+        else:
+            source = database.SYNTHETIC if args.synthetic else database.CORPUS
+            for _ in progress.track(range(args.count)):
+                output.write(f"{database.get_first_name(gender=gender, language=args.language, source=source)} "
+                             f"{database.get_last_name(language=args.language, source=source)}\n")
+    progress.finish()
+    return 0
+
+
+def profiled(args) -> int:
+    """
+    Run a subcommand under the profiler and report the time per stage on stderr
+    :param args: parsed arguments
+    :return: exit code
+    """
+    if args.profile == profiling.DETERMINISTIC and args.workers > 1:
+        LOGGER.warning("The deterministic profiler follows one thread, generating with a single worker")
+        args.workers = 1
+    code, result = profiling.profile(lambda: args.func(args), args.profile)
+    sys.stderr.write(result.summary())
+    if args.profile_output is not None:
+        result.write_collapsed(args.profile_output)
+    return code
+
+
+def parser() -> argparse.ArgumentParser:
+    """
+    :return: parser of the command line
+    """
+    main_parser = argparse.ArgumentParser(prog="python -m coc", description="Call of Cthulhu generators")
+    main_parser.add_argument("--log-level", default="WARNING", choices=list(LOG_LEVEL_NAMES))
+    commands = main_parser.add_subparsers(dest="command", required=True)
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("-n", "--count", type=_positive, default=1, help="number of items")
+    common.add_argument("--seed", default=None, help="random seed for reproducible output")
+    common.add_argument("-o", "--output", default=None, help="output file, stdout by default")
+
+    people = argparse.ArgumentParser(add_help=False)
+    people.add_argument("--language", default=None, help="language of the names, e.g. EN, NL, DA")
+    people.add_argument("--gender", default=None, choices=["M", "F", "X"])
+    people.add_argument("--unique", action="store_true", help="never repeat a full name")
+    people.add_argument("--synthetic", action="store_true", help="generate new names from the name lists")
+    people.add_argument("--progress", type=float, default=PROGRESS_INTERVAL,
+                        help="seconds between progress readouts on stderr, 0 for none")
+
+    command = commands.add_parser("generate", parents=[common, people], help="generate investigators")
+    command.add_argument("--era", default=Era.NineteenTwenty.name, choices=[era.name for era in Era],
+                         help="era of the names, when the name files have an ERA column, and of the output")
+    command.add_argument("--min-age", type=int, default=AGE_MIN)
+    command.add_argument("--max-age", type=int, default=AGE_MAX)
+    command.add_argument("--workers", type=_positive, default=1, help="generator threads")
+    command.add_argument("--chunk-size", type=_positive, default=CHUNK_SIZE, help="investigators per thread task")
+    command.add_argument("-f", "--format", default=JSONL, choices=FORMATS)
+    command.add_argument("--profile", default=None, choices=profiling.MODES,
+                         help="profile the run, print the time per stage on stderr")
+    command.add_argument("--profile-output", default=None, help="write the collapsed stacks of the profile here")
+    command.set_defaults(func=generate)
+
+    command = commands.add_parser("roll", parents=[common], help="roll dice")
+    command.add_argument("expression", help="dice expression, e.g. 3D6*5")
+    command.add_argument("--stats", action="store_true", help="finish with a JSON line of statistics")
+    command.add_argument("-q", "--quiet", action="store_true", help="do not write the rolls")
+    command.set_defaults(func=roll_dice)
+
+    command = commands.add_parser("names", parents=[common, people], help="generate full names")
+    command.set_defaults(func=names)
+    return main_parser
+
+
+def main(argv: list = None) -> int:
+    """
+    Command line entry: python -m coc
+    :param argv: command line arguments
+    :return: exit code
+    """
+    args = parser().parse_args(argv)
+    LOGGER.setLevel(args.log_level)
+    try:
+        if getattr(args, "profile", None) is not None:
+            return profiled(args)
+        return args.func(args)
+    except (ValueError, LookupError) as e:
+        LOGGER.error(e)
+        return 2
+    except BrokenPipeError:
+        return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,16 +14,21 @@
     You should have received a copy of the GNU General Public License
     along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
+import os
 from pathlib import Path
 
-DIR_ROOT = Path("E:\\STACK\\Dev\\callofcthlulhu")
+DIR_ROOT = Path(__file__).resolve().parent.parent
 
-DIR_DATA = Path.joinpath(DIR_ROOT, "data")
+# the data files can be read from another directory, see also catalogue.set_data_directory
+DIR_DATA = Path(os.environ.get("COC_DATA_DIR", Path.joinpath(DIR_ROOT, "data")))
+# generated files, like trained name models, are kept outside the package in the user cache directory
+DIR_CACHE = Path(os.environ.get("COC_CACHE_DIR",
+                                Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "callofcthulhu"))
 
 CSV_FIRST_NAMES = Path.joinpath(DIR_DATA,"first_names.csv")
 CSV_NAMES = Path.joinpath(DIR_DATA, "names.csv")
-CSV_OCCUPATIONS = Path.joinpath(DIR_DATA, "occupations")
-CSV_SKILLS = Path.joinpath(DIR_DATA, "skills")
+CSV_OCCUPATIONS = Path.joinpath(DIR_DATA, "occupations.csv")
+CSV_SKILLS = Path.joinpath(DIR_DATA, "skills.csv")
 
 if __name__ == "__name__":
     raise NotImplementedError()
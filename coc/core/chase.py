@@ -0,0 +1,230 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+
+import functools
+from typing import Callable, Optional
+
+from coc.core.check import success_levels, REGULAR, EXTREME
+from coc.core.dice import compile_expression
+from coc.core.roll import random_func
+from coc.lib.logger import LOGGER
+
+MAX_ROUNDS = 20
+DEX = "DEX"
+
+
+@functools.lru_cache(maxsize=1024)
+def pass_table(skill: int, difficulty: int = REGULAR) -> tuple:
+    """
+    Outcome of a check for every D100 result, so a check is a single table lookup
+    :param skill: skill or characteristic value
+    :param difficulty: success level needed, REGULAR, HARD or EXTREME
+    :return: tuple of booleans indexed by the roll (index 0 is unused)
+    """
+    return tuple(level >= difficulty for level in success_levels(skill))
+
+
+class Hazard:
+    """
+    Obstacle at a location of the chase track. A failed check costs extra movement actions.
+    """
+
+    def __init__(self, skill: str = DEX, difficulty: int = REGULAR, delay: str = "1D3"):
+        """
+        :param skill: skill to check, DEX or the name of a skill of the participant
+        :param difficulty: success level needed, REGULAR, HARD or EXTREME
+        :param delay: movement actions lost on failure
+        """
+        self.skill = skill
+        self.difficulty = difficulty
+        self.delay = compile_expression(delay)
+
+    def __repr__(self):
+        return f"Hazard({self.skill}, difficulty={self.difficulty}, delay={self.delay.text})"
+
+
+class Participant:
+    """
+    Participant in a chase
+    """
+
+    def __init__(self, name: str, movement: int, constitution: int, dexterity: int, skills: Optional[dict] = None):
+        """
+        :param name: name
+        :param movement: MOV
+        :param constitution: CON, used for the speed roll
+        :param dexterity: DEX, decides who moves first and is the default hazard check
+        :param skills: skill values for hazards that need another skill, e.g. {"Climb": 40}
+        """
+        self.name = name
+        self.movement = movement
+        self.constitution = constitution
+        self.dexterity = dexterity
+        self.skills = {} if skills is None else dict(skills)
+        self.skills[DEX] = dexterity
+        self._tables = {}
+
+    def __repr__(self):
+        return f"Participant({self.name}, MOV {self.movement}, CON {self.constitution}, DEX {self.dexterity})"
+
+    @classmethod
+    def from_investigator(cls, investigator, skills: Optional[dict] = None):
+        """
+        Create a participant from an investigator
+        :param investigator: Investigator
+        :param skills: skill values for hazards
+        :return: Participant
+        """
+        return cls(f"{investigator.firstname} {investigator.surname}", investigator.movement,
+                   investigator.constitution, investigator.dexterity, skills)
+
+    def check_table(self, hazard: Hazard) -> tuple:
+        """
+        Cached check outcomes of this participant against a hazard
+        :param hazard: Hazard
+        :return: tuple of booleans indexed by the D100 roll
+        """
+        key = (hazard.skill, hazard.difficulty)
+        table = self._tables.get(key)
+        if table is None:
+            # an unknown skill is checked against DEX at one difficulty level higher
+            skill = self.skills.get(hazard.skill)
+            difficulty = hazard.difficulty if skill is not None else min(hazard.difficulty + 1, EXTREME)
+            table = self._tables[key] = pass_table(self.dexterity if skill is None else skill, difficulty)
+        return table
+
+
+class ChaseResult:
+    """
+    Outcome of a number of simulated chases
+    """
+
+    def __init__(self, chases: int, escaped: int, caught: int, rounds: list):
+        self.chases = chases
+        self.escaped = escaped
+        self.caught = caught
+        self.undecided = chases - escaped - caught
+        self.total_rounds = sum(rounds)
+
+    def __repr__(self):
+        return f"ChaseResult(chases={self.chases}, escape={self.escape_probability:.3f}, " \
+               f"caught={self.caught_probability:.3f}, rounds={self.expected_rounds:.2f})"
+
+    @property
+    def escape_probability(self) -> float:
+        return self.escaped / self.chases
+
+    @property
+    def caught_probability(self) -> float:
+        return self.caught / self.chases
+
+    @property
+    def expected_rounds(self) -> float:
+        return self.total_rounds / self.chases
+
+
+def speed_rolls(participant: Participant, chases: int, rand: Callable[[int], int]) -> list:
+    """
+    CON speed roll for a participant in every chase: extreme success +1 MOV, failure -1 MOV
+    :param participant: Participant
+    :param chases: number of chases
+    :param rand: random function
+    :return: MOV per chase
+    """
+    levels = success_levels(participant.constitution)
+    adjust = [1 if level >= EXTREME else (-1 if level < REGULAR else 0) for level in levels]
+    movement = participant.movement
+    return [movement + adjust[rand(100)] for _ in range(chases)]
+
+
+def _move(participant: Participant, actions: int, position: int, stop: int, hazards: dict,
+          rand: Callable[[int], int]) -> (int, int):
+    """
+    Spend movement actions, one location per action, until the actions run out or stop is reached
+    :return: new position and the actions left (negative when a hazard cost more than was available)
+    """
+    while actions > 0 and position < stop:
+        position += 1
+        actions -= 1
+        hazard = hazards.get(position)
+        if hazard is not None and not participant.check_table(hazard)[rand(100)]:
+            actions -= hazard.delay.roll(rand)
+    return position, actions
+
+
+def simulate(quarry: Participant, pursuer: Participant, chases: int = 10000, lead: int = 2, length: int = 10,
+             hazards: Optional[dict] = None, escape_lead: Optional[int] = None, max_rounds: int = MAX_ROUNDS,
+             rand: Callable[[int], int] = random_func) -> ChaseResult:
+    """
+    Simulate many independent chases. The quarry starts lead locations ahead of the pursuer at location 0.
+    Every round each participant gets 1 + (MOV - lowest MOV) movement actions and moves in DEX order.
+    The quarry escapes at the end of the track (location length) or when it is escape_lead locations ahead;
+    it is caught when the pursuer reaches its location.
+    :param quarry: Participant fleeing
+    :param pursuer: Participant chasing
+    :param chases: number of chases
+    :param lead: start location of the quarry
+    :param length: last location of the track
+    :param hazards: location -> Hazard
+    :param escape_lead: lead at which the quarry is out of sight, no limit if missing
+    :param max_rounds: maximum number of rounds per chase
+    :param rand: random function
+    :return: ChaseResult
+    """
+    if chases < 1:
+        raise ValueError(f"chases must be at least 1: {chases}")
+    if not 0 < lead <= length:
+        raise ValueError(f"lead must be between 1 and the track length {length}: {lead}")
+    hazards = {} if hazards is None else hazards
+    quarry_movement = speed_rolls(quarry, chases, rand)
+    pursuer_movement = speed_rolls(pursuer, chases, rand)
+    position = {quarry: [lead] * chases, pursuer: [0] * chases}
+    actions = {quarry: [0] * chases, pursuer: [0] * chases}
+    bonus = {quarry: [max(0, q - p) for q, p in zip(quarry_movement, pursuer_movement)],
+             pursuer: [max(0, p - q) for q, p in zip(quarry_movement, pursuer_movement)]}
+    order = (quarry, pursuer) if quarry.dexterity >= pursuer.dexterity else (pursuer, quarry)
+    outcome = [None] * chases
+    rounds = [max_rounds] * chases
+    active = list(range(chases))
+    for current in range(1, max_rounds + 1):
+        for participant in order:
+            positions, left, extra = position[participant], actions[participant], bonus[participant]
+            for chase in active:
+                if outcome[chase] is not None:
+                    continue
+                stop = length if participant is quarry else position[quarry][chase]
+                positions[chase], left[chase] = _move(participant, left[chase] + 1 + extra[chase],
+                                                      positions[chase], stop, hazards, rand)
+                left[chase] = min(0, left[chase])
+                gap = position[quarry][chase] - position[pursuer][chase]
+                if gap <= 0:
+                    outcome[chase] = pursuer
+                elif position[quarry][chase] >= length or (escape_lead is not None and gap >= escape_lead):
+                    outcome[chase] = quarry
+                if outcome[chase] is not None:
+                    rounds[chase] = current
+        active = [chase for chase in active if outcome[chase] is None]
+        if not active:
+            break
+    result = ChaseResult(chases, outcome.count(quarry), outcome.count(pursuer), rounds)
+    LOGGER.debug(f"{quarry.name} chased by {pursuer.name}: {result}")
+    return result
+
+
+if __name__ == "__main__":
+    raise NotImplementedError(__file__)
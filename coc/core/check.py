@@ -0,0 +1,209 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+
+import functools
+from enum import IntEnum, unique
+from typing import Callable, Optional, Union
+
+from coc.core.dice import compile_expression
+from coc.core.roll import random_func
+
+
+@unique
+class SuccessLevel(IntEnum):
+    """
+    Result of a D100 check, ordered from worst to best
+    """
+    FUMBLE = 0
+    FAIL = 1
+    REGULAR = 2
+    HARD = 3
+    EXTREME = 4
+    CRITICAL = 5
+
+
+FUMBLE, FAIL, REGULAR, HARD, EXTREME, CRITICAL = SuccessLevel
+A_WINS, DRAW, B_WINS = 1, 0, -1
+
+
+def _skill(value) -> int:
+    """
+    Accept a skill value or anything with a regular value, like an Attribute
+    """
+    return value if isinstance(value, int) else value.regular
+
+
+def _roll(value: int) -> int:
+    """
+    Accept a D100 result only, index 0 and negative indices of the success levels are no results
+    """
+    if not isinstance(value, int) or not 1 <= value <= 100:
+        raise ValueError(f"D100 result must be between 1 and 100: {value}")
+    return value
+
+
+@functools.lru_cache(maxsize=256)
+def success_levels(skill: int) -> tuple:
+    """
+    Success level for every D100 result against a skill value
+    :param skill: skill or characteristic value
+    :return: tuple indexed by the roll (index 0 is unused)
+    """
+    levels = [FAIL]
+    for value in range(1, 101):
+        if value == 1:
+            levels.append(CRITICAL)
+        elif value == 100 or (skill < 50 and value >= 96):
+            levels.append(FUMBLE)
+        elif value <= skill // 5:
+            levels.append(EXTREME)
+        elif value <= skill // 2:
+            levels.append(HARD)
+        elif value <= skill:
+            levels.append(REGULAR)
+        else:
+            levels.append(FAIL)
+    return tuple(levels)
+
+
+def percentile_dice(bonus: int = 0):
+    """
+    Compiled D100 with bonus (positive) or penalty (negative) dice
+    :param bonus: number of bonus dice minus number of penalty dice
+    :return: Expression
+    """
+    if bonus == 0:
+        return compile_expression("D100")
+    return compile_expression(f"D100b{bonus}" if bonus > 0 else f"D100p{-bonus}")
+
+
+def success_level(skill, roll: Optional[int] = None, bonus: int = 0,
+                  rand: Callable[[int], int] = random_func) -> SuccessLevel:
+    """
+    Resolve one check
+    :param skill: skill value or Attribute
+    :param roll: D100 result, rolled with the bonus or penalty dice if missing
+    :param bonus: number of bonus dice minus number of penalty dice
+    :param rand: random function
+    :return: SuccessLevel
+    """
+    if roll is None:
+        roll = percentile_dice(bonus).roll(rand)
+    return success_levels(_skill(skill))[_roll(roll)]
+
+
+def resolve_levels(skills: list, rolls: Optional[list] = None, bonus: Union[int, list] = 0,
+                   rand: Callable[[int], int] = random_func) -> list:
+    """
+    Resolve a batch of checks in one call
+    :param skills: skill values or Attributes
+    :param rolls: D100 results, missing ones (None) are rolled
+    :param bonus: bonus minus penalty dice, for all checks or per check
+    :param rand: random function
+    :return: list of SuccessLevel
+    """
+    count = len(skills)
+    rolls = [None] * count if rolls is None else list(rolls)
+    if len(rolls) != count:
+        raise ValueError(f"{len(rolls)} rolls for {count} skills")
+    bonuses = [bonus] * count if isinstance(bonus, int) else list(bonus)
+    missing = {}
+    for i, roll in enumerate(rolls):
+        if roll is None:
+            missing.setdefault(bonuses[i], []).append(i)
+    for dice_bonus, indices in missing.items():
+        for i, roll in zip(indices, percentile_dice(dice_bonus).roll_many(len(indices), rand)):
+            rolls[i] = roll
+    return [success_levels(_skill(skill))[_roll(roll)] for skill, roll in zip(skills, rolls)]
+
+
+def opposed(skill_a, level_a: SuccessLevel, skill_b, level_b: SuccessLevel) -> int:
+    """
+    Decide an opposed roll: the higher success level wins; on equal levels the higher skill wins.
+    If both fail, or levels and skills are equal, nobody wins.
+    :param skill_a: skill value or Attribute of side A
+    :param level_a: success level of side A
+    :param skill_b: skill value or Attribute of side B
+    :param level_b: success level of side B
+    :return: A_WINS, DRAW or B_WINS
+    """
+    if level_a < REGULAR and level_b < REGULAR:
+        return DRAW
+    if level_a != level_b:
+        return A_WINS if level_a > level_b else B_WINS
+    skill_a, skill_b = _skill(skill_a), _skill(skill_b)
+    if skill_a != skill_b:
+        return A_WINS if skill_a > skill_b else B_WINS
+    return DRAW
+
+
+def resolve_opposed(pairs: list, bonus_a: Union[int, list] = 0, bonus_b: Union[int, list] = 0,
+                    rand: Callable[[int], int] = random_func) -> list:
+    """
+    Roll and decide a batch of opposed contests
+    :param pairs: list of (skill A, skill B), values or Attributes
+    :param bonus_a: bonus minus penalty dice of side A, for all contests or per contest
+    :param bonus_b: bonus minus penalty dice of side B, for all contests or per contest
+    :param rand: random function
+    :return: list of A_WINS, DRAW or B_WINS
+    """
+    side_a = [a for a, _ in pairs]
+    side_b = [b for _, b in pairs]
+    levels_a = resolve_levels(side_a, bonus=bonus_a, rand=rand)
+    levels_b = resolve_levels(side_b, bonus=bonus_b, rand=rand)
+    return [opposed(*contest) for contest in zip(side_a, levels_a, side_b, levels_b)]
+
+
+@functools.lru_cache(maxsize=4096)
+def level_probabilities(skill: int, bonus: int = 0) -> tuple:
+    """
+    Exact probability of every success level
+    :param skill: skill value
+    :param bonus: bonus minus penalty dice
+    :return: tuple of probabilities indexed by SuccessLevel
+    """
+    levels = success_levels(skill)
+    ret = [0.0] * len(SuccessLevel)
+    for roll, p in percentile_dice(bonus).distribution().items():
+        ret[levels[roll]] += p
+    return tuple(ret)
+
+
+@functools.lru_cache(maxsize=65536)
+def _opposed_probabilities(skill_a: int, skill_b: int, bonus_a: int, bonus_b: int) -> tuple:
+    probabilities = [0.0, 0.0, 0.0]
+    for level_a, p in enumerate(level_probabilities(skill_a, bonus_a)):
+        for level_b, q in enumerate(level_probabilities(skill_b, bonus_b)):
+            probabilities[opposed(skill_a, level_a, skill_b, level_b)] += p * q
+    return probabilities[A_WINS], probabilities[DRAW], probabilities[B_WINS]
+
+
+def opposed_probabilities(skill_a, skill_b, bonus_a: int = 0, bonus_b: int = 0) -> tuple:
+    """
+    Exact outcome probabilities of an opposed contest, cached per pair of skills
+    :param skill_a: skill value or Attribute of side A
+    :param skill_b: skill value or Attribute of side B
+    :param bonus_a: bonus minus penalty dice of side A
+    :param bonus_b: bonus minus penalty dice of side B
+    :return: (A wins, draw, B wins)
+    """
+    return _opposed_probabilities(_skill(skill_a), _skill(skill_b), bonus_a, bonus_b)
+
+
+if __name__ == "__main__":
+    raise NotImplementedError(__file__)
@@ -0,0 +1,196 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+
+from typing import Callable, Optional
+
+from coc.core.check import success_levels, REGULAR
+from coc.core.dice import compile_expression
+from coc.core.roll import random_func
+from coc.lib.logger import LOGGER
+
+UNARMED = "1D3"
+DODGE, FIGHT_BACK = "dodge", "fight back"
+MAX_ROUNDS = 100
+
+
+class Combatant:
+    """
+    Participant in a fight. The damage expression (weapon plus damage bonus) is compiled once.
+    """
+
+    def __init__(self, name: str, hit_points: int, dexterity: int, fighting: int, dodge: Optional[int] = None,
+                 weapon: str = UNARMED, damage_bonus: str = "0", armor: int = 0, response: Optional[str] = None):
+        """
+        :param name: name
+        :param hit_points: hit points at the start of the fight
+        :param dexterity: DEX, decides who acts first
+        :param fighting: fighting skill used to attack and fight back
+        :param dodge: dodge skill, half DEX if missing
+        :param weapon: damage expression of the weapon
+        :param damage_bonus: damage bonus expression, e.g. -1, 0, D4
+        :param armor: points subtracted from every damage roll against this combatant
+        :param response: DODGE or FIGHT_BACK when attacked, by default the higher skill is used
+        """
+        self.name = name
+        self.hit_points = hit_points
+        self.dexterity = dexterity
+        self.fighting = fighting
+        self.dodge = dexterity // 2 if dodge is None else dodge
+        self.weapon = weapon
+        self.damage_bonus = damage_bonus
+        self.armor = armor
+        if response is None:
+            response = DODGE if self.dodge > self.fighting else FIGHT_BACK
+        if response not in (DODGE, FIGHT_BACK):
+            raise ValueError(f"response must be {DODGE!r} or {FIGHT_BACK!r}: {response}")
+        self.response = response
+        self.damage = compile_expression(f"{weapon}+{damage_bonus}")
+
+    def __repr__(self):
+        return f"Combatant({self.name}, HP {self.hit_points}, DEX {self.dexterity}, Fighting {self.fighting}, " \
+               f"Dodge {self.dodge}, {self.damage.text})"
+
+    @classmethod
+    def from_investigator(cls, investigator, fighting: int = 25, dodge: Optional[int] = None,
+                          weapon: str = UNARMED, **kwargs):
+        """
+        Create a combatant from an investigator: hit points, DEX and damage bonus are taken over
+        :param investigator: Investigator
+        :param fighting: fighting skill, Brawl base value by default
+        :param dodge: dodge skill, half DEX if missing
+        :param weapon: damage expression of the weapon
+        :return: Combatant
+        """
+        return cls(f"{investigator.firstname} {investigator.surname}", investigator.hit_max, investigator.dexterity,
+                   fighting, dodge=dodge, weapon=weapon, damage_bonus=investigator.damage_bonus, **kwargs)
+
+
+class CombatResult:
+    """
+    Outcome of a number of simulated fights
+    """
+
+    def __init__(self, fights: int, wins_first: int, wins_second: int, rounds: list):
+        self.fights = fights
+        self.wins_first = wins_first
+        self.wins_second = wins_second
+        self.draws = fights - wins_first - wins_second
+        self.total_rounds = sum(rounds)
+
+    def __repr__(self):
+        return f"CombatResult(fights={self.fights}, first={self.win_rate_first:.3f}, " \
+               f"second={self.win_rate_second:.3f}, draw={self.draw_rate:.3f}, rounds={self.expected_rounds:.2f})"
+
+    @property
+    def win_rate_first(self) -> float:
+        return self.wins_first / self.fights
+
+    @property
+    def win_rate_second(self) -> float:
+        return self.wins_second / self.fights
+
+    @property
+    def draw_rate(self) -> float:
+        return self.draws / self.fights
+
+    @property
+    def expected_rounds(self) -> float:
+        return self.total_rounds / self.fights
+
+
+def _turn(attacker: Combatant, defender: Combatant, active: list, hit_points: dict,
+          rand: Callable[[int], int]) -> None:
+    """
+    Resolve the attack of attacker on defender in all active fights at once
+    :param attacker: attacking combatant
+    :param defender: defending combatant
+    :param active: indices of the fights that are still going on
+    :param hit_points: combatant -> list of hit points per fight
+    :param rand: random function
+    """
+    attack_levels = success_levels(attacker.fighting)
+    dodging = defender.response == DODGE
+    defend_levels = success_levels(defender.dodge if dodging else defender.fighting)
+    hits, counters = [], []
+    for fight in active:
+        attack = attack_levels[rand(100)]
+        defend = defend_levels[rand(100)]
+        if dodging:
+            if attack >= REGULAR and attack > defend:
+                hits.append(fight)
+        elif attack >= REGULAR and attack >= defend:
+            hits.append(fight)
+        elif defend >= REGULAR and defend > attack:
+            counters.append(fight)
+    for target, source, fights in ((defender, attacker, hits), (attacker, defender, counters)):
+        if not fights:
+            continue
+        damage = source.damage.roll_many(len(fights), rand)
+        points = hit_points[target]
+        armor = target.armor
+        for fight, value in zip(fights, damage):
+            points[fight] -= max(0, value - armor)
+
+
+def simulate(first: Combatant, second: Combatant, fights: int = 10000, max_rounds: int = MAX_ROUNDS,
+             rand: Callable[[int], int] = random_func) -> CombatResult:
+    """
+    Simulate many independent fights between two combatants. All fights advance one round at a time,
+    with the state of every fight kept in parallel lists.
+    Every round the combatants act in DEX order (fighting skill breaks ties, then the first combatant goes first).
+    A fight ends when a combatant drops to 0 hit points; a fight that lasts max_rounds is a draw.
+    :param first: first combatant
+    :param second: second combatant
+    :param fights: number of fights
+    :param max_rounds: maximum number of rounds per fight
+    :param rand: random function
+    :return: CombatResult
+    """
+    if fights < 1:
+        raise ValueError(f"fights must be at least 1: {fights}")
+    if first is second:
+        raise ValueError("a combatant can not fight itself")
+    order = sorted((first, second), key=lambda c: (-c.dexterity, -c.fighting, c is not first))
+    hit_points = {first: [first.hit_points] * fights, second: [second.hit_points] * fights}
+    rounds = [max_rounds] * fights
+    winner = [None] * fights
+    active = list(range(fights))
+    for current in range(1, max_rounds + 1):
+        for attacker in order:
+            defender = second if attacker is first else first
+            _turn(attacker, defender, active, hit_points, rand)
+            still_active = []
+            for fight in active:
+                if hit_points[defender][fight] <= 0:
+                    winner[fight] = attacker
+                    rounds[fight] = current
+                elif hit_points[attacker][fight] <= 0:
+                    winner[fight] = defender
+                    rounds[fight] = current
+                else:
+                    still_active.append(fight)
+            active = still_active
+        if not active:
+            break
+    result = CombatResult(fights, winner.count(first), winner.count(second), rounds)
+    LOGGER.debug(f"{first.name} vs {second.name}: {result}")
+    return result
+
+
+if __name__ == "__main__":
+    raise NotImplementedError(__file__)
@@ -0,0 +1,252 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+from array import array
+from typing import Callable, Optional, Union
+
+from coc.core.dice import compile_expression
+from coc.core.investigator import Investigator, SKILL_MAXIMUM, SKILL_IMPROVEMENT_FLOOR, SKILL_SANITY_REWARD
+from coc.core.roll import generator
+from coc.lib.logger import LOGGER
+
+_D100 = compile_expression("D100")
+_D10 = compile_expression("D10")
+_SANITY_REWARD = compile_expression("2D6")
+
+
+def improvement_chance(value: int, floor: Optional[int] = SKILL_IMPROVEMENT_FLOOR) -> float:
+    """
+    Chance that an improvement check succeeds: a D100 roll above the value, or above the floor
+    :param value: skill or characteristic value
+    :param floor: rolls above this always succeed, None for none (EDU)
+    :return: probability
+    """
+    limit = value if floor is None else min(value, floor)
+    return min(100, max(0, 100 - limit)) / 100
+
+
+def tick_chance(value: int, uses: Optional[int]) -> float:
+    """
+    Chance that a skill gets ticked in a session
+    :param value: skill value
+    :param uses: checks per session, a skill is ticked by a success. None to tick every skill every session.
+    :return: probability
+    """
+    if uses is None:
+        return 1.0
+    return 1.0 - (1.0 - min(100, max(0, value)) / 100) ** uses
+
+
+def _rand(rand: Optional[Callable[[int], int]]) -> Callable[[int], int]:
+    """
+    :param rand: random function or None
+    :return: rand, or a random function on the generator of the calling thread. The checks and metrics of
+    roll.random_func would cost more than the batches of a development phase themselves.
+    """
+    if rand is not None:
+        return rand
+    randrange = generator().randrange
+    return lambda limit: randrange(limit) + 1
+
+
+class Development:
+    """
+    Development phase of a campaign as a column store: the value and tick of every skill of every investigator
+    are kept in flat arrays, so the improvement checks of a session are rolled in one batch for all ticked skills.
+    Changes stay in the store until they are written back to the investigators.
+    """
+
+    def __init__(self, investigators=()):
+        """
+        :param investigators: investigators with their skills and ticks
+        """
+        self._investigators = []
+        self._index = {}
+        self.owners = array("i")
+        self.names = []
+        self.values = array("i")
+        self.ticks = bytearray()
+        self.sanity = array("i")
+        for investigator in investigators:
+            self.add(investigator)
+
+    def __len__(self):
+        return len(self._investigators)
+
+    def add(self, investigator: Investigator) -> int:
+        """
+        Add an investigator with the current values and ticks of all its skills
+        :param investigator: Investigator
+        :return: row number of the investigator
+        """
+        row = len(self._investigators)
+        self._investigators.append(investigator)
+        self.sanity.append(0)
+        for name, skill in investigator.skills.items():
+            self._index[row, name] = len(self.values)
+            self.owners.append(row)
+            self.names.append(name)
+            self.values.append(skill.regular)
+            self.ticks.append(name in investigator.ticks)
+        return row
+
+    def value(self, row: int, name: str) -> int:
+        """
+        :param row: row number of the investigator
+        :param name: skill name
+        :return: current value of the skill in the store
+        """
+        return self.values[self._index[row, name]]
+
+    def tick(self, row: int, name: str) -> None:
+        """
+        Mark a skill for an improvement check in the next step
+        :param row: row number of the investigator
+        :param name: skill name
+        """
+        self.ticks[self._index[row, name]] = 1
+
+    def use_skills(self, uses: int = 1, rand: Optional[Callable[[int], int]] = None) -> int:
+        """
+        Play a session: every skill is checked a number of times and ticked by a success
+        :param uses: checks per skill
+        :param rand: random function, see roll.random_func. By default the generator of the calling thread.
+        :return: number of ticked skills
+        """
+        values, ticks = self.values, self.ticks
+        rand = _rand(rand)
+        for _ in range(uses):
+            for i, (value, roll) in enumerate(zip(values, _D100.roll_many(len(values), rand))):
+                if roll <= value:
+                    ticks[i] = 1
+        return ticks.count(1)
+
+    def step(self, rand: Optional[Callable[[int], int]] = None) -> int:
+        """
+        End of session: one improvement check for every ticked skill, then all ticks are cleared. Sanity rewards for
+        reaching 90 are collected per investigator.
+        :param rand: random function, see roll.random_func. By default the generator of the calling thread.
+        :return: number of improved skills
+        """
+        values, ticks = self.values, self.ticks
+        rand = _rand(rand)
+        ticked = [i for i, tick in enumerate(ticks) if tick]
+        rolls = _D100.roll_many(len(ticked), rand)
+        gains = _D10.roll_many(len(ticked), rand)
+        improved = 0
+        for i, roll, gain in zip(ticked, rolls, gains):
+            value = values[i]
+            if roll > value or roll > SKILL_IMPROVEMENT_FLOOR:
+                new_value = min(value + gain, SKILL_MAXIMUM)
+                values[i] = new_value
+                improved += 1
+                if value < SKILL_SANITY_REWARD <= new_value:
+                    self.sanity[self.owners[i]] += _SANITY_REWARD.roll(rand)
+        self.ticks = bytearray(len(ticks))
+        return improved
+
+    def means(self) -> dict:
+        """
+        :return: skill name -> mean value over the investigators having the skill
+        """
+        totals, counts = {}, {}
+        for name, value in zip(self.names, self.values):
+            totals[name] = totals.get(name, 0) + value
+            counts[name] = counts.get(name, 0) + 1
+        return {name: totals[name] / counts[name] for name in totals}
+
+    def run(self, sessions: int, uses: Optional[int] = 1, rand: Optional[Callable[[int], int]] = None) -> list:
+        """
+        Simulate a number of sessions followed by their development phase
+        :param sessions: number of sessions
+        :param uses: checks per skill per session, None to tick every skill every session
+        :param rand: random function, see roll.random_func. By default the generator of the calling thread.
+        :return: progression curve, the mean value per skill before the first and after every session
+        """
+        rand = _rand(rand)
+        curve = [self.means()]
+        for _ in range(sessions):
+            if uses is None:
+                self.ticks = bytearray(b"\x01" * len(self.values))
+            else:
+                self.use_skills(uses, rand)
+            self.step(rand)
+            curve.append(self.means())
+        LOGGER.info(f"Simulated {sessions} sessions for {len(self)} investigators")
+        return curve
+
+    def write_back(self) -> None:
+        """
+        Copy the skill values, open ticks and collected sanity rewards to the investigators
+        """
+        for (row, name), i in self._index.items():
+            investigator = self._investigators[row]
+            investigator.skills[name].regular = self.values[i]
+            if self.ticks[i]:
+                investigator.ticks.add(name)
+            else:
+                investigator.ticks.discard(name)
+        for row, reward in enumerate(self.sanity):
+            if reward:
+                self._investigators[row].sanity.regular += reward
+        self.sanity = array("i", bytes(len(self.sanity) * self.sanity.itemsize))
+
+
+def forecast(start: Union[int, dict], sessions: int, uses: Optional[int] = 1,
+             floor: Optional[int] = SKILL_IMPROVEMENT_FLOOR, maximum: int = SKILL_MAXIMUM) -> list:
+    """
+    Exact distribution of a skill value over a number of sessions. The value is a Markov chain: every session the
+    skill is ticked, the improvement check succeeds and 1D10 is added, each with a chance depending on the value.
+    :param start: starting value, or dict of starting value to probability for a population
+    :param sessions: number of sessions
+    :param uses: checks per session, a skill is ticked by a success. None to tick the skill every session.
+    :param floor: improvement checks above this always succeed, None for characteristics like EDU
+    :param maximum: highest value
+    :return: list of dicts of value to probability, sorted by value, before the first and after every session
+    """
+    distribution = {start: 1.0} if isinstance(start, int) else dict(start)
+    ret = [dict(sorted(distribution.items()))]
+    for _ in range(sessions):
+        following = {}
+        for value, probability in distribution.items():
+            chance = tick_chance(value, uses) * improvement_chance(value, floor) if value < maximum else 0.0
+            if chance < 1.0:
+                following[value] = following.get(value, 0.0) + probability * (1.0 - chance)
+            if chance > 0.0:
+                share = probability * chance / 10
+                for gain in range(1, 11):
+                    new_value = min(value + gain, maximum)
+                    following[new_value] = following.get(new_value, 0.0) + share
+        distribution = following
+        ret.append(dict(sorted(distribution.items())))
+    return ret
+
+
+def expected_curve(start: Union[int, dict], sessions: int, **kwargs) -> list:
+    """
+    Expected skill value before the first and after every session
+    :param start: starting value, or dict of starting value to probability
+    :param sessions: number of sessions
+    :param kwargs: see forecast
+    :return: list of expected values
+    """
+    return [sum(value * probability for value, probability in distribution.items())
+            for distribution in forecast(start, sessions, **kwargs)]
+
+
+if __name__ == "__main__":
+    raise NotImplementedError(__file__)
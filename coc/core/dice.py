@@ -0,0 +1,522 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+
+import functools
+import itertools
+import re
+from typing import Callable
+
+TOKEN_PATTERN = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<dice>(?P<count>\d*)[dD](?P<sides>\d+|%))
+  | (?P<modifier>(?P<mod>kh|kl|dh|dl|k|b|p)(?P<mod_value>\d*))
+  | (?P<number>\d+)
+  | (?P<operator>[-+*/()])
+""", re.VERBOSE | re.IGNORECASE)
+
+MAX_DICE = 10000
+MAX_OUTCOMES = 1000000
+
+# receives every roll of a compiled expression when set, see set_journal
+_journal = None
+
+
+def set_journal(journal) -> None:
+    """
+    Record every roll of every compiled expression from now on, whatever random function it is rolled with
+    :param journal: object with a record(expression text, die results, total) method, e.g. a journal.Journal,
+    None to stop recording
+    """
+    global _journal
+    _journal = journal
+
+
+class Node:
+    """
+    Node of a parsed dice expression
+    """
+
+    def compile(self) -> Callable:
+        """
+        Compile the node into a closure
+        :return: function(rand) -> int, where rand(limit) returns a number between 1 and limit
+        """
+        raise NotImplementedError()
+
+    def compile_batch(self) -> Callable:
+        """
+        Compile the node into a batch closure
+        :return: function(n, rand) -> list of n results
+        """
+        scalar = self.compile()
+
+        def batch(n, rand):
+            return [scalar(rand) for _ in range(n)]
+
+        return batch
+
+    def distribution(self) -> dict:
+        """
+        Exact probability distribution of the node
+        :return: dict of result to probability
+        """
+        raise NotImplementedError()
+
+
+class Number(Node):
+    """
+    Constant
+    """
+
+    def __init__(self, value: int):
+        self.value = value
+
+    def __repr__(self):
+        return str(self.value)
+
+    def compile(self) -> Callable:
+        value = self.value
+        return lambda rand: value
+
+    def compile_batch(self) -> Callable:
+        value = self.value
+        return lambda n, rand: [value] * n
+
+    def distribution(self) -> dict:
+        return {self.value: 1.0}
+
+
+class Dice(Node):
+    """
+    NdM with optional keep/drop or bonus/penalty modifiers
+    """
+
+    def __init__(self, count: int, sides: int, keep: str = None, keep_count: int = None, bonus: int = 0):
+        if count < 1 or count > MAX_DICE:
+            raise ValueError(f"Number of dice must be between 1 and {MAX_DICE}: {count}")
+        if sides < 1:
+            raise ValueError(f"Sides {sides} must be strict positive integer")
+        if keep is not None and not 0 <= keep_count <= count:
+            raise ValueError(f"Can not keep or drop {keep_count} of {count} dice")
+        if bonus != 0 and (sides != 100 or count != 1 or keep is not None):
+            raise ValueError("Bonus and penalty dice only apply to a single D100")
+        self.count = count
+        self.sides = sides
+        self.keep = keep
+        self.keep_count = keep_count
+        self.bonus = bonus
+
+    def __repr__(self):
+        ret = f"{'' if self.count == 1 else self.count}D{self.sides}"
+        if self.keep is not None:
+            ret += f"{self.keep}{self.keep_count}"
+        if self.bonus > 0:
+            ret += f"b{self.bonus}"
+        elif self.bonus < 0:
+            ret += f"p{-self.bonus}"
+        return ret
+
+    def compile(self) -> Callable:
+        count, sides = self.count, self.sides
+        if self.bonus != 0:
+            return _compile_bonus_penalty(self.bonus)
+        if self.keep is not None:
+            return _compile_keep(count, sides, self.keep, self.keep_count)
+        if count == 1:
+            return lambda rand: rand(sides)
+        dice = range(count)
+        return lambda rand: sum([rand(sides) for _ in dice])
+
+    def compile_batch(self) -> Callable:
+        if self.count != 1 or self.keep is not None or self.bonus != 0:
+            return Node.compile_batch(self)
+        sides = self.sides
+        return lambda n, rand: [rand(sides) for _ in range(n)]
+
+    def distribution(self) -> dict:
+        if self.bonus != 0:
+            return _bonus_penalty_distribution(self.bonus)
+        if self.keep is not None:
+            if self.sides ** self.count > MAX_OUTCOMES:
+                raise ValueError(f"Too many outcomes to compute the distribution of {self}")
+            keep = _compile_keep(self.count, self.sides, self.keep, self.keep_count)
+            weight = 1.0 / self.sides ** self.count
+            ret = {}
+            for outcome in itertools.product(range(1, self.sides + 1), repeat=self.count):
+                value = keep(_scripted(outcome))
+                ret[value] = ret.get(value, 0.0) + weight
+            return ret
+        die = {value: 1.0 / self.sides for value in range(1, self.sides + 1)}
+        ret = die
+        for _ in range(self.count - 1):
+            ret = _combine(ret, die, "+")
+        return ret
+
+
+def _compile_keep(count: int, sides: int, keep: str, keep_count: int) -> Callable:
+    if keep in ("dh", "dl"):
+        keep, keep_count = ("kl" if keep == "dh" else "kh"), count - keep_count
+    dice = range(count)
+    if keep == "kh":
+        start, stop = count - keep_count, count
+    else:
+        start, stop = 0, keep_count
+
+    def keep_dice(rand):
+        return sum(sorted([rand(sides) for _ in dice])[start:stop])
+
+    return keep_dice
+
+
+def _compile_bonus_penalty(bonus: int) -> Callable:
+    tens = range(abs(bonus) + 1)
+    choose = min if bonus > 0 else max
+
+    def percentile(rand):
+        units = rand(10) - 1
+        return choose([(10 * (rand(10) - 1) + units) or 100 for _ in tens])
+
+    return percentile
+
+
+def _scripted(outcome: tuple) -> Callable:
+    values = iter(outcome)
+    return lambda limit: next(values)
+
+
+def _bonus_penalty_distribution(bonus: int) -> dict:
+    # for a fixed units die the tens dice are independent: the result is an order statistic of tens values
+    dice = abs(bonus) + 1
+    ret = {}
+    for units in range(10):
+        values = sorted((10 * tens + units) or 100 for tens in range(10))
+        for j, value in enumerate(values):
+            if bonus > 0:
+                p = (1 - j / 10) ** dice - (1 - (j + 1) / 10) ** dice
+            else:
+                p = ((j + 1) / 10) ** dice - (j / 10) ** dice
+            ret[value] = ret.get(value, 0.0) + p / 10
+    return ret
+
+
+def _combine(left: dict, right: dict, operator: str) -> dict:
+    ret = {}
+    for a, p in left.items():
+        for b, q in right.items():
+            if operator == "+":
+                value = a + b
+            elif operator == "-":
+                value = a - b
+            elif operator == "*":
+                value = a * b
+            else:
+                value = _divide(a, b)
+            ret[value] = ret.get(value, 0.0) + p * q
+    return ret
+
+
+class Negate(Node):
+    """
+    Unary minus
+    """
+
+    def __init__(self, operand: Node):
+        self.operand = operand
+
+    def __repr__(self):
+        return f"-{self.operand}"
+
+    def compile(self) -> Callable:
+        operand = self.operand.compile()
+        return lambda rand: -operand(rand)
+
+    def compile_batch(self) -> Callable:
+        operand = self.operand.compile_batch()
+        return lambda n, rand: [-value for value in operand(n, rand)]
+
+    def distribution(self) -> dict:
+        return {-value: p for value, p in self.operand.distribution().items()}
+
+
+class BinaryOperation(Node):
+    """
+    Addition, subtraction, multiplication and (floor) division
+    """
+
+    def __init__(self, operator: str, left: Node, right: Node):
+        self.operator = operator
+        self.left = left
+        self.right = right
+
+    def __repr__(self):
+        return f"({self.left}{self.operator}{self.right})"
+
+    def compile(self) -> Callable:
+        left, right = self.left.compile(), self.right.compile()
+        if isinstance(self.right, Number):
+            constant = self.right.value
+            if self.operator == "+":
+                return lambda rand: left(rand) + constant
+            if self.operator == "-":
+                return lambda rand: left(rand) - constant
+            if self.operator == "*":
+                return lambda rand: left(rand) * constant
+            if constant == 0:
+                raise ValueError("Division by zero")
+            return lambda rand: left(rand) // constant
+        if self.operator == "+":
+            return lambda rand: left(rand) + right(rand)
+        if self.operator == "-":
+            return lambda rand: left(rand) - right(rand)
+        if self.operator == "*":
+            return lambda rand: left(rand) * right(rand)
+        return lambda rand: _divide(left(rand), right(rand))
+
+    def compile_batch(self) -> Callable:
+        left, right = self.left.compile_batch(), self.right.compile_batch()
+        if self.operator == "+":
+            return lambda n, rand: [a + b for a, b in zip(left(n, rand), right(n, rand))]
+        if self.operator == "-":
+            return lambda n, rand: [a - b for a, b in zip(left(n, rand), right(n, rand))]
+        if self.operator == "*":
+            return lambda n, rand: [a * b for a, b in zip(left(n, rand), right(n, rand))]
+        return lambda n, rand: [_divide(a, b) for a, b in zip(left(n, rand), right(n, rand))]
+
+    def distribution(self) -> dict:
+        return _combine(self.left.distribution(), self.right.distribution(), self.operator)
+
+
+def _divide(a: int, b: int) -> int:
+    if b == 0:
+        raise ValueError("Division by zero")
+    return a // b
+
+
+def tokenize(text: str) -> list:
+    """
+    Split a dice expression in tokens
+    :param text: dice expression, e.g. (2D6+6)*5
+    :return: list of (kind, value) tuples
+    """
+    tokens = []
+    position = 0
+    while position < len(text):
+        match = TOKEN_PATTERN.match(text, position)
+        if match is None:
+            raise ValueError(f"Unexpected character {text[position]!r} at position {position} in {text!r}")
+        position = match.end()
+        kind = match.lastgroup
+        if kind == "space":
+            continue
+        if match.group("dice") is not None:
+            sides = match.group("sides")
+            tokens.append(("dice", (int(match.group("count") or 1), 100 if sides == "%" else int(sides))))
+        elif match.group("modifier") is not None:
+            tokens.append(("modifier", (match.group("mod").lower(), match.group("mod_value"))))
+        elif match.group("number") is not None:
+            tokens.append(("number", int(match.group("number"))))
+        else:
+            tokens.append(("operator", match.group("operator")))
+    return tokens
+
+
+class _Parser:
+    """
+    Recursive descent parser:
+        expression := term (('+' | '-') term)*
+        term       := unary (('*' | '/') unary)*
+        unary      := '-' unary | primary
+        primary    := number | dice modifier* | '(' expression ')'
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = tokenize(text)
+        self.position = 0
+
+    def _peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def _next(self):
+        token = self._peek()
+        self.position += 1
+        return token
+
+    def _error(self, message: str) -> ValueError:
+        return ValueError(f"{message} in dice expression {self.text!r}")
+
+    def parse(self) -> Node:
+        if not self.tokens:
+            raise self._error("Empty expression")
+        node = self._expression()
+        if self.position != len(self.tokens):
+            raise self._error(f"Unexpected {self._peek()[1]!r}")
+        return node
+
+    def _expression(self) -> Node:
+        node = self._term()
+        while self._peek() in (("operator", "+"), ("operator", "-")):
+            node = BinaryOperation(self._next()[1], node, self._term())
+        return node
+
+    def _term(self) -> Node:
+        node = self._unary()
+        while self._peek() in (("operator", "*"), ("operator", "/")):
+            node = BinaryOperation(self._next()[1], node, self._unary())
+        return node
+
+    def _unary(self) -> Node:
+        if self._peek() == ("operator", "-"):
+            self._next()
+            operand = self._unary()
+            return Number(-operand.value) if isinstance(operand, Number) else Negate(operand)
+        return self._primary()
+
+    def _primary(self) -> Node:
+        kind, value = self._next()
+        if kind == "number":
+            return Number(value)
+        if kind == "dice":
+            return self._dice(*value)
+        if (kind, value) == ("operator", "("):
+            node = self._expression()
+            if self._next() != ("operator", ")"):
+                raise self._error("Missing ')'")
+            return node
+        raise self._error("Unexpected end" if kind is None else f"Unexpected {value!r}")
+
+    def _dice(self, count: int, sides: int) -> Node:
+        keep, keep_count, bonus = None, None, 0
+        while self._peek()[0] == "modifier":
+            modifier, modifier_value = self._next()[1]
+            if modifier in ("b", "p"):
+                amount = int(modifier_value or 1)
+                bonus += amount if modifier == "b" else -amount
+                continue
+            if keep is not None:
+                raise self._error("Only one keep or drop modifier allowed")
+            if modifier_value == "":
+                raise self._error(f"Modifier {modifier} needs a number")
+            keep = "kh" if modifier == "k" else modifier
+            keep_count = int(modifier_value)
+        if bonus != 0 and sides != 100:
+            raise self._error("Bonus and penalty dice only apply to D100")
+        return Dice(count, sides, keep, keep_count, bonus)
+
+
+class Expression:
+    """
+    Compiled dice expression. Immutable, so instances can be shared.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.tree = _Parser(text).parse()
+        self._scalar = self.tree.compile()
+        self._batch = self.tree.compile_batch()
+        self._distribution = None
+
+    def __repr__(self):
+        return f"Expression({self.text!r})"
+
+    def roll(self, rand: Callable[[int], int]) -> int:
+        """
+        Evaluate the expression once
+        :param rand: function returning a random number between 1 and its argument
+        :return: result
+        """
+        journal = _journal
+        if journal is None:
+            return self._scalar(rand)
+        return self._recorded(rand, journal)
+
+    def _recorded(self, rand: Callable[[int], int], journal) -> int:
+        """
+        Evaluate the expression once and hand the die results and the total to the journal
+        :param rand: function returning a random number between 1 and its argument
+        :param journal: see set_journal
+        :return: result
+        """
+        dice = []
+
+        def recording_func(limit: int) -> int:
+            value = rand(limit)
+            dice.append(value)
+            return value
+
+        total = self._scalar(recording_func)
+        journal.record(self.text, dice, total)
+        return total
+
+    def evaluate(self, rand: Callable[[int], int]) -> int:
+        """
+        Evaluate the expression once without recording it in the journal, e.g. to replay recorded dice
+        :param rand: function returning a random number between 1 and its argument
+        :return: result
+        """
+        return self._scalar(rand)
+
+    def roll_many(self, n: int, rand: Callable[[int], int]) -> list:
+        """
+        Evaluate the expression n times
+        :param n: number of evaluations
+        :param rand: function returning a random number between 1 and its argument
+        :return: list of n results
+        """
+        journal = _journal
+        if journal is None:
+            return self._batch(n, rand)
+        # every roll gets its own journal record
+        return [self._recorded(rand, journal) for _ in range(n)]
+
+    def distribution(self) -> dict:
+        """
+        Exact probability distribution, computed on first use. The returned dict is shared, do not modify it.
+        :return: dict of result to probability, sorted by result
+        """
+        if self._distribution is None:
+            self._distribution = dict(sorted(self.tree.distribution().items()))
+        return self._distribution
+
+    @property
+    def minimum(self) -> int:
+        """
+        :return: lowest possible result
+        """
+        return next(iter(self.distribution()))
+
+    @property
+    def maximum(self) -> int:
+        """
+        :return: highest possible result
+        """
+        return next(reversed(self.distribution()))
+
+
+@functools.lru_cache(maxsize=1024)
+def compile_expression(text: str) -> Expression:
+    """
+    Parse and compile a dice expression. Results are cached.
+    :param text: dice expression, e.g. 3D6*5, 4D6kh3, D100b1, (2D6+6)*5
+    :return: compiled Expression
+    """
+    return Expression(text)
+
+
+if __name__ == "__main__":
+    raise NotImplementedError(__file__)
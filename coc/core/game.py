@@ -16,5 +16,288 @@
 
 """
 
-if __name__ == "__name__":
-    raise NotImplementedError()
+import copy
+import json
+import os
+import time
+from typing import Optional
+
+from coc.core import check
+from coc.core.investigator import Investigator
+from coc.core.roll import Roll, random_func
+from coc.lib.logger import LOGGER
+
+SNAPSHOT_INTERVAL = 100
+SNAPSHOT_SUFFIX = ".snapshots"
+
+CREATE, ROLL, CHECK, SET, UNDO = "create", "roll", "check", "set", "undo"
+
+
+class Event:
+    """
+    Entry of the session log. Stored as one compact JSON line: {"s": seq, "t": time, "k": kind, "i": key, "d": data}
+    """
+    __slots__ = ("seq", "time", "kind", "key", "data")
+
+    def __init__(self, seq: int, kind: str, key: Optional[str], data: dict, timestamp: float = None):
+        self.seq = seq
+        self.time = time.time() if timestamp is None else timestamp
+        self.kind = kind
+        self.key = key
+        self.data = data
+
+    def __repr__(self):
+        return f"Event({self.seq}, {self.kind}, {self.key}, {self.data})"
+
+    def to_json(self) -> str:
+        return json.dumps({"s": self.seq, "t": self.time, "k": self.kind, "i": self.key, "d": self.data},
+                          separators=(",", ":"))
+
+    @staticmethod
+    def from_json(line: str):
+        record = json.loads(line)
+        return Event(record["s"], record["k"], record["i"], record["d"], record["t"])
+
+
+def _get_field(record: dict, field: str):
+    if field in record["chars"]:
+        return record["chars"][field]
+    if field == "SAN":
+        return record["sanity"]["regular"]
+    # the same fields as _set_field, so a change is rejected before it is recorded
+    if field in record and field not in ("chars", "sanity"):
+        return record[field]
+    raise KeyError(f"Unknown field {field}")
+
+
+def _set_field(record: dict, field: str, value) -> None:
+    if field in record["chars"]:
+        record["chars"][field] = value
+    elif field == "SAN":
+        record["sanity"]["regular"] = value
+    elif field in record and field not in ("chars", "sanity"):
+        record[field] = value
+    else:
+        raise KeyError(f"Unknown field {field}")
+
+
+class Session:
+    """
+    Game session as an append-only event log of rolls, checks and stat changes.
+    The state of every investigator at any point is derived from the log, starting from the nearest snapshot.
+    With a file path, events are appended as JSON lines and the latest snapshot is kept in a file next to it.
+    The log stays open until close(), a session can be used as context manager.
+    """
+
+    def __init__(self, file_path: Optional[str] = None, snapshot_interval: int = SNAPSHOT_INTERVAL):
+        if snapshot_interval < 1:
+            raise ValueError(f"snapshot_interval must be at least 1: {snapshot_interval}")
+        self.file_path = file_path
+        self.snapshot_interval = snapshot_interval
+        self.events = []
+        self.snapshots = {0: {}}
+        self._state = {}
+        self._undone = set()
+        self._next_key = 1
+        self._log = None
+
+    def __len__(self):
+        return len(self.events)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self) -> None:
+        """
+        Close the log file, a later event opens it again
+        """
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    @property
+    def seq(self) -> int:
+        """
+        :return: sequence number of the last event, 0 for an empty session
+        """
+        return len(self.events)
+
+    def _append(self, kind: str, key: Optional[str], data: dict) -> Event:
+        event = Event(self.seq + 1, kind, key, data)
+        # an event that can not be applied is not recorded, so memory and file keep the same sequence numbers
+        self._apply(self._state, event)
+        self.events.append(event)
+        if self.file_path is not None:
+            if self._log is None:
+                self._log = open(self.file_path, "a", encoding="utf-8")
+            self._log.write(event.to_json() + "\n")
+            # every event is on disk before the next one, so a crash loses at most the event being written
+            self._log.flush()
+        if event.seq % self.snapshot_interval == 0:
+            self._snapshot(event.seq)
+        return event
+
+    def _snapshot(self, seq: int) -> None:
+        state = copy.deepcopy(self._state)
+        self.snapshots[seq] = state
+        if self.file_path is not None:
+            # only the latest snapshot is kept, replaced in one step so a crash leaves the previous one
+            snapshot_path = self.file_path + SNAPSHOT_SUFFIX
+            temp_path = snapshot_path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as out:
+                out.write(json.dumps({"s": seq, "state": state, "undone": sorted(self._undone)},
+                                     separators=(",", ":")) + "\n")
+            os.replace(temp_path, snapshot_path)
+
+    def _apply(self, state: dict, event: Event, undone: set = None) -> None:
+        undone = self._undone if undone is None else undone
+        if event.kind == CREATE:
+            state[event.key] = copy.deepcopy(event.data["investigator"])
+        elif event.kind == SET:
+            _set_field(state[event.key], event.data["field"], event.data["value"])
+        elif event.kind == UNDO:
+            target = self.events[event.data["seq"] - 1]
+            undone.add(target.seq)
+            if target.kind == CREATE:
+                del state[target.key]
+            elif target.kind == SET:
+                _set_field(state[target.key], target.data["field"], target.data["old"])
+
+    def add_investigator(self, investigator: Investigator, key: Optional[str] = None) -> str:
+        """
+        Add an investigator to the session
+        :param investigator: Investigator
+        :param key: identifier in the session, generated if missing
+        :return: key
+        """
+        if key is None:
+            while f"I{self._next_key}" in self._state:
+                self._next_key += 1
+            key = f"I{self._next_key}"
+        if key in self._state:
+            raise KeyError(f"Investigator {key} already exists")
+        self._append(CREATE, key, {"investigator": investigator.as_dict()})
+        return key
+
+    def roll(self, expression: str, key: Optional[str] = None, context: Optional[str] = None) -> int:
+        """
+        Roll dice and record the result
+        :param expression: dice expression
+        :param key: investigator making the roll
+        :param context: free text, e.g. "damage"
+        :return: result
+        """
+        value = Roll(expression).roll()
+        self._append(ROLL, key, {"expression": expression, "value": value, "context": context})
+        return value
+
+    def check(self, key: str, field: str, bonus: int = 0, roll: Optional[int] = None) -> check.SuccessLevel:
+        """
+        Check a characteristic (or SAN) of an investigator and record roll and success level
+        :param key: investigator
+        :param field: characteristic code or SAN
+        :param bonus: bonus minus penalty dice
+        :param roll: D100 result, rolled if missing
+        :return: SuccessLevel
+        """
+        skill = _get_field(self._state[key], field)
+        if roll is None:
+            roll = check.percentile_dice(bonus).roll(random_func)
+        level = check.success_level(skill, roll)
+        self._append(CHECK, key, {"field": field, "skill": skill, "bonus": bonus, "roll": roll, "level": int(level)})
+        return level
+
+    def change(self, key: str, field: str, value) -> None:
+        """
+        Change a value of an investigator
+        :param key: investigator
+        :param field: characteristic code, SAN or a plain field like age or residence
+        :param value: new value
+        """
+        old = _get_field(self._state[key], field)
+        self._append(SET, key, {"field": field, "value": value, "old": old})
+
+    def undo(self) -> Optional[Event]:
+        """
+        Undo the last event that is not undone yet. Undo is itself an event, the log is never rewritten.
+        :return: the undone event, None if there is nothing to undo
+        """
+        for event in reversed(self.events):
+            if event.kind != UNDO and event.seq not in self._undone:
+                self._append(UNDO, event.key, {"seq": event.seq})
+                return event
+        return None
+
+    def state(self, seq: Optional[int] = None) -> dict:
+        """
+        State of all investigators after an event, replayed from the nearest snapshot
+        :param seq: sequence number, the current state if missing
+        :return: dict of key to investigator record (a copy)
+        """
+        if seq is None or seq >= self.seq:
+            return copy.deepcopy(self._state)
+        start = max(s for s in self.snapshots if s <= seq)
+        state = copy.deepcopy(self.snapshots[start])
+        undone = set()
+        for event in self.events[start:seq]:
+            self._apply(state, event, undone)
+        return state
+
+    def investigator(self, key: str, seq: Optional[int] = None) -> Investigator:
+        """
+        Rebuild an investigator
+        :param key: investigator
+        :param seq: sequence number, the current state if missing
+        :return: Investigator
+        """
+        record = self._state.get(key) if seq is None or seq >= self.seq else self.state(seq).get(key)
+        if record is None:
+            raise KeyError(f"No investigator {key} at event {self.seq if seq is None else seq}")
+        return Investigator.from_dict(record)
+
+    def audit(self, key: Optional[str] = None, kind: Optional[str] = None) -> list:
+        """
+        Events of an investigator and/or of a kind
+        :param key: investigator, all if missing
+        :param kind: event kind, all if missing
+        :return: list of Event
+        """
+        return [event for event in self.events
+                if (key is None or event.key == key) and (kind is None or event.kind == kind)]
+
+    @classmethod
+    def load(cls, file_path: str, snapshot_interval: int = SNAPSHOT_INTERVAL):
+        """
+        Open a session log. The current state is taken from the last snapshot, only later events are replayed.
+        :param file_path: session log
+        :param snapshot_interval: events between two snapshots
+        :return: Session
+        """
+        session = cls(None, snapshot_interval)
+        if os.path.exists(file_path):
+            with open(file_path, "r", encoding="utf-8") as lines:
+                session.events = [Event.from_json(line) for line in lines if line.strip()]
+        snapshot_path = file_path + SNAPSHOT_SUFFIX
+        last = 0
+        if os.path.exists(snapshot_path):
+            with open(snapshot_path, "r", encoding="utf-8") as lines:
+                for line in lines:
+                    record = json.loads(line)
+                    if record["s"] <= len(session.events):
+                        session.snapshots[record["s"]] = record["state"]
+                        if record["s"] >= last:
+                            last = record["s"]
+                            session._undone = set(record["undone"])
+        session._state = copy.deepcopy(session.snapshots[last])
+        for event in session.events[last:]:
+            session._apply(session._state, event)
+        session.file_path = file_path
+        LOGGER.info(f"Loaded {len(session.events)} events from {file_path}, replayed {len(session.events) - last}")
+        return session
+
+
+if __name__ == "__main__":
+    raise NotImplementedError(__file__)
@@ -67,14 +67,14 @@ class Gender(Enum):
 NOUN = {
     Gender.MALE: "man",
     Gender.FEMALE: "woman",
-    Gender.X: "x"
+    Gender.X: "person"
 
 }
 
 POSSESSIVE_PRONOUN = {
     Gender.MALE: "his",
     Gender.FEMALE: "her",
-    Gender.X: "theirs"
+    Gender.X: "their"
 }
 
 OBJECT_PRONOUN = {
@@ -89,5 +89,12 @@ PERSONAL_PRONOUN = {
     Gender.X: "they"
 }
 
+# "to be" agreeing with the personal pronoun
+VERB_BE = {
+    Gender.MALE: "is",
+    Gender.FEMALE: "is",
+    Gender.X: "are"
+}
+
 if __name__ == "__name__":
     raise NotImplementedError()
@@ -0,0 +1,345 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+
+import functools
+import os
+import threading
+from bisect import bisect_left
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Union
+
+from coc.core.dice import compile_expression
+from coc.core.gender import Gender
+from coc.core.investigator import Investigator, CHARACTERISTICS, age_rule, APP, EDU
+from coc.core.roll import random_func, seed_thread
+from coc.core.rules import AGE_MIN, AGE_MAX, Era
+from coc.lib import database
+from coc.lib.names import UniqueNames
+
+DEFAULT_PLACE = "Arkham"
+NAMED_GENDERS = (Gender.MALE, Gender.FEMALE)
+MAX_ATTEMPTS = 1000
+# investigators per task of parallel generation
+CHUNK_SIZE = 64
+
+_unique_names_lock = threading.Lock()
+# granularity of the uniform draw used to sample a truncated distribution
+RESOLUTION = 2 ** 32
+
+
+def random_gender() -> Gender:
+    """
+    Pick a gender for which first names are available
+    :return: Gender
+    """
+    return NAMED_GENDERS[random_func(len(NAMED_GENDERS)) - 1]
+
+
+def random_age(minimum: int = AGE_MIN, maximum: int = AGE_MAX) -> int:
+    """
+    Pick an age in a range
+    :param minimum: lowest age
+    :param maximum: highest age
+    :return: age
+    """
+    if minimum > maximum:
+        raise ValueError(f"minimum age {minimum} exceeds maximum age {maximum}")
+    return minimum + random_func(maximum - minimum + 1) - 1
+
+
+def _identity(gender: Optional[Gender], language: Optional[str], occupation: Optional[str],
+              unique_names: Optional[dict] = None, name_source: Optional[str] = database.CORPUS,
+              era: Optional[Era] = None) -> dict:
+    """
+    Pick the missing gender and occupation and the names of a new investigator
+    :param gender: gender
+    :param language: language of the names, e.g. EN, NL, DA
+    :param occupation: occupation
+    :param unique_names: optional gender -> UniqueNames to draw names without replacement from
+    :param name_source: database.CORPUS or database.SYNTHETIC, when no unique names are asked for. None to leave
+    the names empty, to be filled in later.
+    :param era: era of the names from the files, ignored for unique and synthetic names
+    :return: dict of Investigator keyword arguments
+    """
+    if gender is None:
+        gender = random_gender()
+    if occupation is None:
+        occupation = database.get_occupation()
+    name_gender = gender if gender in NAMED_GENDERS else None
+    if unique_names is not None:
+        if name_gender not in unique_names:
+            with _unique_names_lock:
+                if name_gender not in unique_names:
+                    taken = next(iter(unique_names.values())).taken if unique_names else set()
+                    unique_names[name_gender] = UniqueNames(gender=name_gender, language=language, taken=taken)
+        firstname, surname = unique_names[name_gender].next_name()
+    elif name_source is None:
+        firstname = surname = None
+    else:
+        firstname = database.get_first_name(gender=name_gender, language=language, era=era, source=name_source)
+        surname = database.get_last_name(language=language, era=era, source=name_source)
+    return {"firstname": firstname, "surname": surname, "gender": gender, "occupation": occupation}
+
+
+def random_investigator(gender: Optional[Gender] = None, language: Optional[str] = None,
+                        age: Union[int, tuple, None] = None,
+                        occupation: Optional[str] = None, birthplace: str = DEFAULT_PLACE,
+                        residence: str = DEFAULT_PLACE, unique_names: Optional[dict] = None,
+                        name_source: Optional[str] = database.CORPUS, era: Optional[Era] = None) -> Investigator:
+    """
+    Generate an investigator. Every missing property is picked at random.
+    :param gender: gender
+    :param language: language of the names, e.g. EN, NL, DA
+    :param age: age or (minimum, maximum) age
+    :param occupation: occupation
+    :param birthplace: place of birth
+    :param residence: place of residence
+    :param unique_names: optional gender -> UniqueNames, shared between calls to avoid repeating full names
+    :param name_source: database.CORPUS for names from the files, database.SYNTHETIC for generated names, None for
+    no names
+    :param era: era of the names from the files, None for names of any era
+    :return: Investigator
+    """
+    if age is None:
+        age = random_age()
+    elif isinstance(age, tuple):
+        age = random_age(*age)
+    return Investigator(birthplace=birthplace, residence=residence, age=age,
+                        **_identity(gender, language, occupation, unique_names, name_source, era))
+
+
+def random_investigators(count: int, unique: bool = False, **kwargs) -> list:
+    """
+    Generate a number of investigators
+    :param count: number of investigators
+    :param unique: give every investigator a different full name, raises NamespaceExhausted if there are too few
+    :param kwargs: see random_investigator
+    :return: list of Investigator
+    """
+    if unique:
+        kwargs["unique_names"] = {}
+    return [random_investigator(**kwargs) for _ in range(count)]
+
+
+def _unique_names(gender: Optional[Gender], language: Optional[str], seed=None) -> dict:
+    """
+    Build the unique name generators of a parallel generation in the calling thread, so their shuffles and offsets
+    only depend on the seed
+    :param gender: gender of all investigators, None for random genders
+    :param language: language of the names
+    :param seed: seed (int or str), None for a random order
+    :return: gender -> UniqueNames, sharing one visited set
+    """
+    if seed is not None:
+        seed_thread(f"{seed}/names")
+    genders = NAMED_GENDERS if gender is None else (gender if gender in NAMED_GENDERS else None,)
+    taken = set()
+    return {name_gender: UniqueNames(gender=name_gender, language=language, taken=taken) for name_gender in genders}
+
+
+def iter_investigators(count: int, workers: Optional[int] = None, seed=None, unique: bool = False,
+                       chunk_size: int = CHUNK_SIZE, **kwargs):
+    """
+    Generate investigators as a stream, in chunks on a thread pool when there is more than one worker. At most two
+    chunks per worker are in flight, so memory use does not grow with the count. With a seed every chunk reseeds
+    the random stream of its thread from the seed and its chunk number, so the result does not depend on the
+    number of workers or the scheduling. Unique names are drawn in the calling thread as the chunks are yielded in
+    order, so they are reproducible as well.
+    :param count: number of investigators
+    :param workers: number of threads, None or 1 to generate in the calling thread
+    :param seed: seed (int or str) for reproducible results, None for independent random streams
+    :param unique: give every investigator a different full name
+    :param chunk_size: investigators per chunk
+    :param kwargs: see random_investigator
+    :return: generator of Investigator
+    """
+    if chunk_size < 1:
+        raise ValueError(f"chunk size must be at least 1: {chunk_size}")
+    unique_names = None
+    if unique:
+        unique_names = _unique_names(kwargs.get("gender"), kwargs.get("language"), seed)
+        kwargs["name_source"] = None
+
+    def task(chunk: int) -> list:
+        if seed is not None:
+            seed_thread(f"{seed}/{chunk}")
+        return [random_investigator(**kwargs) for _ in range(min(chunk_size, count - chunk * chunk_size))]
+
+    def named(investigators: list) -> list:
+        if unique_names is not None:
+            for investigator in investigators:
+                name_gender = investigator.gender if investigator.gender in NAMED_GENDERS else None
+                investigator.firstname, investigator.surname = unique_names[name_gender].next_name()
+        return investigators
+
+    chunks = range((count + chunk_size - 1) // chunk_size)
+    if workers is None or workers <= 1:
+        for chunk in chunks:
+            yield from named(task(chunk))
+        return
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="coc-generator") as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(task, chunk))
+            if len(pending) >= 2 * workers:
+                yield from named(pending.popleft().result())
+        while pending:
+            yield from named(pending.popleft().result())
+
+
+def generate_parallel(count: int, workers: Optional[int] = None, seed=None, unique: bool = False,
+                      chunk_size: int = CHUNK_SIZE, **kwargs) -> list:
+    """
+    Generate a number of investigators on a thread pool, see iter_investigators
+    :param count: number of investigators
+    :param workers: number of threads, by default as ThreadPoolExecutor decides
+    :param seed: seed (int or str) for reproducible results, None for independent random streams
+    :param unique: give every investigator a different full name
+    :param chunk_size: investigators per task
+    :param kwargs: see random_investigator
+    :return: list of Investigator
+    """
+    if workers is None:
+        workers = min(32, (os.cpu_count() or 1) + 4)
+    return list(iter_investigators(count, workers, seed, unique, chunk_size, **kwargs))
+
+
+@functools.lru_cache(maxsize=None)
+def truncated_table(dice: str, minimum: Optional[int] = None, maximum: Optional[int] = None) -> tuple:
+    """
+    Exact distribution of a dice expression restricted to a range, as a cumulative table
+    :param dice: dice expression, e.g. 3D6*5
+    :param minimum: lowest value allowed, None for no lower bound
+    :param maximum: highest value allowed, None for no upper bound
+    :return: (values, cumulative weights scaled to RESOLUTION)
+    """
+    allowed = [(value, probability) for value, probability in sorted(compile_expression(dice).distribution().items())
+               if (minimum is None or value >= minimum) and (maximum is None or value <= maximum)]
+    if not allowed:
+        raise ValueError(f"{dice} can not roll a value between {minimum} and {maximum}")
+    total = sum(probability for _, probability in allowed)
+    values, cumulative, running = [], [], 0.0
+    for value, probability in allowed:
+        running += probability
+        values.append(value)
+        cumulative.append(round(running / total * RESOLUTION))
+    cumulative[-1] = RESOLUTION
+    return tuple(values), tuple(cumulative)
+
+
+def truncated_roll(dice: str, minimum: Optional[int] = None, maximum: Optional[int] = None) -> int:
+    """
+    Roll a dice expression as if rolls outside the range were rerolled, without rerolling
+    :param dice: dice expression, e.g. 3D6*5
+    :param minimum: lowest value allowed, None for no lower bound
+    :param maximum: highest value allowed, None for no upper bound
+    :return: value
+    """
+    values, cumulative = truncated_table(dice, minimum, maximum)
+    return values[bisect_left(cumulative, random_func(RESOLUTION))]
+
+
+def _bounds(constraints: Optional[dict]) -> dict:
+    """
+    Validate characteristic constraints
+    :param constraints: characteristic code -> minimum or (minimum, maximum), None meaning unbounded
+    :return: characteristic code -> (minimum, maximum)
+    """
+    codes = {code for code, _, _, _ in CHARACTERISTICS}
+    bounds = {}
+    for code, bound in (constraints or {}).items():
+        if code not in codes:
+            raise ValueError(f"unknown characteristic {code}")
+        minimum, maximum = bound if isinstance(bound, tuple) else (bound, None)
+        if minimum is not None and maximum is not None and minimum > maximum:
+            raise ValueError(f"minimum {minimum} of {code} exceeds maximum {maximum}")
+        bounds[code] = (minimum, maximum)
+    return bounds
+
+
+def _satisfies(investigator: Investigator, bounds: dict) -> bool:
+    """
+    :param investigator: Investigator
+    :param bounds: characteristic code -> (minimum, maximum)
+    :return: True if every characteristic of the investigator lies within its bounds
+    """
+    for code, (minimum, maximum) in bounds.items():
+        value = investigator.chars[code].regular
+        if (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+            return False
+    return True
+
+
+def constrained_investigator(constraints: Optional[dict] = None, age: Union[int, tuple, None] = None,
+                             gender: Optional[Gender] = None, language: Optional[str] = None,
+                             occupation: Optional[str] = None, birthplace: str = DEFAULT_PLACE,
+                             residence: str = DEFAULT_PLACE, max_attempts: int = MAX_ATTEMPTS) -> Investigator:
+    """
+    Generate an investigator whose characteristics satisfy constraints, e.g. {"STR": 70, "EDU": (80, None)}.
+    Characteristics are drawn from their exact dice distributions truncated to the bounds (shifted by the fixed
+    APP and EDU reductions of the age), after which the age deductions are spread without crossing a minimum.
+    Only random EDU improvements and Luck rerolls can push a value out of bounds, in which case the attempt is
+    repeated, so the number of attempts does not grow with the strictness of the constraints.
+    :param constraints: characteristic code -> minimum or (minimum, maximum), None meaning unbounded
+    :param age: age or (minimum, maximum) age
+    :param gender: gender
+    :param language: language of the names, e.g. EN, NL, DA
+    :param occupation: occupation
+    :param birthplace: place of birth
+    :param residence: place of residence
+    :param max_attempts: number of attempts before giving up
+    :return: Investigator
+    """
+    bounds = _bounds(constraints)
+    ages = (AGE_MIN, AGE_MAX) if age is None else age if isinstance(age, tuple) else (age, age)
+    minimum = {code: bound[0] for code, bound in bounds.items() if bound[0] is not None}
+    identity = _identity(gender, language, occupation)
+    for _ in range(max_attempts):
+        investigator_age = random_age(*ages)
+        _, _, points, deduct_from, appearance, education, _ = age_rule(investigator_age)
+        shift = {APP: appearance, EDU: education}
+        values = {}
+        for code, _, dice, _ in CHARACTERISTICS:
+            low, high = bounds.get(code, (None, None))
+            offset = shift.get(code, 0)
+            values[code] = truncated_roll(dice,
+                                          None if low is None else low + offset,
+                                          None if high is None else high + offset)
+        if sum(values[code] - minimum.get(code, 0) for code in deduct_from) < points:
+            continue
+        investigator = Investigator(birthplace=birthplace, residence=residence, age=investigator_age,
+                                    characteristics=values, age_rules=False, **identity)
+        investigator.age_impact(minimum)
+        if _satisfies(investigator, bounds):
+            return investigator
+    raise ValueError(f"no investigator of age {ages} satisfying {constraints} found in {max_attempts} attempts")
+
+
+def constrained_investigators(count: int, **kwargs) -> list:
+    """
+    Generate a number of investigators satisfying the same constraints
+    :param count: number of investigators
+    :param kwargs: see constrained_investigator
+    :return: list of Investigator
+    """
+    return [constrained_investigator(**kwargs) for _ in range(count)]
+
+
+if __name__ == "__main__":
+    raise NotImplementedError(__file__)
@@ -15,11 +15,31 @@
     along with this program.  If not, see <https://www.gnu.org/licenses/>.
 """
 
+import functools
+import threading
 from typing import Optional
 
+from coc.core import check
 from coc.core.gender import Gender
-from coc.core.roll import Roll, random_func, D100, D10
+from coc.core.roll import Roll, D100, D10, D6
+from coc.lib import metrics
 from coc.lib.logger import LOGGER
+from coc.lib.symbols import Interned, NAMES, OCCUPATIONS, PLACES
+
+# guards the creation of the update locks of attributes, see Attribute._update_lock
+_LOCK_CREATION = threading.Lock()
+
+
+@functools.lru_cache(maxsize=None)
+def attribute_meta(description: str, code: Optional[str], maximum: int) -> tuple:
+    """
+    Shared metadata of attributes, all attributes with the same description, code and maximum refer to one tuple
+    :param description: description
+    :param code: code or None
+    :param maximum: maximum value
+    :return: (description, code, maximum)
+    """
+    return description, code, maximum
 
 
 class Attribute:
@@ -27,18 +47,50 @@ class Attribute:
     Keep track of value, half and fifth
     """
 
+    __slots__ = ("_meta", "_values", "on_change", "_lock")
+
     def __init__(self, description: str, code: str, regular: int = None, maximum: int = 100):
         LOGGER.debug(f"creating Attribute wir description:{description} code:{code} regular:{regular} maximum:{maximum}")
-        self.description = description
-        self.code = code
-        self.maximum = maximum
-        self._regular = regular
-        self._half = regular // 2
-        self._fifth = regular // 5
+        self._meta = attribute_meta(description, code, maximum)
+        # regular, half and fifth are replaced together, so no thread ever sees a mix of old and new values
+        self._values = (regular, regular // 2, regular // 5)
+        # called with the code of the attribute after every change of its value
+        self.on_change = None
+        # created on the first read-modify-write update, most attributes are never updated that way
+        self._lock = None
         LOGGER.info(f"Created {self.__repr__()}")
 
     def __repr__(self):
-        return f'{self.description}{"" if self.code is None else f"/{self.code}"}({"Not yet set" if self.regular is None else f"R: {self._regular} H:{self._half} F: {self._fifth}"})'
+        regular, half, fifth = self._values
+        return f'{self.description}{"" if self.code is None else f"/{self.code}"}({"Not yet set" if regular is None else f"R: {regular} H:{half} F: {fifth}"})'
+
+    @property
+    def description(self) -> str:
+        """
+        :return: description, e.g. Strength
+        """
+        return self._meta[0]
+
+    @property
+    def code(self) -> Optional[str]:
+        """
+        :return: code, e.g. STR
+        """
+        return self._meta[1]
+
+    @property
+    def maximum(self) -> int:
+        """
+        :return: highest value
+        """
+        return self._meta[2]
+
+    @maximum.setter
+    def maximum(self, new_value: int) -> None:
+        """
+        :param new_value: new highest value, the current value is not changed
+        """
+        self._meta = attribute_meta(self._meta[0], self._meta[1], new_value)
 
     @property
     def regular(self) -> int:
@@ -46,7 +98,15 @@ class Attribute:
         Get regular value
         :return: regular value
         """
-        return self._regular
+        return self._values[0]
+
+    @property
+    def values(self) -> tuple:
+        """
+        Consistent view of the attribute
+        :return: (regular, half, fifth)
+        """
+        return self._values
 
     @regular.setter
     def regular(self, new_value: int) -> None:
@@ -58,9 +118,22 @@ class Attribute:
         if new_value > self.maximum:
             LOGGER.debug(f"{new_value} exceeds maximum of {self.maximum}, so limiting it so maximum")
             new_value = self.maximum
-        self._regular = new_value
-        self._half = new_value // 2
-        self._fifth = new_value // 5
+        self._values = (new_value, new_value // 2, new_value // 5)
+        if self.on_change is not None:
+            self.on_change(self._meta[1])
+
+    def _update_lock(self) -> threading.RLock:
+        """
+        Lock guarding the read-modify-write updates of this attribute, plain assignments are atomic without it
+        :return: RLock
+        """
+        lock = self._lock
+        if lock is None:
+            with _LOCK_CREATION:
+                if self._lock is None:
+                    self._lock = threading.RLock()
+                lock = self._lock
+        return lock
 
     @staticmethod
     def _compare(value: int, limit: Optional[int]) -> bool:
@@ -71,32 +144,65 @@ class Attribute:
         :return: True if value is less than or equal to limit.
         """
         if value is None:
-            value = random_func(100)
+            value = D100.roll()
         return value <= limit
 
     def is_regular(self, value: Optional[int]) -> bool:
         """
         Perform a regular check
         :param value: Value to check, if no value is provided a random(100) will be generated
-        :return: True if value is less than or equal to _regular
+        :return: True if value is less than or equal to the regular value
         """
-        return self._compare(value, self._regular)
+        return self._compare(value, self._values[0])
 
     def is_hard(self, value: Optional[int]) -> bool:
         """
         Perform a hard check
         :param value: Value to check, if no value is provided a random(100) will be generated
-        :return: True if value is less than or equal to _half
+        :return: True if value is less than or equal to half the value
         """
-        return self._compare(value, self._half)
+        return self._compare(value, self._values[1])
 
     def is_extreme(self, value: Optional[int]) -> bool:
         """
         Perform an extreme hard check
         :param value: Value to check, if no value is provided a random(100) will be generated
-        :return: True if value is less than or equal to _fifth
+        :return: True if value is less than or equal to a fifth of the value
         """
-        return self._compare(value, self._fifth)
+        return self._compare(value, self._values[2])
+
+    def success_level(self, value: Optional[int] = None, bonus: int = 0) -> check.SuccessLevel:
+        """
+        Determine the success level of a check: fumble, fail, regular, hard, extreme or critical
+        :param value: Value to check, if no value is provided a D100 with the bonus or penalty dice will be rolled
+        :param bonus: number of bonus dice minus number of penalty dice
+        :return: SuccessLevel
+        """
+        return check.success_level(self._values[0], value, bonus)
+
+    def opposed(self, other, value: Optional[int] = None, other_value: Optional[int] = None, bonus: int = 0,
+                other_bonus: int = 0) -> int:
+        """
+        Perform an opposed check against another attribute
+        :param other: opposing Attribute
+        :param value: Value of this side, rolled if not provided
+        :param other_value: Value of the other side, rolled if not provided
+        :param bonus: bonus minus penalty dice of this side
+        :param other_bonus: bonus minus penalty dice of the other side
+        :return: check.A_WINS if this attribute wins, check.B_WINS if the other wins, otherwise check.DRAW
+        """
+        return check.opposed(self._values[0], self.success_level(value, bonus),
+                             other.regular, other.success_level(other_value, other_bonus))
+
+    def opposed_probabilities(self, other, bonus: int = 0, other_bonus: int = 0) -> tuple:
+        """
+        Exact probabilities of an opposed check against another attribute
+        :param other: opposing Attribute
+        :param bonus: bonus minus penalty dice of this side
+        :param other_bonus: bonus minus penalty dice of the other side
+        :return: (this wins, draw, other wins)
+        """
+        return check.opposed_probabilities(self._values[0], other.regular, bonus, other_bonus)
 
     def deduct(self, value: int) -> None:
         """
@@ -104,26 +210,29 @@ class Attribute:
         :param value: value to subtract
         """
         LOGGER.info(f"Deducting {value} from {self}")
-        self.regular -= value
+        with self._update_lock():
+            self.regular -= value
 
     def set_if_higher(self, value) -> None:
         """
         Set the attribute value to a new value, but only ifg the new value is higher
         :param value: possible new value
         """
-        if value > self.regular:
-            self.regular = value
+        with self._update_lock():
+            if value > self.regular:
+                self.regular = value
 
     def improvement_roll(self, count: int = 1) -> None:
         """
         Perform one or more improvements roll on this attribute
         :param count: Number of improvements rolls to perform
         """
+        lock = self._update_lock()
         for _ in range(count):
             v = D100.roll()
-            if v > self.regular:
-                v = D10.roll()
-                self.regular += v
+            with lock:
+                if v > self.regular:
+                    self.regular += D10.roll()
 
 
 STR = "STR"
@@ -136,14 +245,30 @@ POW = "POW"
 EDU = "EDU"
 LUCK = "LUCK"
 
+# code, description, dice to generate it, maximum
+CHARACTERISTICS = ((STR, "Strength", "3D6*5", 99),
+                   (CON, "Constitution", "3D6*5", 99),
+                   (SIZ, "Size", "(2D6+6)*5", 200),
+                   (DEX, "Dexterity", "3D6*5", 99),
+                   (APP, "Appearance", "3D6*5", 99),
+                   (INT, "Intelligence", "(2D6+6)*5", 99),
+                   (POW, "Power", "3D6*5", 200),
+                   (EDU, "Education", "(2D6+6)*5", 99),
+                   (LUCK, "Luck", "3D6*5", 9999))
+# code -> metadata shared by the characteristics of all investigators
+CHARACTERISTIC_META = {code: attribute_meta(description, code, maximum)
+                       for code, description, _, maximum in CHARACTERISTICS}
+
 
 class Characteristic(Attribute):
     """
     Investigator characteristic
     """
 
+    __slots__ = ()
+
     def __init__(self, code, description, regular, maximum):
-        Attribute.__init__(self, code, description, regular, maximum)
+        Attribute.__init__(self, description, code, regular, maximum)
 
     def improvement_roll(self, count: int = 1):
         """
@@ -151,17 +276,112 @@ class Characteristic(Attribute):
         To make an EDU improvement check, simply roll percentage dice.
         If the result is greater than your present EDU add 1D10 percentage points to your EDU characteristic (note
         that EDU cannot go above 99).
-        :return:
+        :param count: Number of improvements rolls to perform
         """
-        pass
+        Attribute.improvement_roll(self, count)
+
+
+# skills have no maximum, a roll above this value always improves a ticked skill
+SKILL_MAXIMUM = 9999
+SKILL_IMPROVEMENT_FLOOR = 95
+# reaching this skill value for the first time gives 2D6 sanity points
+SKILL_SANITY_REWARD = 90
+
+AGE = "AGE"
+
+# age below which the rule applies, EDU improvement checks, points to deduct, characteristics to deduct them from,
+# APP reduction, EDU reduction, number of Luck rolls (the highest counts)
+AGE_RULES = ((20, 0, 5, (STR, SIZ), 0, 5, 2),
+             (40, 1, 0, (), 0, 0, 1),
+             (50, 2, 5, (STR, CON, DEX), 5, 0, 1),
+             (60, 3, 10, (STR, CON, DEX), 10, 0, 1),
+             (70, 4, 20, (STR, CON, DEX), 15, 0, 1),
+             (80, 4, 40, (STR, CON, DEX), 20, 0, 1),
+             (None, 4, 80, (STR, CON, DEX), 25, 0, 1))
+
+
+def age_rule(age: int) -> tuple:
+    """
+    Find the age modifiers for an age
+    :param age: age of the investigator
+    :return: row of AGE_RULES
+    """
+    for rule in AGE_RULES:
+        if rule[0] is None or age < rule[0]:
+            return rule
+
+# derived value -> characteristics (and age) it is computed from
+DERIVED = {"damage_bonus": (STR, SIZ),
+           "build": (STR, SIZ),
+           "hit_max": (CON, SIZ),
+           "movement": (DEX, STR, SIZ, AGE)}
+# characteristic (or age) -> derived values to recompute when it changes
+DEPENDENTS = {code: tuple(name for name, inputs in DERIVED.items() if code in inputs)
+              for code in (STR, CON, SIZ, DEX, AGE)}
+
+SAN = "SAN"
+SAN_MAXIMUM = 99
+
+
+class Sanity(Attribute):
+    """
+    Sanity points. Starting sanity equals POW, the maximum is 99 minus Cthulhu Mythos.
+    """
+
+    __slots__ = ("starting", "day_start", "temporary_insanity", "indefinite_insanity")
+
+    def __init__(self, power: int, mythos: int = 0):
+        Attribute.__init__(self, "Sanity", SAN, min(power, SAN_MAXIMUM - mythos), maximum=SAN_MAXIMUM - mythos)
+        self.starting = self.regular
+        self.day_start = self.regular
+        self.temporary_insanity = False
+        self.indefinite_insanity = False
+
+    @property
+    def permanent_insanity(self) -> bool:
+        """
+        :return: True if all sanity is lost
+        """
+        return self.regular <= 0
+
+    def lose(self, amount: int) -> None:
+        """
+        Lose sanity points. Losing 5 or more at once causes temporary insanity,
+        losing a fifth of the sanity at the start of the day causes indefinite insanity.
+        :param amount: sanity points lost
+        """
+        if amount <= 0:
+            return
+        LOGGER.info(f"Losing {amount} sanity points from {self}")
+        self.regular = max(0, self.regular - amount)
+        if amount >= 5:
+            self.temporary_insanity = True
+        if self.day_start - self.regular >= max(1, self.day_start // 5):
+            self.indefinite_insanity = True
+
+    def new_day(self) -> None:
+        """
+        Start a new game day: losses for indefinite insanity are counted from here
+        """
+        self.day_start = self.regular
 
 
 class Investigator:
     """
-    COC investigator
+    COC investigator. Names, occupation and places are stored as IDs in the shared symbol tables.
     """
 
-    def __init__(self, firstname: str, surname: str, gender: Gender, occupation: str, birthplace: str, residence: str, age: int):
+    firstname = Interned(NAMES)
+    surname = Interned(NAMES)
+    occupation = Interned(OCCUPATIONS)
+    birthplace = Interned(PLACES)
+    residence = Interned(PLACES)
+
+    @metrics.measured("investigator.create")
+    def __init__(self, firstname: str, surname: str, gender: Gender, occupation: str, birthplace: str, residence: str, age: int,
+                 characteristics: Optional[dict] = None, age_rules: bool = True):
+        self._derived = {}
+        self._dirty = set(DERIVED)
         self.firstname = firstname
         self.surname = surname
         self.gender = gender
@@ -169,32 +389,160 @@ class Investigator:
         self.occupation = occupation
         self.birthplace = birthplace
         self.residence = residence
-        self.chars = {STR: Characteristic(STR, "Strength", 5 * Roll("3D6").roll(), maximum=99),
-                      CON: Characteristic(CON, "Constitution", 5 * Roll("3D6").roll(), maximum=99),
-                      SIZ: Characteristic(SIZ, "Size", 5 * Roll("2D6+6").roll(), maximum=200),
-                      DEX: Characteristic(DEX, "Dexterity", 5 * Roll("3D6").roll(), maximum=99),
-                      APP: Characteristic(APP, "Appearance", 5 * Roll("3D6").roll(), maximum=99),
-                      INT: Characteristic(INT, "Intelligence", 5 * Roll("2D6+6").roll(), maximum=99),
-                      POW: Characteristic(SIZ, "Power", 5 * Roll("3D6").roll(), maximum=200),
-                      EDU: Characteristic(EDU, "Education", 5 * Roll("2D6+6").roll(), maximum=99),
-                      LUCK: Characteristic(LUCK, "Luck", 5 * Roll("3D6").roll(), maximum=9999)}
-        self.age_impact()
-        self.damage_bonus = ""
-        self.build = None
-        self.set_damage_bonus_and_build()
-        self.hit_max = (self.constitution + self.size) // 10
-        self.movement = None
-        self.set_movement()
+        characteristics = characteristics or {}
+        self.chars = {code: Characteristic(code, description,
+                                           characteristics[code] if code in characteristics else Roll(dice).roll(),
+                                           maximum=maximum)
+                      for code, description, dice, maximum in CHARACTERISTICS}
+        self._watch_chars()
+        if age_rules:
+            self.age_impact()
+        self.skills = {}
+        self.ticks = set()
         self.occupation_impact()
+        self.sanity = Sanity(self.power)
 
         # self.possessive_p = gender.POSSESSIVE_PRONOUN[gender]
         # self.object_p = gender.OBJECT_PRONOUN[gender]
         # self.personal_p = PERSONAL_PRONOUN[gender]
 
+    def as_dict(self) -> dict:
+        """
+        Plain (JSON serializable) representation of the investigator
+        :return: dict
+        """
+        return {"firstname": self.firstname,
+                "surname": self.surname,
+                "gender": self.gender.name,
+                "age": self.age,
+                "occupation": self.occupation,
+                "birthplace": self.birthplace,
+                "residence": self.residence,
+                "chars": {code: characteristic.regular for code, characteristic in self.chars.items()},
+                "skills": {name: skill.regular for name, skill in self.skills.items()},
+                "ticks": sorted(self.ticks),
+                "sanity": {"regular": self.sanity.regular,
+                           "maximum": self.sanity.maximum,
+                           "starting": self.sanity.starting,
+                           "day_start": self.sanity.day_start,
+                           "temporary_insanity": self.sanity.temporary_insanity,
+                           "indefinite_insanity": self.sanity.indefinite_insanity}}
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        """
+        Restore an investigator from as_dict() output without rolling anything. Derived values are recomputed.
+        :param data: dict
+        :return: Investigator
+        """
+        investigator = cls.__new__(cls)
+        investigator._derived = {}
+        investigator._dirty = set(DERIVED)
+        for field in ("firstname", "surname", "age", "occupation", "birthplace", "residence"):
+            setattr(investigator, field, data[field])
+        investigator.gender = Gender[data["gender"]]
+        investigator.chars = {code: Characteristic(code, description, data["chars"][code], maximum=maximum)
+                              for code, description, _, maximum in CHARACTERISTICS}
+        investigator._watch_chars()
+        investigator.skills = {name: Attribute(name, None, value, maximum=SKILL_MAXIMUM)
+                               for name, value in data.get("skills", {}).items()}
+        investigator.ticks = set(data.get("ticks", ()))
+        sanity = data["sanity"]
+        investigator.sanity = Sanity(sanity["regular"], mythos=SAN_MAXIMUM - sanity["maximum"])
+        for field in ("starting", "day_start", "temporary_insanity", "indefinite_insanity"):
+            setattr(investigator.sanity, field, sanity[field])
+        return investigator
+
+    def symbol(self, field: str) -> Optional[int]:
+        """
+        Integer ID of a text field, for comparing and grouping investigators without comparing strings
+        :param field: firstname, surname, occupation, birthplace or residence
+        :return: ID in the symbol table of the field, None if the field is None
+        """
+        descriptor = type(self).__dict__.get(field)
+        if not isinstance(descriptor, Interned):
+            raise KeyError(f"{field} is no interned field")
+        return descriptor.symbol(self)
+
     def __repr__(self):
         ret = f"{self.firstname} {self.surname} is a {self.age} year old {self.gender.person()} born in {self.birthplace} and living in {self.residence}. At the moment {self.gender.personal()} is a {self.occupation}"
         return ret
 
+    def _watch_chars(self) -> None:
+        """
+        Let every characteristic report changes, so the derived values depending on it are recomputed
+        """
+        invalidate = self._invalidate
+        for characteristic in self.chars.values():
+            characteristic.on_change = invalidate
+
+    def _invalidate(self, code: str) -> None:
+        """
+        Mark the derived values that depend on a characteristic (or AGE) as stale
+        :param code: characteristic code or AGE
+        """
+        self._dirty.update(DEPENDENTS.get(code, ()))
+
+    def _get_derived(self, name: str):
+        if name in self._dirty:
+            if name == "hit_max":
+                self._derived[name] = (self.constitution + self.size) // 10
+                self._dirty.discard(name)
+            elif name == "movement":
+                self.set_movement()
+            else:
+                self.set_damage_bonus_and_build()
+        return self._derived[name]
+
+    @property
+    def age(self) -> int:
+        """
+        AGE getter
+        :return: age
+        """
+        return self._age
+
+    @age.setter
+    def age(self, new_value: int):
+        """
+        AGE setter
+        :param new_value: new age
+        """
+        self._age = new_value
+        self._invalidate(AGE)
+
+    @property
+    def damage_bonus(self) -> str:
+        """
+        Damage bonus as dice expression, derived from STR and SIZ on first access after a change
+        :return: damage bonus
+        """
+        return self._get_derived("damage_bonus")
+
+    @property
+    def build(self) -> int:
+        """
+        Build, derived from STR and SIZ on first access after a change
+        :return: build
+        """
+        return self._get_derived("build")
+
+    @property
+    def hit_max(self) -> int:
+        """
+        Maximum hit points, derived from CON and SIZ on first access after a change
+        :return: hit points
+        """
+        return self._get_derived("hit_max")
+
+    @property
+    def movement(self) -> int:
+        """
+        MOV, derived from DEX, STR, SIZ and age on first access after a change
+        :return: movement rate
+        """
+        return self._get_derived("movement")
+
     def occupation_impact(self) -> None:
         """
         Change the skills based on the occupation
@@ -203,7 +551,7 @@ class Investigator:
 
     def set_damage_bonus_and_build(self) -> None:
         """
-        Set damage bonus and build
+        Compute damage bonus and build
         """
         strength_and_size = self.strength + self.size
 
@@ -212,28 +560,31 @@ class Investigator:
         elif strength_and_size < 85:
             t = ["-1", -1]
         elif strength_and_size < 125:
-            t = ["0", -0]
+            t = ["0", 0]
         elif strength_and_size < 165:
-            t = ["D4", -1]
+            t = ["D4", 1]
         elif strength_and_size < 205:
-            t = ["D6", -1]
+            t = ["D6", 2]
         else:
             raise ValueError(f"SIZ + STR  ({strength_and_size}) > 204")
-        self.damage_bonus, self.build = t
+        self._derived["damage_bonus"], self._derived["build"] = t
+        self._dirty.difference_update(("damage_bonus", "build"))
 
     def set_movement(self) -> None:
         """
-        Set movement
+        Compute movement
         """
         if self.dexterity < self.size and self.strength < self.size:
-            self.movement = 7
+            movement = 7
         elif self.dexterity > self.size and self.strength > self.size:
-            self.movement = 9
+            movement = 9
         else:
-            self.movement = 8
+            movement = 8
 
+        # from 40 on, MOV drops by one point per decade
         age_term = max(0, (self.age // 10) - 3)
-        self.movement += age_term
+        self._derived["movement"] = movement - age_term
+        self._dirty.discard("movement")
 
     def _get_char_value(self, code: str) -> int:
         return self.chars[code].regular
@@ -377,23 +728,66 @@ class Investigator:
         """
         raise NotImplementedError()
 
-    def education_improvement(self) -> None:
+    def education_improvement(self, count: int = 1) -> None:
         """
         Perform a EDU improvement
+        :param count: number of EDU improvement checks
         """
-        pass
+        self.chars[EDU].improvement_roll(count)
+
+    def set_skill(self, name: str, value: int) -> None:
+        """
+        Set the value of a skill, adding the skill if the investigator does not have it yet
+        :param name: skill name
+        :param value: skill value
+        """
+        skill = self.skills.get(name)
+        if skill is None:
+            self.skills[name] = Attribute(name, None, value, maximum=SKILL_MAXIMUM)
+        else:
+            skill.regular = value
+
+    def tick(self, name: str) -> None:
+        """
+        Mark a skill for an improvement check at the end of the session, after a successful use
+        :param name: skill name
+        """
+        if name not in self.skills:
+            raise KeyError(f"{self.firstname} {self.surname} has no skill {name}")
+        self.ticks.add(name)
 
-    def deduct(self, amount: int, *args) -> None:
+    def skill_improvement(self) -> list:
+        """
+        Development phase: an improvement check for every ticked skill. A D100 roll above the skill value or above
+        95 adds 1D10 to the skill, reaching 90 for the first time gives 2D6 sanity points. All ticks are cleared.
+        :return: names of the improved skills
+        """
+        improved = []
+        for name in sorted(self.ticks):
+            skill = self.skills[name]
+            value = skill.regular
+            if D100.roll() > min(value, SKILL_IMPROVEMENT_FLOOR):
+                skill.regular = value + D10.roll()
+                improved.append(name)
+                if value < SKILL_SANITY_REWARD <= skill.regular:
+                    self.sanity.regular += D6.roll() + D6.roll()
+        self.ticks.clear()
+        LOGGER.info(f"Improved {', '.join(improved) or 'no skills'}")
+        return improved
+
+    def deduct(self, amount: int, *args, minimum: Optional[dict] = None) -> None:
         """
         Deduct the amount spread over the provided attributes
         :param amount: amount to spread
         :param args: attributes to deduct the amount from
+        :param minimum: optional lowest value per attribute code the deduction must respect
         """
-        spread = Roll.spread(amount, len(args))
+        limits = None if minimum is None else [self.chars[code].regular - minimum.get(code, 0) for code in args]
+        spread = Roll.spread(amount, len(args), limits)
         for i in range(len(spread)):
             self.chars[args[i]].deduct(spread[i])
 
-    def age_impact(self):
+    def age_impact(self, minimum: Optional[dict] = None):
         """
         AGE modifiers:
         A player can choose any age between 15 and 90 for their
@@ -401,57 +795,22 @@ class Investigator:
         this age range, it is up to the Keeper to adjudicate. Use the
         appropriate modifier for your chosen age only (they are not
         cumulative).
-        """
-        if self.age < 20:
-            LOGGER.info("Age is below 20.")
-            LOGGER.info("Deduct 5 points among STR and SIZ.")
-            self.deduct(5, STR, SIZ)
-            LOGGER.info("Deduct 5 points from EDU.")
-            self.education -= 5
-            LOGGER.info("Roll twice to generate a Luck score and use the higher value")
-            self.chars[LUCK].set_if_higher(5 * Roll("3D6").roll())
-        elif self.age < 40:
-            self.chars[EDU].improvement_roll()
-        elif self.age < 50:
-            self.chars[EDU].improvement_roll(2)
-            self.deduct(5, STR, CON, DEX)
-            self.appearance -= 5
-        elif self.age < 60:
-            """
-            50s: Make 3 improvement checks for EDU 
-            and deduct 10 points among STR, CON or DEX, 
-            and reduce APP by 10.
-            """
-            self.chars[EDU].improvement_roll(3)
-            self.deduct(10, STR, CON, DEX)
-            self.appearance -= 10
-        elif self.age < 70:
-            """
-            60s: Make 4 improvement checks for EDU
-            and deduct 20 points among STR, CON or DEX, 
-            and reduce APP by 15.
-            """
-            self.chars[EDU].improvement_roll(4)
-            self.deduct(20, STR, CON, DEX)
-            self.appearance -= 15
-        elif self.age < 80:
-            """
-            70s: Make 4 improvement checks for EDU 
-            and deduct 40 points among STR, CON or DEX, 
-            and reduce APP by 20.
-            """
-            self.chars[EDU].improvement_roll(4)
-            self.deduct(40, STR, CON, DEX)
-            self.appearance -= 20
-        else:
-            """
-            80s: Make 4 improvement checks for EDU 
-            and deduct 80 points among STR, CON or DEX, 
-            and reduce APP by 25.
-            """
-            self.chars[EDU].improvement_roll(4)
-            self.deduct(80, STR, CON, DEX)
-            self.appearance -= 25
+        :param minimum: optional lowest value per characteristic code the deductions must respect
+        """
+        _, checks, points, deduct_from, appearance, education, luck_rolls = age_rule(self.age)
+        LOGGER.info(f"Age {self.age}: {checks} EDU improvement checks, deduct {points} points among "
+                    f"{', '.join(deduct_from) or 'nothing'}, reduce APP by {appearance} and EDU by {education}")
+        if points:
+            self.deduct(points, *deduct_from, minimum=minimum)
+        if education:
+            self.education -= education
+        for _ in range(luck_rolls - 1):
+            LOGGER.info("Roll again to generate a Luck score and use the higher value")
+            self.chars[LUCK].set_if_higher(Roll("3D6*5").roll())
+        if checks:
+            self.chars[EDU].improvement_roll(checks)
+        if appearance:
+            self.appearance -= appearance
 
 
 me = Investigator(firstname="Jessy",
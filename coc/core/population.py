@@ -0,0 +1,296 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+from array import array
+from bisect import bisect_left, insort
+from typing import Optional
+
+from coc.core.investigator import Investigator, CHARACTERISTICS, AGE, SAN
+from coc.lib.symbols import OCCUPATIONS, PLACES
+
+HP = "HP"
+MOV = "MOV"
+BUILD = "BUILD"
+
+# numeric column -> value of an investigator, these get a sorted index
+NUMERIC = dict({code: (lambda investigator, code=code: investigator.chars[code].regular)
+                for code, _, _, _ in CHARACTERISTICS},
+               **{AGE: lambda investigator: investigator.age,
+                  HP: lambda investigator: investigator.hit_max,
+                  MOV: lambda investigator: investigator.movement,
+                  BUILD: lambda investigator: investigator.build,
+                  SAN: lambda investigator: investigator.sanity.regular})
+# categorical column -> value of an investigator, these get a bitmap per value
+CATEGORICAL = {"gender": lambda investigator: investigator.gender,
+               "occupation": lambda investigator: investigator.symbol("occupation"),
+               "birthplace": lambda investigator: investigator.symbol("birthplace"),
+               "residence": lambda investigator: investigator.symbol("residence"),
+               "damage_bonus": lambda investigator: investigator.damage_bonus}
+# categorical columns indexed on the IDs of a symbol table instead of their text
+SYMBOLS = {"occupation": OCCUPATIONS,
+           "birthplace": PLACES,
+           "residence": PLACES}
+
+# a sorted index entry packs the value and the row number into one integer
+ROW_BITS = 32
+ROW_MASK = (1 << ROW_BITS) - 1
+# up to this many pending rows are inserted one by one, more are sorted and merged at once
+INSERT_LIMIT = 64
+
+
+class Population:
+    """
+    Column store of investigators. Every numeric column is an array with a sorted index of (value, row) keys,
+    every categorical column keeps an integer bitmap of the rows per value. The columns hold the values at the
+    time an investigator was added; add a changed investigator again to index its new values. Added rows wait in
+    an unsorted tail until the next query: a few rows are inserted in place, a bulk extend is sorted and merged at
+    once.
+    """
+
+    def __init__(self, investigators=()):
+        """
+        :param investigators: initial investigators
+        """
+        self._investigators = []
+        self._columns = {column: array("i") for column in NUMERIC}
+        self._sorted = {column: array("q") for column in NUMERIC}
+        self._bitmaps = {column: {} for column in CATEGORICAL}
+        # rows not merged into the indexes yet, and their rows per categorical value
+        self._pending = []
+        self._pending_values = {column: {} for column in CATEGORICAL}
+        self.extend(investigators)
+
+    def __len__(self):
+        return len(self._investigators)
+
+    def __getitem__(self, row: int) -> Investigator:
+        return self._investigators[row]
+
+    def add(self, investigator: Investigator) -> int:
+        """
+        Add an investigator to the population and its indexes
+        :param investigator: Investigator
+        :return: row number of the investigator
+        """
+        row = len(self._investigators)
+        if row > ROW_MASK:
+            raise OverflowError(f"population is limited to {ROW_MASK + 1} investigators")
+        self._investigators.append(investigator)
+        for column, value_of in NUMERIC.items():
+            self._columns[column].append(value_of(investigator))
+        for column, value_of in CATEGORICAL.items():
+            self._pending_values[column].setdefault(value_of(investigator), []).append(row)
+        self._pending.append(row)
+        return row
+
+    def extend(self, investigators) -> None:
+        """
+        Add a number of investigators
+        :param investigators: iterable of Investigator
+        """
+        for investigator in investigators:
+            self.add(investigator)
+
+    def _merge(self) -> None:
+        """
+        Index the pending rows: their keys are sorted once and merged into the sorted indexes, their bitmaps are
+        built once per value and combined with the existing bitmaps
+        """
+        pending = self._pending
+        if not pending:
+            return
+        self._pending = []
+        if len(pending) <= INSERT_LIMIT:
+            self._insert(pending)
+            return
+        for column, values in self._columns.items():
+            keys = self._sorted[column]
+            new_keys = sorted((values[row] << ROW_BITS) | row for row in pending)
+            if keys and new_keys[0] < keys[-1]:
+                # two sorted runs, merged in linear time by the sort
+                keys.extend(new_keys)
+                self._sorted[column] = array("q", sorted(keys))
+            else:
+                keys.extend(new_keys)
+        size = (len(self._investigators) + 7) // 8
+        for column, groups in self._pending_values.items():
+            bitmaps = self._bitmaps[column]
+            for value, rows in groups.items():
+                flags = bytearray(size)
+                for row in rows:
+                    flags[row >> 3] |= 1 << (row & 7)
+                bitmaps[value] = bitmaps.get(value, 0) | int.from_bytes(flags, "little")
+            groups.clear()
+
+    def _insert(self, pending: list) -> None:
+        """
+        Index a few pending rows in place, so a query after every add does not rebuild the indexes
+        :param pending: row numbers
+        """
+        for column, values in self._columns.items():
+            keys = self._sorted[column]
+            for row in pending:
+                insort(keys, (values[row] << ROW_BITS) | row)
+        for column, groups in self._pending_values.items():
+            bitmaps = self._bitmaps[column]
+            for value, rows in groups.items():
+                bits = bitmaps.get(value, 0)
+                for row in rows:
+                    bits |= 1 << row
+                bitmaps[value] = bits
+            groups.clear()
+
+    def _span(self, column: str, minimum: Optional[int], maximum: Optional[int]) -> tuple:
+        """
+        Locate a value range in the sorted index of a column
+        :param column: numeric column
+        :param minimum: lowest value, None for no lower bound
+        :param maximum: highest value, None for no upper bound
+        :return: (start, stop) positions in the sorted index
+        """
+        if column not in self._sorted:
+            raise KeyError(f"{column} is not a numeric column, use one of {', '.join(NUMERIC)}")
+        self._merge()
+        keys = self._sorted[column]
+        start = 0 if minimum is None else bisect_left(keys, minimum << ROW_BITS)
+        stop = len(keys) if maximum is None else bisect_left(keys, (maximum + 1) << ROW_BITS)
+        return start, max(start, stop)
+
+    def _mask(self, equals: dict) -> Optional[int]:
+        """
+        Combine the bitmaps of equality filters
+        :param equals: categorical column -> value or tuple of accepted values
+        :return: bitmap of the matching rows, None if there are no filters
+        """
+        self._merge()
+        mask = None
+        for column, values in equals.items():
+            if column not in self._bitmaps:
+                raise KeyError(f"{column} is not a categorical column, use one of {', '.join(CATEGORICAL)}")
+            bitmaps = self._bitmaps[column]
+            table = SYMBOLS.get(column)
+            accepted = 0
+            for value in values if isinstance(values, (tuple, list, set, frozenset)) else (values,):
+                if table is not None and value is not None:
+                    value = table.find(value)
+                    if value is None:
+                        continue
+                accepted |= bitmaps.get(value, 0)
+            mask = accepted if mask is None else mask & accepted
+        return mask
+
+    def rows(self, ranges: Optional[dict] = None, equals: Optional[dict] = None) -> list:
+        """
+        Find the rows matching all filters. The most selective filter, counted with a binary search or a
+        population count, produces the candidates; the others are checked per candidate.
+        :param ranges: numeric column -> (minimum, maximum), inclusive, None meaning unbounded
+        :param equals: categorical column -> value or tuple of accepted values
+        :return: sorted list of row numbers
+        """
+        spans = {column: self._span(column, *bounds) for column, bounds in (ranges or {}).items()}
+        mask = self._mask(equals or {})
+        if mask is not None and not spans:
+            return _bits(mask)
+        if not spans:
+            return list(range(len(self._investigators)))
+        column = min(spans, key=lambda name: spans[name][1] - spans[name][0])
+        start, stop = spans.pop(column)
+        if mask is not None and mask.bit_count() < stop - start:
+            candidates = _bits(mask)
+            mask = None
+            spans[column] = (start, stop)
+        else:
+            candidates = sorted(key & ROW_MASK for key in self._sorted[column][start:stop])
+        checks = [(self._columns[name], *ranges[name]) for name in spans]
+        flags = None if mask is None else mask.to_bytes((len(self._investigators) + 7) // 8, "little")
+        ret = []
+        for row in candidates:
+            if flags is not None and not flags[row >> 3] >> (row & 7) & 1:
+                continue
+            for values, minimum, maximum in checks:
+                value = values[row]
+                if (minimum is not None and value < minimum) or (maximum is not None and value > maximum):
+                    break
+            else:
+                ret.append(row)
+        return ret
+
+    def query(self, ranges: Optional[dict] = None, equals: Optional[dict] = None) -> list:
+        """
+        Find the investigators matching all filters, e.g. query({"DEX": (61, None), "AGE": (None, 29)})
+        :param ranges: numeric column -> (minimum, maximum), inclusive, None meaning unbounded
+        :param equals: categorical column -> value or tuple of accepted values
+        :return: list of Investigator in insertion order
+        """
+        return [self._investigators[row] for row in self.rows(ranges, equals)]
+
+    def count(self, ranges: Optional[dict] = None, equals: Optional[dict] = None) -> int:
+        """
+        Count the investigators matching all filters
+        :param ranges: numeric column -> (minimum, maximum), inclusive, None meaning unbounded
+        :param equals: categorical column -> value or tuple of accepted values
+        :return: number of investigators
+        """
+        if not equals and ranges and len(ranges) == 1:
+            (column, bounds), = ranges.items()
+            start, stop = self._span(column, *bounds)
+            return stop - start
+        if equals and not ranges:
+            return self._mask(equals).bit_count()
+        return len(self.rows(ranges, equals))
+
+    def top(self, column: str, k: int, ranges: Optional[dict] = None, equals: Optional[dict] = None,
+            lowest: bool = False) -> list:
+        """
+        The k investigators with the highest (or lowest) value of a column among those matching the filters
+        :param column: numeric column to order by
+        :param k: number of investigators
+        :param ranges: numeric column -> (minimum, maximum), inclusive, None meaning unbounded
+        :param equals: categorical column -> value or tuple of accepted values
+        :param lowest: pick the lowest values instead of the highest
+        :return: list of Investigator, best first
+        """
+        start, stop = self._span(column, None, None)
+        keys = self._sorted[column]
+        order = range(start, stop) if lowest else range(stop - 1, start - 1, -1)
+        accepted = set(self.rows(ranges, equals)) if ranges or equals else None
+        ret = []
+        for position in order:
+            if len(ret) >= k:
+                break
+            row = keys[position] & ROW_MASK
+            if accepted is None or row in accepted:
+                ret.append(self._investigators[row])
+        return ret
+
+
+def _bits(mask: int) -> list:
+    """
+    :param mask: bitmap
+    :return: sorted list of the positions of the set bits
+    """
+    bits = bin(mask)[:1:-1]
+    ret = []
+    position = bits.find("1")
+    while position >= 0:
+        ret.append(position)
+        position = bits.find("1", position + 1)
+    return ret
+
+
+if __name__ == "__main__":
+    raise NotImplementedError(__file__)
@@ -16,12 +16,78 @@
 
 """
 
+import itertools
 import random
-import re
+import threading
+from typing import Optional
 
+from coc.core.dice import compile_expression
+from coc.lib import metrics
 from coc.lib.logger import LOGGER
 
 
+class _Streams(threading.local):
+    """
+    Random generator of the current thread. The main thread uses the random module, so random.seed() keeps
+    working there; every other thread gets its own random.Random, so threads never share generator state.
+    """
+
+    def __init__(self):
+        self.generation = -1
+        self.rng = None
+
+
+_streams = _Streams()
+_seed_lock = threading.Lock()
+_seed = None
+_generation = 0
+_stream_numbers = itertools.count(1)
+
+
+def seed(value: Optional[int] = None) -> None:
+    """
+    Seed the random generators of all threads. The calling thread continues with a generator seeded with the value,
+    the other threads get their own stream derived from the value and the order in which they first roll.
+    :param value: seed, None to seed from the operating system
+    """
+    global _seed, _generation, _stream_numbers
+    with _seed_lock:
+        _seed = value
+        _generation += 1
+        _stream_numbers = itertools.count(1)
+    seed_thread(value)
+
+
+def seed_thread(value=None) -> None:
+    """
+    Seed the random generator of the calling thread only, e.g. per task to get results independent of scheduling
+    :param value: seed (int, str or bytes), None to seed from the operating system
+    """
+    if threading.current_thread() is threading.main_thread():
+        random.seed(value)
+        _streams.rng = random
+    else:
+        _streams.rng = random.Random(value)
+    _streams.generation = _generation
+
+
+def generator():
+    """
+    :return: the random generator of the calling thread, a random.Random or the random module
+    """
+    streams = _streams
+    if streams.generation != _generation:
+        if threading.current_thread() is threading.main_thread():
+            streams.rng = random
+        else:
+            with _seed_lock:
+                number = next(_stream_numbers)
+            streams.rng = random.Random(None if _seed is None else f"{_seed}/{number}")
+        streams.generation = _generation
+    return streams.rng
+
+
+@metrics.measured("roll.random_func")
 def random_func(limit: int) -> int:
     """
     Generate a random integer between 1 and limit.
@@ -32,19 +98,20 @@ def random_func(limit: int) -> int:
     """
     if not isinstance(limit, int) or limit < 1:
         raise TypeError(f"parameter limit must be integer greater than 0:  {limit}")
-    return random.randint(1, limit)
+    return generator().randint(1, limit)
 
 
 class Die:
     """
-    A die
+    A die. Dice are immutable, so they can be shared between threads.
     """
 
+    __slots__ = ("sides",)
+
     def __init__(self, sides: int):
         if not isinstance(sides, int) or sides < 1:
             raise TypeError(f"Sides {sides} must be strict positive integer")
         self.sides = sides
-        self._value = None
 
     def __repr__(self):
         return f"D{self.sides}"
@@ -54,51 +121,54 @@ class Die:
         Generate a number for the die
         :return: Random roll
         """
-        self._value = random_func(self.sides)
-        return self._value
+        return random_func(self.sides)
 
 
 class Roll:
     """
-    Representation of dice roll
+    Representation of dice roll. A roll only holds its compiled expression, so the module level rolls D3..D100
+    can be shared between threads.
     """
 
+    @metrics.measured("roll.parse")
     def __init__(self, description: str = "D100"):
+        """
+        :param description: dice expression, e.g. 3D6, (2D6+6)*5, 4D6kh3, D100b1 (bonus die) or D100p2 (penalty dice)
+        """
         LOGGER.debug(description)
         self.description = description
-        self.dice = []
-        description = description.replace("-", "|-").replace("+", "|")
-        terms = re.split(r'\|', description)
-        terms = [term.split("D") for term in terms]
-        for term in terms:
-            if len(term) == 1:
-                if term[0] == '':
-                    continue
-                self.dice.append(Value(int(term[0])))
-            elif len(term) == 2:
-                length = 1 if len(term[0]) == 0 else int(term[0])
-                for i in range(length):
-                    self.dice.append(Die(int(term[1])))
+        self.expression = compile_expression(description)
 
+    def __repr__(self):
+        return f"Roll({self.description})"
+
+    @metrics.measured("roll.roll")
     def roll(self) -> int:
         """
-        Roll the die
-        :return: random side of the die
+        Roll the dice
+        :return: result of the expression
         """
-        total = 0
-        for die in self.dice:
-            r = die.value()
-            total += r
-            LOGGER.debug(f"Rolling {die} => value {r}  (subtotal: {total})")
+        total = self.expression.roll(random_func)
+        LOGGER.debug(f"Rolling {self.description} => value {total}")
         return total
 
+    def roll_many(self, count: int) -> list:
+        """
+        Roll the dice a number of times
+        :param count: number of rolls
+        :return: list of results
+        """
+        return self.expression.roll_many(count, random_func)
+
     @staticmethod
-    def spread(value: int, size: int) -> list:
+    @metrics.measured("roll.spread")
+    def spread(value: int, size: int, limits: Optional[list] = None) -> list:
         """
         Spread a value among and number of variables.
         Spread(10,3) will generate a random list of numbers of length 3, where the sum of all numbers is 10, e.g. [1,7,2]
         :param value: The value to spread
         :param size: the number of values to spread the value among.
+        :param limits: optional maximum (absolute) amount per variable
         :return: list of variables
         """
         LOGGER.debug(f"Spreading {value} over {size} buckets")
@@ -110,8 +180,20 @@ class Roll:
             value = - value
             term = -1
 
+        rng = generator()
+        if limits is None:
+            for _ in range(value):
+                index = rng.randint(0, size - 1)
+                ret[index] += term
+            return ret
+
+        room = [max(0, limit) for limit in limits]
+        if sum(room) < value:
+            raise ValueError(f"cannot spread {value} over {size} buckets limited to {limits}")
         for _ in range(value):
-            index = random.randint(0, size - 1)
+            open_buckets = [index for index in range(size) if room[index] > 0]
+            index = open_buckets[rng.randint(0, len(open_buckets) - 1)]
+            room[index] -= 1
             ret[index] += term
         return ret
 
@@ -0,0 +1,210 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+
+import functools
+from typing import Callable, Union
+
+from coc.core.dice import compile_expression
+from coc.core.investigator import Sanity, SAN_MAXIMUM
+from coc.core.roll import random_func
+from coc.lib.logger import LOGGER
+
+_D100 = compile_expression("D100")
+
+
+class SanityLoss:
+    """
+    Sanity loss of an encounter, written as success/failure, e.g. 0/1D6 or 1D3/1D10.
+    Both parts are compiled dice expressions.
+    """
+
+    def __init__(self, text: str):
+        parts = text.split("/")
+        if len(parts) != 2:
+            raise ValueError(f"Sanity loss must be written as success/failure: {text!r}")
+        self.text = text
+        self.success = compile_expression(parts[0].strip())
+        self.failure = compile_expression(parts[1].strip())
+
+    def __repr__(self):
+        return f"SanityLoss({self.text})"
+
+
+@functools.lru_cache(maxsize=256)
+def parse_loss(text: str) -> SanityLoss:
+    """
+    Parse a sanity loss. Results are cached.
+    :param text: success/failure loss, e.g. 1/1D6
+    :return: SanityLoss
+    """
+    return SanityLoss(text)
+
+
+def _as_loss(loss: Union[str, SanityLoss]) -> SanityLoss:
+    return parse_loss(loss) if isinstance(loss, str) else loss
+
+
+def is_fumble(roll: int, sanity: int) -> bool:
+    """
+    100 is always a fumble, below 50 sanity 96-100 is a fumble as well
+    :param roll: D100 roll
+    :param sanity: current sanity
+    :return: True for a fumble
+    """
+    return roll == 100 or (sanity < 50 and roll >= 96)
+
+
+def check(sanity: Sanity, loss: Union[str, SanityLoss], roll: int = None) -> int:
+    """
+    Make a sanity roll and apply the loss. A fumble loses the maximum failure loss.
+    :param sanity: Sanity of an investigator
+    :param loss: sanity loss, e.g. 1/1D6
+    :param roll: D100 roll, generated if missing
+    :return: sanity points lost
+    """
+    loss = _as_loss(loss)
+    if roll is None:
+        roll = _D100.roll(random_func)
+    current = sanity.regular
+    if is_fumble(roll, current):
+        amount = loss.failure.maximum
+    elif roll <= current:
+        amount = loss.success.roll(random_func)
+    else:
+        amount = loss.failure.roll(random_func)
+    amount = max(0, amount)
+    sanity.lose(amount)
+    return amount
+
+
+class SanityDistribution:
+    """
+    Distribution of sanity after a series of encounters
+    """
+
+    def __init__(self, probabilities: list, temporary_insanity: float):
+        """
+        :param probabilities: probability per sanity value, index 0 to 99
+        :param temporary_insanity: probability that at least one loss was 5 or more
+        """
+        self.probabilities = probabilities
+        self.temporary_insanity = temporary_insanity
+
+    def __repr__(self):
+        return f"SanityDistribution(mean={self.mean:.2f}, permanent={self.permanent_insanity:.4f}, " \
+               f"temporary={self.temporary_insanity:.4f})"
+
+    @property
+    def permanent_insanity(self) -> float:
+        """
+        :return: probability that no sanity is left
+        """
+        return self.probabilities[0]
+
+    @property
+    def mean(self) -> float:
+        """
+        :return: expected remaining sanity
+        """
+        return sum(value * p for value, p in enumerate(self.probabilities))
+
+    def at_least(self, value: int) -> float:
+        """
+        :param value: sanity value
+        :return: probability of keeping at least this much sanity
+        """
+        return sum(self.probabilities[max(0, value):])
+
+
+def simulate(starting: list, encounters: list, rand: Callable[[int], int] = random_func) -> SanityDistribution:
+    """
+    Run a series of encounters for a batch of investigators at once
+    :param starting: starting sanity per run, e.g. the POW of a population. Values are limited to 0..SAN_MAXIMUM,
+    as in markov.
+    :param encounters: list of sanity losses, e.g. ["0/1D2", "1/1D6"]
+    :param rand: random function
+    :return: SanityDistribution estimated from the runs
+    """
+    sanity = [max(0, min(SAN_MAXIMUM, value)) for value in starting]
+    temporary = [False] * len(sanity)
+    for encounter in encounters:
+        loss = _as_loss(encounter)
+        fumble_loss = max(0, loss.failure.maximum)
+        successes, failures = [], []
+        for run, current in enumerate(sanity):
+            if current <= 0:
+                continue
+            roll = rand(100)
+            if is_fumble(roll, current):
+                sanity[run] = max(0, current - fumble_loss)
+                temporary[run] = temporary[run] or fumble_loss >= 5
+            elif roll <= current:
+                successes.append(run)
+            else:
+                failures.append(run)
+        for runs, expression in ((successes, loss.success), (failures, loss.failure)):
+            for run, amount in zip(runs, expression.roll_many(len(runs), rand)):
+                amount = max(0, amount)
+                sanity[run] = max(0, sanity[run] - amount)
+                temporary[run] = temporary[run] or amount >= 5
+    counts = [0] * (SAN_MAXIMUM + 1)
+    for value in sanity:
+        counts[value] += 1
+    return SanityDistribution([count / len(sanity) for count in counts], sum(temporary) / len(sanity))
+
+
+def markov(starting: Union[int, dict], encounters: list) -> SanityDistribution:
+    """
+    Exact distribution of sanity after a series of encounters.
+    The state is (sanity, had temporary insanity); every encounter is one transition of the Markov chain,
+    using the exact distributions of the loss expressions.
+    :param starting: starting sanity, or a distribution of starting sanity, e.g. compile_expression("3D6*5").distribution()
+    :param encounters: list of sanity losses
+    :return: SanityDistribution
+    """
+    size = SAN_MAXIMUM + 1
+    if isinstance(starting, int):
+        starting = {starting: 1.0}
+    state = [[0.0] * size, [0.0] * size]
+    for value, p in starting.items():
+        state[0][max(0, min(SAN_MAXIMUM, value))] += p
+    for encounter in encounters:
+        loss = _as_loss(encounter)
+        outcomes = (loss.success.distribution(), loss.failure.distribution(), {loss.failure.maximum: 1.0})
+        new_state = [[0.0] * size, [0.0] * size]
+        for flag in (0, 1):
+            new_state[flag][0] += state[flag][0]
+            for current in range(1, size):
+                p = state[flag][current]
+                if p == 0.0:
+                    continue
+                fumble = 0.05 if current < 50 else 0.01
+                success = min(current, 99) / 100
+                for weight, distribution in zip((success, 1 - success - fumble, fumble), outcomes):
+                    for amount, q in distribution.items():
+                        amount = max(0, amount)
+                        new_flag = 1 if flag or amount >= 5 else 0
+                        new_state[new_flag][max(0, current - amount)] += p * weight * q
+        state = new_state
+    result = SanityDistribution([a + b for a, b in zip(*state)], sum(state[1]))
+    LOGGER.debug(f"Sanity after {len(encounters)} encounters: {result}")
+    return result
+
+
+if __name__ == "__main__":
+    raise NotImplementedError(__file__)
@@ -0,0 +1,387 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+import csv
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Callable, Optional
+
+from coc import config
+from coc.core.roll import random_func
+from coc.lib.logger import LOGGER
+
+POLL_INTERVAL = 2.0
+
+# file name -> (delimiter, column names). Files without column names start with a header row.
+FORMATS = {"occupations.csv": (";", ("OCCUPATION", "ERA")),
+           "skills.csv": (";", ("SKILL", "ERA", "BASE", "SPECIALIZATION", "ID"))}
+DEFAULT_FORMAT = (":", None)
+# optional column with the relative frequency of a row, rows without a value weigh 1
+WEIGHT = "WEIGHT"
+# resolution of the integer coin of an alias table slot
+ALIAS_RESOLUTION = 2 ** 32
+
+
+def _stamp(path: Path) -> tuple:
+    """
+    :param path: file
+    :return: (modification time, size), changes whenever the file is written
+    """
+    status = os.stat(path)
+    return status.st_mtime_ns, status.st_size
+
+
+def _clean_occupations(rows: list) -> list:
+    """
+    Drop the lines referring to another occupation ("Bank Robber - see Criminal"), remarks, era tags and duplicates
+    :param rows: raw rows
+    :return: rows
+    """
+    ret, seen = [], set()
+    for row in rows:
+        if row[0].strip() == '':
+            continue
+        name, _, remark = row[0].partition(' – ')
+        if remark.startswith('see'):
+            continue
+        name = name.split('[')[0].strip()
+        if name not in seen:
+            seen.add(name)
+            ret.append((name, row[1].strip() if len(row) > 1 else ''))
+    return ret
+
+
+class AliasTable:
+    """
+    Weighted sampler using Vose's alias method: every slot holds one row, a threshold and an alias row, so a draw
+    is one random number split into a slot and a coin, whatever the number of rows and the spread of the weights.
+    Without weights the rows are drawn uniformly, the same way as random_func(len(rows)).
+    """
+
+    def __init__(self, rows: tuple, weights: Optional[list] = None):
+        """
+        :param rows: rows to draw from
+        :param weights: relative frequency per row, None for uniform
+        """
+        if not rows:
+            raise LookupError("no rows to draw from")
+        self.rows = rows
+        self.thresholds = None
+        self.aliases = None
+        if weights is not None and len(set(weights)) > 1:
+            self._build(weights)
+
+    def _build(self, weights: list) -> None:
+        count = len(weights)
+        total = sum(weights)
+        if total <= 0 or min(weights) < 0:
+            raise ValueError(f"weights must be non-negative with a positive sum: {weights}")
+        scaled = [weight * count / total for weight in weights]
+        thresholds = [ALIAS_RESOLUTION] * count
+        aliases = list(range(count))
+        small = [i for i, value in enumerate(scaled) if value < 1.0]
+        large = [i for i, value in enumerate(scaled) if value >= 1.0]
+        while small and large:
+            less, more = small.pop(), large.pop()
+            thresholds[less] = int(scaled[less] * ALIAS_RESOLUTION)
+            aliases[less] = more
+            scaled[more] -= 1.0 - scaled[less]
+            (small if scaled[more] < 1.0 else large).append(more)
+        # what is left is 1 up to rounding errors and keeps its own row
+        self.thresholds = thresholds
+        self.aliases = aliases
+
+    def draw(self, rand: Callable[[int], int] = random_func) -> tuple:
+        """
+        :param rand: random function, see roll.random_func
+        :return: a row
+        """
+        if self.thresholds is None:
+            return self.rows[rand(len(self.rows)) - 1]
+        slot, coin = divmod(rand(len(self.rows) * ALIAS_RESOLUTION) - 1, ALIAS_RESOLUTION)
+        return self.rows[slot if coin < self.thresholds[slot] else self.aliases[slot]]
+
+    def draw_many(self, count: int, rand: Callable[[int], int] = random_func) -> list:
+        """
+        :param count: number of rows
+        :param rand: random function, see roll.random_func
+        :return: list of rows
+        """
+        rows = self.rows
+        size = len(rows)
+        if self.thresholds is None:
+            return [rows[rand(size) - 1] for _ in range(count)]
+        thresholds, aliases = self.thresholds, self.aliases
+        ret = []
+        for _ in range(count):
+            slot, coin = divmod(rand(size * ALIAS_RESOLUTION) - 1, ALIAS_RESOLUTION)
+            ret.append(rows[slot if coin < thresholds[slot] else aliases[slot]])
+        return ret
+
+
+class Catalogue:
+    """
+    Immutable in-memory table of a data file with an index per column. A new version of the file gives a new
+    Catalogue, so readers holding one always see complete and consistent data.
+    """
+
+    def __init__(self, path: Path, headers: tuple, rows: tuple, stamp: tuple):
+        """
+        :param path: source file
+        :param headers: upper case column names
+        :param rows: tuple of row tuples
+        :param stamp: (modification time, size) of the file the rows were read from
+        """
+        self.path = path
+        self.headers = headers
+        self.rows = rows
+        self.stamp = stamp
+        self._columns = {header: i for i, header in enumerate(headers)}
+        self._indexes = {}
+        for i, header in enumerate(headers):
+            index = {}
+            for row in rows:
+                index.setdefault(row[i] if i < len(row) else '', []).append(row)
+            self._indexes[header] = {value: tuple(matches) for value, matches in index.items()}
+        self._selections = {}
+        self._samplers = {}
+        self._local = threading.local()
+
+    @classmethod
+    def load(cls, path: Path):
+        """
+        Read a data file. The file is checked before and after reading, so a file that is being written is refused.
+        :param path: data file
+        :return: Catalogue
+        """
+        delimiter, headers = FORMATS.get(path.name, DEFAULT_FORMAT)
+        stamp = _stamp(path)
+        with open(path, 'r', encoding='utf-8') as csvfile:
+            lines = [line for line in csv.reader(csvfile, delimiter=delimiter) if line]
+        if _stamp(path) != stamp:
+            raise OSError(f"{path} changed while reading it")
+        if headers is None:
+            headers, lines = tuple(header.upper() for header in lines[0]), lines[1:]
+        if path.name == "occupations.csv":
+            lines = _clean_occupations(lines)
+        if WEIGHT in headers:
+            # refuse a file with a weight that is no number, so a reload keeps the previous version
+            position = headers.index(WEIGHT)
+            for line in lines:
+                if position < len(line) and line[position].strip():
+                    float(line[position])
+        return cls(path, headers, tuple(tuple(line) for line in lines), stamp)
+
+    def column(self, name: str) -> int:
+        """
+        :param name: column name, case insensitive
+        :return: position of the column
+        """
+        try:
+            return self._columns[name.upper()]
+        except KeyError:
+            raise KeyError(f"{self.path.name} has no column {name}, use one of {', '.join(self.headers)}") from None
+
+    def select(self, **criteria) -> tuple:
+        """
+        Rows matching all criteria, e.g. select(gender="F", lang="NL"). Results are memoized per catalogue.
+        :param criteria: column name -> value, None values are ignored
+        :return: tuple of rows in file order
+        """
+        criteria = tuple(sorted((name.upper(), value) for name, value in criteria.items() if value is not None))
+        ret = self._selections.get(criteria)
+        if ret is None:
+            if not criteria:
+                ret = self.rows
+            else:
+                for name, _ in criteria:
+                    self.column(name)
+                matches = min((self._indexes[name].get(value, ()) for name, value in criteria), key=len)
+                checks = [(self._columns[name], value) for name, value in criteria]
+                ret = tuple(row for row in matches if all(row[i] == value for i, value in checks))
+            self._selections[criteria] = ret
+        return ret
+
+    def sampler(self, **criteria) -> AliasTable:
+        """
+        Sampler of the rows matching all criteria, weighted by the WEIGHT column if the file has one. Samplers are
+        built once per catalogue and criteria.
+        :param criteria: column name -> value, None values are ignored
+        :return: AliasTable
+        """
+        key = tuple(sorted((name.upper(), value) for name, value in criteria.items() if value is not None))
+        ret = self._samplers.get(key)
+        if ret is None:
+            rows = self.select(**criteria)
+            if not rows:
+                raise LookupError(f"no rows in {self.path.name} matching {criteria}")
+            weights = None
+            if WEIGHT in self._columns:
+                position = self._columns[WEIGHT]
+                weights = [float(row[position]) if position < len(row) and row[position].strip() else 1.0
+                           for row in rows]
+            ret = self._samplers[key] = AliasTable(rows, weights)
+        return ret
+
+    def query(self, where: Optional[str] = None) -> list:
+        """
+        Rows matching an SQL where clause, evaluated by an in-memory SQLite copy kept per thread
+        :param where: where clause, e.g. "lang = 'NL'"
+        :return: list of rows
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(":memory:")
+            connection.execute(f"CREATE TABLE TABLETABLE ({', '.join(self.headers)})")
+            connection.executemany(f"INSERT INTO TABLETABLE VALUES ({', '.join('?' for _ in self.headers)})",
+                                   [row + ('',) * (len(self.headers) - len(row)) for row in self.rows])
+            connection.commit()
+            self._local.connection = connection
+        return connection.execute(f"SELECT * FROM TABLETABLE{'' if where is None else ' WHERE ' + where}").fetchall()
+
+
+class CatalogueManager:
+    """
+    Keeps the catalogues of a data directory. Reading a catalogue never blocks: a background thread polls the
+    modification time of every loaded file, rebuilds changed catalogues and swaps the whole mapping at once.
+    """
+
+    def __init__(self, directory: Optional[Path] = None):
+        """
+        :param directory: data directory, by default config.DIR_DATA
+        """
+        self.directory = Path(config.DIR_DATA if directory is None else directory)
+        self._catalogues = {}
+        self._paths = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def path(self, file_name) -> Path:
+        """
+        :param file_name: file name relative to the data directory, or an absolute path
+        :return: absolute path
+        """
+        path = self._paths.get(file_name)
+        if path is None:
+            path = self._paths[file_name] = Path.joinpath(self.directory, file_name).resolve()
+        return path
+
+    def get(self, file_name) -> Catalogue:
+        """
+        The current catalogue of a data file, loaded on first use and watched from then on while the manager is
+        started
+        :param file_name: file name relative to the data directory, or an absolute path
+        :return: Catalogue
+        """
+        path = self.path(file_name)
+        catalogue = self._catalogues.get(path)
+        if catalogue is None:
+            with self._lock:
+                catalogue = self._catalogues.get(path)
+                if catalogue is None:
+                    catalogue = Catalogue.load(path)
+                    self._catalogues = {**self._catalogues, path: catalogue}
+        return catalogue
+
+    def refresh(self) -> list:
+        """
+        Reload the catalogues whose file changed. A file that can not be read (yet) keeps its old catalogue.
+        :return: list of reloaded paths
+        """
+        with self._lock:
+            reloaded = {}
+            for path, catalogue in self._catalogues.items():
+                try:
+                    if _stamp(path) != catalogue.stamp:
+                        reloaded[path] = Catalogue.load(path)
+                except (OSError, csv.Error, IndexError, ValueError) as e:
+                    LOGGER.warning(f"Keeping the current version of {path}: {e}")
+            if reloaded:
+                self._catalogues = {**self._catalogues, **reloaded}
+                LOGGER.info(f"Reloaded {', '.join(path.name for path in reloaded)}")
+        return list(reloaded)
+
+    def start(self, interval: float = POLL_INTERVAL) -> None:
+        """
+        Start watching the loaded files in a background thread
+        :param interval: seconds between polls
+        """
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, args=(interval,), name="coc-catalogue-watcher",
+                                        daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """
+        Stop watching
+        """
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def _watch(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            self.refresh()
+
+
+_manager = None
+_manager_lock = threading.Lock()
+
+
+def catalogues() -> CatalogueManager:
+    """
+    :return: the shared CatalogueManager, reading from config.DIR_DATA unless set_data_directory was called. The
+    default manager watches its files every POLL_INTERVAL seconds, so a long-running process picks up edited data
+    files.
+    """
+    global _manager
+    if _manager is None:
+        with _manager_lock:
+            if _manager is None:
+                manager = CatalogueManager()
+                manager.start()
+                _manager = manager
+    return _manager
+
+
+def set_data_directory(directory: Path, watch: Optional[float] = None) -> CatalogueManager:
+    """
+    Read the data files from another directory from now on
+    :param directory: data directory
+    :param watch: poll interval in seconds to watch the files, None to not watch them
+    :return: the new shared CatalogueManager
+    """
+    global _manager
+    manager = CatalogueManager(directory)
+    if watch is not None:
+        manager.start(watch)
+    with _manager_lock:
+        old, _manager = _manager, manager
+    if old is not None:
+        old.stop()
+    return manager
+
+
+if __name__ == "__main__":
+    raise NotImplementedError(__file__)
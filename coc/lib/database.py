@@ -16,37 +16,34 @@
 
 """
 
-import csv
-import sqlite3
+import functools
+from pathlib import Path
 from typing import Optional
 
 from coc import config
 from coc.core import roll
 from coc.core.gender import Gender
 from coc.core.rules import Era
+from coc.lib import metrics
+from coc.lib.catalogue import Catalogue, catalogues
 from coc.lib.logger import LOGGER
+from coc.lib.namemodel import NameModel, load_model
 
+# name sources: the names in the csv files, or new names from a model trained on them
+CORPUS = "corpus"
+SYNTHETIC = "synthetic"
 
+
+@metrics.measured("database.get_random_row")
 def get_random_row(file_path: str, where: str = None) -> Optional[tuple]:
     """
-    Read a csv into memory
-    :param file_path: full path to a csv file
+    Select a random row of a data file
+    :param file_path: data file name or full path to a csv file
     :param where: where clause for query
     """
     LOGGER.debug(f"Getting a random row fro file {file_path} with criteria: {where}")
     try:
-        connection = sqlite3.connect(":memory:")
-        cursor = connection.cursor()
-        with open(file_path, 'r', encoding='utf-8') as csvfile:
-            csvreader = csv.reader(csvfile, delimiter=':')
-            headers = next(csvreader)
-            cursor.execute(f"CREATE TABLE TABLETABLE ({', '.join(headers)})")
-            for line in csvreader:
-                cursor.execute(f"INSERT INTO TABLETABLE VALUES ({', '.join(['?' for _ in line])})", line)
-        connection.commit()
-        query = f"""SELECT * FROM TABLETABLE {'' if where is None else ' WHERE ' + where}"""
-        res = cursor.execute(query).fetchall()
-
+        res = catalogues().get(file_path).query(where)
         if res is None or len(res) == 0:
             raise Exception()
         rnd = roll.random_func(len(res)) - 1
@@ -56,50 +53,163 @@ def get_random_row(file_path: str, where: str = None) -> Optional[tuple]:
     return None
 
 
-def add_criterium(dbname, value, criteria) -> None:
+def _sampler(file_name: str, era: Optional[Era], criteria: dict):
+    """
+    :param file_name: data file name
+    :param era: era, only used as criterium when the file has an ERA column
+    :param criteria: column name -> value, None values are ignored
+    :return: AliasTable of the rows matching the criteria
+    """
+    catalogue = catalogues().get(file_name)
+    if era is not None:
+        if "ERA" in catalogue.headers:
+            criteria = dict(criteria, era=era.name)
+        else:
+            LOGGER.debug(f"{file_name} has no ERA column, its names are used in every era")
+    return catalogue.sampler(**criteria)
+
+
+def _random_name(file_name: str, era: Optional[Era] = None, **criteria) -> str:
     """
-    If value is not None, then a part of where clause will be added to the criteria lst
-    :param dbname: name of the database title
-    :param value: the value of the criterium
-    :param criteria: list to append to
+    Pick a random name from the indexed rows matching the criteria, weighted by the WEIGHT column if the file has one
+    :param file_name: data file name
+    :param era: era, ignored when the file has no ERA column
+    :param criteria: column name -> value, None values are ignored
+    :return: name
     """
-    if value is None:
-        return
-    criteria.append(f"{dbname} = '{value}'")
+    return _sampler(file_name, era, criteria).draw(roll.random_func)[0]
 
 
-def get_first_name(gender: Gender = None, language: str = None, era: Era = None) -> str:
+def random_names(file_name: str, count: int, era: Optional[Era] = None, **criteria) -> list:
+    """
+    Draw a number of names from the rows matching the criteria, weighted by the WEIGHT column if the file has one
+    :param file_name: data file name
+    :param count: number of names
+    :param era: era, ignored when the file has no ERA column
+    :param criteria: column name -> value, None values are ignored
+    :return: list of names
+    """
+    return [row[0] for row in _sampler(file_name, era, criteria).draw_many(count, roll.random_func)]
+
+
+def get_first_name(gender: Gender = None, language: str = None, era: Era = None, source: str = CORPUS) -> str:
     """
     Get a random first name
     :param gender: selection criterium 1
     :param language:  selection criterium 2
-    :param era: selection criterium 3
+    :param era: selection criterium 3, ignored when the file has no ERA column
+    :param source: CORPUS for a name from the file, SYNTHETIC for a new name generated from them
     :return: str
     """
-    criteria = []
-    add_criterium('GENDER', None if gender is None else Gender.short_code(gender), criteria)
-    add_criterium('LANG', language, criteria)
-    add_criterium('ERA', era, criteria)
-    where = f"{' AND '.join(criteria)}" if len(criteria) > 0 else None
-    return get_random_row(config.CSV_FIRST_NAMES, where=where)[0]
+    gender_code = None if gender is None else Gender.short_code(gender)
+    if source == SYNTHETIC:
+        return name_model(config.CSV_FIRST_NAMES.name, gender_code, language).generate()
+    return _random_name(config.CSV_FIRST_NAMES.name, era, gender=gender_code, lang=language)
 
 
-def get_last_name(language: str = None, era: Era = None) -> str:
+def get_last_name(language: str = None, era: Era = None, source: str = CORPUS) -> str:
     """
     Get a random last name
     :param language:  selection criterium 2
-    :param era: selection criterium 3
+    :param era: selection criterium 3, ignored when the file has no ERA column
+    :param source: CORPUS for a name from the file, SYNTHETIC for a new name generated from them
     :return: str
     """
-    criteria = []
-    add_criterium('LANG', language, criteria)
-    add_criterium('ERA', era, criteria)
-    where = f"{' AND '.join(criteria)}" if len(criteria) > 0 else None
-    return get_random_row(config.CSV_NAMES, where=where)[0]
+    if source == SYNTHETIC:
+        return name_model(config.CSV_NAMES.name, None, language).generate()
+    return _random_name(config.CSV_NAMES.name, era, lang=language)
 
 
-if __name__ == "__main__":
-    for _ in range(1000):
-        print(get_first_name(gender=Gender.FEMALE) + ' ' + get_last_name(language='NL') )
+def random_first_names(count: int, gender: Gender = None, language: str = None, era: Era = None) -> list:
+    """
+    Draw a number of first names from the file at once
+    :param count: number of names
+    :param gender: selection criterium 1
+    :param language: selection criterium 2
+    :param era: selection criterium 3, ignored when the file has no ERA column
+    :return: list of str
+    """
+    gender_code = None if gender is None else Gender.short_code(gender)
+    return random_names(config.CSV_FIRST_NAMES.name, count, era, gender=gender_code, lang=language)
+
+
+def random_last_names(count: int, language: str = None, era: Era = None) -> list:
+    """
+    Draw a number of last names from the file at once
+    :param count: number of names
+    :param language: selection criterium 2
+    :param era: selection criterium 3, ignored when the file has no ERA column
+    :return: list of str
+    """
+    return random_names(config.CSV_NAMES.name, count, era, lang=language)
+
+
+def name_model(file_name: str, gender: Optional[str] = None, language: Optional[str] = None) -> NameModel:
+    """
+    Name model trained on the names of a data file matching the criteria, cached in config.DIR_CACHE and retrained
+    when the catalogue of the file is reloaded
+    :param file_name: first names or last names file
+    :param gender: gender code M or F, None for any (first names only)
+    :param language: language code, None for any
+    :return: NameModel
+    """
+    return _name_model(catalogues().get(file_name), gender, language)
+
+
+@functools.lru_cache(maxsize=64)
+def _name_model(catalogue: Catalogue, gender: Optional[str], language: Optional[str]) -> NameModel:
+    names = [row[0] for row in catalogue.select(gender=gender, lang=language)]
+    cache_path = Path.joinpath(config.DIR_CACHE, f"{catalogue.path.stem}_{gender or 'any'}_{language or 'any'}.json")
+    return load_model(cache_path, names, list(catalogue.stamp))
 
-    # raise NotImplementedError(__file__)
+
+def get_names(file_name: str, **criteria) -> list:
+    """
+    All values of the first column of the rows matching the criteria
+    :param file_name: data file name or full path to a csv file with a header row
+    :param criteria: column name -> value, None values are ignored
+    :return: list of names in file order
+    """
+    return [row[0] for row in catalogues().get(file_name).select(**criteria)]
+
+
+def first_names(gender: Gender = None, language: str = None) -> list:
+    """
+    All first names matching the criteria
+    :param gender: selection criterium 1
+    :param language: selection criterium 2
+    :return: list of str
+    """
+    return get_names(config.CSV_FIRST_NAMES.name, gender=None if gender is None else Gender.short_code(gender),
+                     lang=language)
+
+
+def last_names(language: str = None) -> list:
+    """
+    All last names matching the criteria
+    :param language: selection criterium 2
+    :return: list of str
+    """
+    return get_names(config.CSV_NAMES.name, lang=language)
+
+
+def read_occupations(file_path: str = None) -> list:
+    """
+    Read the occupation names. Lines referring to another occupation ("Bank Robber - see Criminal") are skipped,
+    remarks and era tags are removed.
+    :param file_path: occupations file, by default the configured one
+    :return: list of occupation names
+    """
+    return get_names(config.CSV_OCCUPATIONS.name if file_path is None else file_path)
+
+
+def get_occupation() -> str:
+    """
+    Get a random occupation
+    :return: str
+    """
+    return _random_name(config.CSV_OCCUPATIONS.name)
+
+
+if __name__ == "__main__":
+    raise NotImplementedError(__file__)
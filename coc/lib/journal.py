@@ -0,0 +1,287 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+import json
+import threading
+from array import array
+from collections import namedtuple
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Optional
+
+from coc.core.dice import compile_expression, set_journal
+from coc.lib.logger import LOGGER
+from coc.lib.symbols import SymbolTable
+
+CAPACITY = 65536
+
+# a record is a header word, the total and the die results packed DICE_PER_WORD to a word
+EXPRESSION_BITS = 24
+CONTEXT_BITS = 20
+COUNT_BITS = 16
+DIE_BITS = 15
+DICE_PER_WORD = 4
+MAX_DICE = 16
+RECORD_WORDS = 2 + MAX_DICE // DICE_PER_WORD
+
+COUNT_MASK = (1 << COUNT_BITS) - 1
+CONTEXT_MASK = (1 << CONTEXT_BITS) - 1
+EXPRESSION_MASK = (1 << EXPRESSION_BITS) - 1
+DIE_MASK = (1 << DIE_BITS) - 1
+EXPRESSION_SHIFT = COUNT_BITS + CONTEXT_BITS
+# header flag of a roll whose dice did not fit the record
+NOT_REPLAYABLE = 1 << (EXPRESSION_SHIFT + EXPRESSION_BITS)
+
+NO_CONTEXT = ""
+
+# dice is None when the roll had more than MAX_DICE dice or a die above DIE_MASK, such a roll can not be replayed
+Entry = namedtuple("Entry", ("sequence", "expression", "context", "dice", "total"))
+
+
+def _symbols_path(path: Path) -> Path:
+    """
+    :param path: spill file
+    :return: file with the expressions and contexts of the spill file
+    """
+    return path.with_name(path.name + ".symbols.json")
+
+
+def _decode(words, sequence: int, expressions: list, contexts: list) -> Entry:
+    """
+    :param words: the RECORD_WORDS words of a record
+    :param sequence: number of the roll since the journal started
+    :param expressions: expression texts by ID
+    :param contexts: contexts by ID
+    :return: Entry
+    """
+    header = words[0]
+    count = header & COUNT_MASK
+    dice = None
+    if not header & NOT_REPLAYABLE:
+        dice = [(words[2 + i // DICE_PER_WORD] >> (i % DICE_PER_WORD * DIE_BITS)) & DIE_MASK for i in range(count)]
+    return Entry(sequence, expressions[(header >> EXPRESSION_SHIFT) & EXPRESSION_MASK],
+                 contexts[(header >> COUNT_BITS) & CONTEXT_MASK], dice, words[1])
+
+
+class Journal:
+    """
+    Ring buffer of the latest rolls as packed integers: expression and context are IDs in symbol tables, so
+    recording a roll costs a few integer operations instead of formatting a log line. When a spill file is given,
+    every full ring is appended to it before it is overwritten, so the file holds all rolls.
+    """
+
+    def __init__(self, capacity: int = CAPACITY, spill: Optional[Path] = None):
+        """
+        :param capacity: number of rolls kept in memory
+        :param spill: binary file to append the rolls to, None to keep only the latest rolls
+        """
+        if capacity < 1:
+            raise ValueError(f"capacity must be positive: {capacity}")
+        self.capacity = capacity
+        self.spill = None if spill is None else Path(spill)
+        self.expressions = SymbolTable("expressions")
+        self.contexts = SymbolTable("contexts")
+        self.contexts.intern(NO_CONTEXT)
+        self.count = 0
+        self._buffer = array("q", bytes(8 * RECORD_WORDS * capacity))
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._file = None
+        if self.spill is not None:
+            self._file = open(self.spill, "wb")
+
+    @contextmanager
+    def context(self, text: str):
+        """
+        Tag the rolls of the calling thread within the with block, e.g. with journal.context("Harvey vs Deep One")
+        :param text: context
+        """
+        symbol = self.contexts.intern(text)
+        if symbol > CONTEXT_MASK:
+            raise OverflowError(f"more than {CONTEXT_MASK + 1} contexts")
+        previous = getattr(self._local, "context", 0)
+        self._local.context = symbol
+        try:
+            yield
+        finally:
+            self._local.context = previous
+
+    def record(self, expression: str, dice: list, total: int) -> None:
+        """
+        Record a roll
+        :param expression: dice expression text
+        :param dice: die results in the order they were rolled
+        :param total: result of the expression
+        """
+        symbol = self.expressions.intern(expression)
+        if symbol > EXPRESSION_MASK:
+            raise OverflowError(f"more than {EXPRESSION_MASK + 1} expressions")
+        count = len(dice)
+        header = ((symbol << EXPRESSION_SHIFT) | (getattr(self._local, "context", 0) << COUNT_BITS) |
+                  min(count, COUNT_MASK))
+        words = [0] * (MAX_DICE // DICE_PER_WORD)
+        if count <= MAX_DICE and max(dice, default=0) <= DIE_MASK:
+            for i, value in enumerate(dice):
+                words[i // DICE_PER_WORD] |= value << (i % DICE_PER_WORD * DIE_BITS)
+        else:
+            header |= NOT_REPLAYABLE
+        with self._lock:
+            buffer = self._buffer
+            start = self.count % self.capacity * RECORD_WORDS
+            buffer[start] = header
+            buffer[start + 1] = total
+            buffer[start + 2:start + RECORD_WORDS] = array("q", words)
+            self.count += 1
+            if self._file is not None and self.count % self.capacity == 0:
+                buffer.tofile(self._file)
+
+    def entries(self, expression: Optional[str] = None, context: Optional[str] = None, since: int = 0):
+        """
+        The rolls still in the ring, oldest first. Filters compare the IDs in the headers, only matching rolls are
+        decoded.
+        :param expression: only rolls of this expression text
+        :param context: only rolls in this context
+        :param since: only rolls with this sequence number or higher
+        :return: generator of Entry
+        """
+        with self._lock:
+            count = self.count
+            buffer = array("q", self._buffer)
+        expression_id = None if expression is None else self.expressions.find(expression)
+        context_id = None if context is None else self.contexts.find(context)
+        if (expression is not None and expression_id is None) or (context is not None and context_id is None):
+            return
+        expressions, contexts = self.expressions, self.contexts
+        for sequence in range(max(since, count - self.capacity, 0), count):
+            start = sequence % self.capacity * RECORD_WORDS
+            header = buffer[start]
+            if expression_id is not None and (header >> EXPRESSION_SHIFT) & EXPRESSION_MASK != expression_id:
+                continue
+            if context_id is not None and (header >> COUNT_BITS) & CONTEXT_MASK != context_id:
+                continue
+            yield _decode(buffer[start:start + RECORD_WORDS], sequence, expressions, contexts)
+
+    def flush(self) -> None:
+        """
+        Write the rolls of the current, incomplete ring and the symbol tables to the spill file. The ring is kept,
+        so later rolls continue it.
+        """
+        if self._file is None:
+            return
+        with self._lock:
+            pending = self.count % self.capacity
+            position = self._file.tell()
+            self._buffer[:pending * RECORD_WORDS].tofile(self._file)
+            self._file.flush()
+            # the next full ring or flush rewrites the pending records
+            self._file.seek(position)
+            symbols = {"expressions": [self.expressions[i] for i in range(len(self.expressions))],
+                       "contexts": [self.contexts[i] for i in range(len(self.contexts))],
+                       "count": self.count}
+        with open(_symbols_path(self.spill), "w", encoding="utf-8") as symbols_file:
+            json.dump(symbols, symbols_file)
+
+    def close(self) -> None:
+        """
+        Flush and close the spill file
+        """
+        if self._file is None:
+            return
+        self.flush()
+        with self._lock:
+            self._file.close()
+            self._file = None
+        LOGGER.info(f"Journal of {self.count} rolls written to {self.spill}")
+
+
+def read(spill: Path):
+    """
+    Read the rolls of a spill file
+    :param spill: spill file of a closed or flushed Journal
+    :return: generator of Entry, oldest first
+    """
+    spill = Path(spill)
+    with open(_symbols_path(spill), "r", encoding="utf-8") as symbols_file:
+        symbols = json.load(symbols_file)
+    words = array("q")
+    with open(spill, "rb") as spill_file:
+        words.frombytes(spill_file.read())
+    count = min(symbols["count"], len(words) // RECORD_WORDS)
+    for sequence in range(count):
+        start = sequence * RECORD_WORDS
+        yield _decode(words[start:start + RECORD_WORDS], sequence, symbols["expressions"], symbols["contexts"])
+
+
+def replay(entry: Entry) -> int:
+    """
+    Evaluate the expression of a recorded roll again with the recorded die results instead of random numbers
+    :param entry: Entry
+    :return: total of the replayed roll
+    """
+    if entry.dice is None:
+        raise ValueError(f"roll {entry.sequence} of {entry.expression} has too many dice to replay")
+    dice = iter(entry.dice)
+
+    def scripted_func(limit: int) -> int:
+        value = next(dice, None)
+        if value is None:
+            raise ValueError(f"roll {entry.sequence} of {entry.expression} needs more dice than recorded")
+        if not 1 <= value <= limit:
+            raise ValueError(f"roll {entry.sequence}: recorded {value} does not fit a D{limit}")
+        return value
+
+    total = compile_expression(entry.expression).evaluate(scripted_func)
+    if next(dice, None) is not None:
+        raise ValueError(f"roll {entry.sequence} of {entry.expression} recorded more dice than it needs")
+    return total
+
+
+def verify(entry: Entry) -> bool:
+    """
+    :param entry: Entry
+    :return: True if replaying the recorded dice gives the recorded total
+    """
+    try:
+        return replay(entry) == entry.total
+    except ValueError as e:
+        LOGGER.warning(e)
+        return False
+
+
+def start(capacity: int = CAPACITY, spill: Optional[Path] = None) -> Journal:
+    """
+    Record every Roll.roll in a new journal
+    :param capacity: number of rolls kept in memory
+    :param spill: binary file to append the rolls to
+    :return: Journal
+    """
+    journal = Journal(capacity, spill)
+    set_journal(journal)
+    return journal
+
+
+def stop(journal: Journal) -> None:
+    """
+    Stop recording and close the journal
+    :param journal: Journal returned by start
+    """
+    set_journal(None)
+    journal.close()
+
+
+if __name__ == "__main__":
+    raise NotImplementedError(__file__)
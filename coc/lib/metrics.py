@@ -0,0 +1,274 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+
+import functools
+import json
+import sys
+import threading
+import time
+from typing import Callable, Optional
+
+from coc.lib.logger import LOGGER
+
+# modules searched for imported measured functions
+PACKAGE = __name__.split(".")[0]
+
+
+class Metric:
+    """
+    Counter, cumulative timer and duration histogram for one operation.
+    Histogram bucket n counts the calls that took less than 2^n nanoseconds (and at least 2^(n-1)).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.histogram = {}
+
+    def __repr__(self):
+        return f"Metric({self.name}, count={self.count}, total={self.total:.6f}s)"
+
+    def add(self, duration: Optional[float] = None, count: int = 1) -> None:
+        """
+        Register calls of the operation
+        :param duration: elapsed time in seconds, None for plain counters
+        :param count: number of calls
+        """
+        self.count += count
+        if duration is None:
+            return
+        self.total += duration
+        if self.minimum is None or duration < self.minimum:
+            self.minimum = duration
+        if self.maximum is None or duration > self.maximum:
+            self.maximum = duration
+        bucket = int(duration * 1e9).bit_length()
+        self.histogram[bucket] = self.histogram.get(bucket, 0) + 1
+
+    def as_dict(self) -> dict:
+        """
+        :return: JSON serializable view of the metric
+        """
+        return {"count": self.count,
+                "total_s": self.total,
+                "mean_s": self.total / sum(self.histogram.values()) if self.histogram else None,
+                "min_s": self.minimum,
+                "max_s": self.maximum,
+                "histogram_ns": {f"<{2 ** bucket}": n for bucket, n in sorted(self.histogram.items())}}
+
+
+class _State:
+    def __init__(self):
+        self.enabled = False
+        self.metrics = {}
+        self.lock = threading.Lock()
+        self.dumper = None
+        # (bare function, instrumented function) of every measured function
+        self.instrumented = []
+
+
+_STATE = _State()
+
+
+def _owner(func: Callable):
+    """
+    :param func: function defined at module or class level
+    :return: module or class holding the function, None for a nested function
+    """
+    owner = sys.modules.get(func.__module__)
+    *path, _ = func.__qualname__.split(".")
+    for name in path:
+        owner = getattr(owner, name, None)
+    return owner
+
+
+def _package_modules() -> list:
+    """
+    :return: the loaded modules of this package, the only ones that import measured functions
+    """
+    return [module for name, module in list(sys.modules.items())
+            if (name == PACKAGE or name.startswith(PACKAGE + ".")) and module is not None]
+
+
+def _swap(old: Callable, new: Callable) -> None:
+    """
+    Replace a function by another one in its module or class and in every module of the package that imported it.
+    References kept elsewhere, e.g. as default arguments or in modules outside the package, still point to the
+    function they got.
+    :param old: function to replace
+    :param new: replacement
+    """
+    name = old.__name__
+    owner = _owner(old)
+    if isinstance(owner, type):
+        value = owner.__dict__.get(name)
+        if value is old:
+            setattr(owner, name, new)
+        elif isinstance(value, (staticmethod, classmethod)) and value.__func__ is old:
+            setattr(owner, name, type(value)(new))
+    for module in _package_modules():
+        namespace = module.__dict__
+        for key, value in list(namespace.items()):
+            if value is old:
+                namespace[key] = new
+
+
+def enable() -> None:
+    """
+    Start collecting metrics: the measured functions are replaced by their instrumented versions
+    """
+    with _STATE.lock:
+        if not _STATE.enabled:
+            for func, wrapper in _STATE.instrumented:
+                _swap(func, wrapper)
+        _STATE.enabled = True
+
+
+def disable() -> None:
+    """
+    Stop collecting metrics and put the bare measured functions back. Collected values are kept until reset()
+    """
+    with _STATE.lock:
+        if _STATE.enabled:
+            for func, wrapper in _STATE.instrumented:
+                _swap(wrapper, func)
+        _STATE.enabled = False
+
+
+def is_enabled() -> bool:
+    """
+    :return: True if metrics are collected
+    """
+    return _STATE.enabled
+
+
+def reset() -> None:
+    """
+    Forget all collected metrics
+    """
+    with _STATE.lock:
+        _STATE.metrics = {}
+
+
+def record(name: str, duration: Optional[float] = None, count: int = 1) -> None:
+    """
+    Register calls of an operation, ignored if metrics are disabled
+    :param name: operation name
+    :param duration: elapsed time in seconds, None for plain counters
+    :param count: number of calls
+    """
+    if not _STATE.enabled:
+        return
+    with _STATE.lock:
+        metric = _STATE.metrics.get(name)
+        if metric is None:
+            metric = _STATE.metrics[name] = Metric(name)
+        metric.add(duration, count)
+
+
+def measured(name: str) -> Callable:
+    """
+    Decorator that counts and times calls of a module or class level function while metrics are enabled.
+    The function itself is returned: enable() swaps in the instrumented version and disable() swaps it out, so
+    disabled metrics cost nothing. Only the coc modules are searched for imported references, so code outside the
+    package that imported a measured function keeps calling it unmeasured. Nested functions can not be swapped and
+    are always instrumented.
+    :param name: operation name
+    :return: decorator
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _STATE.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+
+        if "<locals>" in func.__qualname__:
+            return wrapper
+        with _STATE.lock:
+            _STATE.instrumented.append((func, wrapper))
+        # the function is bound to its name after the decorator returns
+        return wrapper if _STATE.enabled else func
+
+    return decorator
+
+
+def snapshot() -> dict:
+    """
+    Get a consistent copy of the collected metrics
+    :return: dict of operation name to metric values
+    """
+    with _STATE.lock:
+        return {name: metric.as_dict() for name, metric in sorted(_STATE.metrics.items())}
+
+
+def dump(file_path: str = None) -> None:
+    """
+    Write a snapshot as one JSON line to a file, or to the log if no file is given
+    :param file_path: file to append to
+    """
+    line = json.dumps({"timestamp": time.time(), "metrics": snapshot()})
+    if file_path is None:
+        LOGGER.info(line)
+        return
+    with open(file_path, "a", encoding="utf-8") as out:
+        out.write(line + "\n")
+
+
+def start_periodic_dump(interval: float, file_path: str = None) -> None:
+    """
+    Dump a snapshot every interval seconds from a daemon thread
+    :param interval: seconds between two dumps
+    :param file_path: file to append to, or None to log
+    """
+    if interval <= 0:
+        raise ValueError(f"interval must be positive: {interval}")
+    stop_periodic_dump()
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            dump(file_path)
+
+    thread = threading.Thread(target=run, name="coc-metrics-dump", daemon=True)
+    _STATE.dumper = (thread, stop, file_path)
+    thread.start()
+
+
+def stop_periodic_dump() -> None:
+    """
+    Stop the periodic dump and write one final snapshot
+    """
+    if _STATE.dumper is None:
+        return
+    thread, stop, file_path = _STATE.dumper
+    _STATE.dumper = None
+    stop.set()
+    thread.join()
+    dump(file_path)
+
+
+if __name__ == "__main__":
+    raise NotImplementedError(__file__)
@@ -0,0 +1,160 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+import json
+import os
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Callable
+
+from coc.core.roll import random_func
+from coc.lib.logger import LOGGER
+
+ORDER = 2
+MIN_LENGTH = 3
+MAX_LENGTH = 14
+MAX_ATTEMPTS = 100
+START = "^"
+END = "$"
+
+
+class NameModel:
+    """
+    Character Markov model of names. Every context of ORDER characters maps to a cumulative table of the
+    characters following it in the training names, so drawing a character is one random number and a bisect.
+    """
+
+    def __init__(self, table: dict, order: int = ORDER, known=()):
+        """
+        :param table: context -> (next characters, cumulative counts)
+        :param order: context length
+        :param known: training names, not generated when novel names are asked for
+        """
+        self.table = table
+        self.order = order
+        self.known = frozenset(known)
+
+    @classmethod
+    def train(cls, names, order: int = ORDER):
+        """
+        Count the character transitions in a list of names
+        :param names: training names
+        :param order: context length
+        :return: NameModel
+        """
+        names = [name for name in names if name]
+        if not names:
+            raise ValueError("no names to train a name model on")
+        counts = defaultdict(Counter)
+        for name in names:
+            padded = START * order + name + END
+            for i in range(order, len(padded)):
+                counts[padded[i - order:i]][padded[i]] += 1
+        table = {}
+        for context, following in counts.items():
+            characters = sorted(following)
+            cumulative, total = [], 0
+            for character in characters:
+                total += following[character]
+                cumulative.append(total)
+            table[context] = ("".join(characters), tuple(cumulative))
+        return cls(table, order, names)
+
+    def as_dict(self) -> dict:
+        """
+        :return: JSON serializable representation
+        """
+        return {"order": self.order,
+                "table": {context: [characters, list(cumulative)] for context, (characters, cumulative) in
+                          self.table.items()},
+                "known": sorted(self.known)}
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        """
+        :param data: as_dict() output
+        :return: NameModel
+        """
+        return cls({context: (characters, tuple(cumulative)) for context, (characters, cumulative) in
+                    data["table"].items()}, data["order"], data["known"])
+
+    def generate(self, novel: bool = True, rand: Callable[[int], int] = random_func) -> str:
+        """
+        Generate a name
+        :param novel: do not return names from the training set
+        :param rand: random function, see roll.random_func
+        :return: name
+        """
+        table, order, known = self.table, self.order, self.known
+        name = None
+        for _ in range(MAX_ATTEMPTS):
+            context, name = START * order, ""
+            while len(name) <= MAX_LENGTH:
+                characters, cumulative = table[context]
+                character = characters[bisect_left(cumulative, rand(cumulative[-1]))]
+                if character == END:
+                    break
+                name += character
+                context = context[1:] + character
+            if MIN_LENGTH <= len(name) <= MAX_LENGTH and not (novel and name in known):
+                return name
+        LOGGER.debug(f"No acceptable name in {MAX_ATTEMPTS} attempts, returning {name}")
+        return name
+
+    def generate_many(self, count: int, novel: bool = True, rand: Callable[[int], int] = random_func) -> list:
+        """
+        Generate a number of names
+        :param count: number of names
+        :param novel: do not return names from the training set
+        :param rand: random function, see roll.random_func
+        :return: list of names
+        """
+        generate = self.generate
+        return [generate(novel, rand) for _ in range(count)]
+
+
+def load_model(cache_path: Path, names, stamp: list, order: int = ORDER) -> NameModel:
+    """
+    Load a trained model from disk, or train it and store it when the cache is missing or stale
+    :param cache_path: JSON file
+    :param names: training names, only used when training
+    :param stamp: identification of the training data, e.g. modification time and size of the source file
+    :param order: context length
+    :return: NameModel
+    """
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as cache_file:
+            data = json.load(cache_file)
+        if data["stamp"] == stamp and data["order"] == order:
+            return NameModel.from_dict(data)
+    except (OSError, ValueError, KeyError) as e:
+        LOGGER.debug(f"No usable name model in {cache_path}: {e}")
+    LOGGER.info(f"Training name model {cache_path.name}")
+    model = NameModel.train(names, order)
+    data = model.as_dict()
+    data["stamp"] = stamp
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = cache_path.with_suffix(".tmp")
+    with open(temp_path, 'w', encoding='utf-8') as cache_file:
+        json.dump(data, cache_file)
+    os.replace(temp_path, cache_path)
+    return model
+
+
+if __name__ == "__main__":
+    raise NotImplementedError(__file__)
@@ -0,0 +1,190 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+import hashlib
+import math
+import threading
+from typing import Optional
+
+from coc.core import roll
+from coc.core.gender import Gender
+from coc.lib import database
+from coc.lib.logger import LOGGER
+
+# shared visited sets larger than this use a Bloom filter instead of an exact set
+EXACT_LIMIT = 1000000
+FALSE_POSITIVE_RATE = 0.001
+
+
+class NamespaceExhausted(LookupError):
+    """
+    Every full name matching a filter has been handed out
+    """
+
+
+class BloomFilter:
+    """
+    Approximate set of strings. Membership tests never miss an added string, but may report a string that was not
+    added with the configured false positive rate.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = FALSE_POSITIVE_RATE):
+        """
+        :param capacity: number of strings expected
+        :param error_rate: false positive rate at capacity
+        """
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / max(1, capacity) * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, text: str):
+        digest = hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+    def add(self, text: str) -> None:
+        """
+        :param text: string to add
+        """
+        for position in self._positions(text):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, text: str) -> bool:
+        return all(self.bits[position >> 3] >> (position & 7) & 1 for position in self._positions(text))
+
+    def __len__(self):
+        return self.count
+
+
+def visited_set(capacity: int):
+    """
+    Set to track handed out names across generators: exact for small pools, a Bloom filter for very large ones
+    :param capacity: number of names expected
+    :return: set or BloomFilter
+    """
+    return set() if capacity <= EXACT_LIMIT else BloomFilter(capacity)
+
+
+def _coprime(size: int) -> int:
+    """
+    :param size: size of the namespace
+    :return: random step in [1, size] sharing no factor with size
+    """
+    while True:
+        step = roll.random_func(size)
+        if math.gcd(step, size) == 1:
+            return step
+
+
+class UniqueNames:
+    """
+    Hands out (first name, last name) pairs matching a filter without replacement. The i-th pair is the
+    combination (step * i + offset) mod size of shuffled name lists, which visits every combination exactly once,
+    so a name costs O(1) and exhaustion is known without retries. Names in the optional shared visited set, e.g.
+    issued by another generator, are skipped and every issued name is added to it. next_name() can be called
+    from several threads.
+    """
+
+    def __init__(self, gender: Optional[Gender] = None, language: Optional[str] = None, taken=None):
+        """
+        :param gender: gender of the first names, None for any
+        :param language: language of the names, e.g. EN, NL, DA, None for any
+        :param taken: optional shared visited set (see visited_set) of "first last" strings
+        """
+        self.gender = gender
+        self.language = language
+        # the name files repeat some names, e.g. per language
+        self.first_names = list(dict.fromkeys(database.first_names(gender=gender, language=language)))
+        self.last_names = list(dict.fromkeys(database.last_names(language=language)))
+        roll.generator().shuffle(self.first_names)
+        roll.generator().shuffle(self.last_names)
+        self.size = len(self.first_names) * len(self.last_names)
+        self.taken = taken
+        self.position = 0
+        self._lock = threading.Lock()
+        if self.size > 0:
+            self._step = _coprime(self.size)
+            self._offset = roll.random_func(self.size) - 1
+
+    @property
+    def remaining(self) -> int:
+        """
+        :return: number of combinations not visited yet, names taken elsewhere included
+        """
+        return self.size - self.position
+
+    @property
+    def exhausted(self) -> bool:
+        """
+        :return: True if every combination has been visited
+        """
+        return self.position >= self.size
+
+    def _advance(self) -> Optional[tuple]:
+        """
+        Visit the next combination
+        :return: (first name, last name), None if it is taken already
+        """
+        index = (self._step * self.position + self._offset) % self.size
+        self.position += 1
+        first, last = divmod(index, len(self.last_names))
+        name = (self.first_names[first], self.last_names[last])
+        if self.taken is not None:
+            full_name = ' '.join(name)
+            if full_name in self.taken:
+                return None
+            self.taken.add(full_name)
+        return name
+
+    def next_name(self) -> tuple:
+        """
+        :return: (first name, last name)
+        """
+        with self._lock:
+            while self.position < self.size:
+                name = self._advance()
+                if name is not None:
+                    return name
+        LOGGER.warning(f"All {self.size} names for gender {self.gender} and language {self.language} are used")
+        raise NamespaceExhausted(f"no unused names left for gender {self.gender} and language {self.language}")
+
+    def __iter__(self):
+        """
+        Iterate over the remaining names until the namespace is exhausted. Every step takes the lock, so iterating
+        can be mixed with next_name() and other iterators.
+        """
+        while True:
+            with self._lock:
+                name = None
+                while name is None and self.position < self.size:
+                    name = self._advance()
+            if name is None:
+                return
+            yield name
+
+    def take(self, count: int) -> list:
+        """
+        :param count: number of names
+        :return: list of (first name, last name)
+        """
+        return [self.next_name() for _ in range(count)]
+
+
+if __name__ == "__main__":
+    raise NotImplementedError(__file__)
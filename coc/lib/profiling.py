@@ -0,0 +1,254 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Optional
+
+from coc.core.generator import random_investigators
+from coc.lib.logger import LOGGER
+
+DETERMINISTIC = "deterministic"
+SAMPLING = "sampling"
+MODES = (DETERMINISTIC, SAMPLING)
+SAMPLE_INTERVAL = 0.001
+IDLE_FILES = ("/threading.py", "/queue.py", "/concurrent/futures/thread.py", "/concurrent/futures/_base.py")
+
+OTHER = "other"
+# stage, file name ending, qualified function name prefixes (None for any function). The first match counts.
+STAGE_RULES = (("logging", "/logging/__init__.py", None),
+               ("logging", "coc/lib/logger.py", None),
+               ("name lookup", "coc/lib/database.py", None),
+               ("name lookup", "coc/lib/catalogue.py", None),
+               ("name lookup", "coc/lib/names.py", None),
+               ("name lookup", "coc/lib/namemodel.py", None),
+               ("spread", "coc/core/roll.py", ("Roll.spread",)),
+               ("spread", "coc/core/investigator.py", ("Investigator.deduct",)),
+               ("parse", "coc/core/roll.py", ("Roll.__init__",)),
+               ("parse", "coc/core/dice.py", ("tokenize", "_Parser", "compile_expression", "Expression.__init__")),
+               ("roll", "coc/core/dice.py", None),
+               ("roll", "coc/core/roll.py", None),
+               ("roll", "/random.py", None),
+               ("age rules", "coc/core/investigator.py", ("Investigator.age_impact", "age_rule")),
+               ("derived stats", "coc/core/investigator.py", ("Investigator._get_derived",
+                                                             "Investigator.set_damage_bonus_and_build",
+                                                             "Investigator.set_movement")))
+STAGES = tuple(dict.fromkeys(stage for stage, _, _ in STAGE_RULES)) + (OTHER,)
+
+_labels = {}
+
+
+def _label(code) -> tuple:
+    """
+    Name and pipeline stage of a function
+    :param code: code object, or builtin function for C calls
+    :return: (label for stacks, stage or None if the function belongs to no stage)
+    """
+    ret = _labels.get(code)
+    if ret is None:
+        if hasattr(code, "co_filename"):
+            file_name = code.co_filename.replace(os.sep, "/")
+            name = getattr(code, "co_qualname", code.co_name)
+            module = os.path.splitext(os.path.basename(file_name))[0]
+            stage = None
+            for rule_stage, ending, prefixes in STAGE_RULES:
+                if file_name.endswith(ending) and (prefixes is None or name.startswith(prefixes)):
+                    stage = rule_stage
+                    break
+            ret = (f"{module}:{name}", stage)
+        else:
+            ret = (f"{getattr(code, '__module__', None) or 'builtins'}:{code.__name__}", None)
+        _labels[code] = ret
+    return ret
+
+
+class Profile:
+    """
+    Outcome of a profiling run: time per pipeline stage and per call stack. Time spent in a function without a
+    stage counts for the closest calling function with one.
+    """
+
+    def __init__(self, mode: str, elapsed: float, stages: dict, stacks: dict, samples: int = 0):
+        """
+        :param mode: DETERMINISTIC or SAMPLING
+        :param elapsed: wall clock seconds of the workload
+        :param stages: stage -> seconds (estimated from the samples when sampling)
+        :param stacks: tuple of frame labels, outermost first -> seconds
+        :param samples: number of samples taken
+        """
+        self.mode = mode
+        self.elapsed = elapsed
+        self.stages = stages
+        self.stacks = stacks
+        self.samples = samples
+
+    def summary(self) -> str:
+        """
+        :return: table of the time per stage
+        """
+        total = sum(self.stages.values()) or 1.0
+        lines = [f"{self.mode} profile, {self.elapsed:.3f}s elapsed"
+                 f"{f', {self.samples} samples' if self.mode == SAMPLING else ''}",
+                 f"{'stage':<16}{'seconds':>10}{'share':>8}"]
+        for stage in STAGES:
+            seconds = self.stages.get(stage, 0.0)
+            lines.append(f"{stage:<16}{seconds:>10.4f}{seconds / total:>8.1%}")
+        return "\n".join(lines) + "\n"
+
+    def write_collapsed(self, file_path) -> None:
+        """
+        Write the stacks in collapsed format ("outer;inner;leaf microseconds" per line) for flame graph tools
+        :param file_path: output file
+        """
+        with open(file_path, "w", encoding="utf-8") as output:
+            for stack, seconds in sorted(self.stacks.items()):
+                microseconds = round(seconds * 1e6)
+                if microseconds > 0:
+                    output.write(f"{';'.join(stack)} {microseconds}\n")
+
+
+class _Tracer:
+    """
+    sys.setprofile callback keeping its own call stack, charging the own time of every call to its stack and stage
+    """
+
+    def __init__(self):
+        self.stages = defaultdict(float)
+        self.stacks = defaultdict(float)
+        # per frame: [labels up to this frame, stage, start, time spent in callees]
+        self.frames = [[(), OTHER, 0.0, 0.0]]
+
+    def __call__(self, frame, event, arg):
+        now = time.perf_counter()
+        if event == "call" or event == "c_call":
+            label, stage = _label(frame.f_code if event == "call" else arg)
+            parent = self.frames[-1]
+            self.frames.append([parent[0] + (label,), stage or parent[1], now, 0.0])
+        elif len(self.frames) > 1:
+            labels, stage, start, callees = self.frames.pop()
+            elapsed = now - start
+            self.stages[stage] += elapsed - callees
+            self.stacks[labels] += elapsed - callees
+            self.frames[-1][3] += elapsed
+
+
+def _run_deterministic(workload: Callable) -> tuple:
+    tracer = _Tracer()
+    start = time.perf_counter()
+    sys.setprofile(tracer)
+    try:
+        result = workload()
+    finally:
+        sys.setprofile(None)
+    elapsed = time.perf_counter() - start
+    return result, Profile(DETERMINISTIC, elapsed, dict(tracer.stages), dict(tracer.stacks))
+
+
+def _stack(frame) -> tuple:
+    """
+    :param frame: innermost frame of a thread
+    :return: (frame labels outermost first, stage of the closest frame with one)
+    """
+    labels, stage = [], None
+    while frame is not None:
+        label, frame_stage = _label(frame.f_code)
+        labels.append(label)
+        if stage is None:
+            stage = frame_stage
+        frame = frame.f_back
+    labels.reverse()
+    return tuple(labels), stage or OTHER
+
+
+def _idle(frame) -> bool:
+    """
+    :param frame: innermost frame of a thread
+    :return: True if the thread waits in the threading or queue module
+    """
+    return frame.f_code.co_filename.replace(os.sep, "/").endswith(IDLE_FILES)
+
+
+def _run_sampling(workload: Callable, interval: float) -> tuple:
+    counts = defaultdict(int)
+    rounds = [0]
+    stop = threading.Event()
+
+    def sample():
+        sampler_id = threading.get_ident()
+        while not stop.wait(interval):
+            rounds[0] += 1
+            for thread_id, frame in sys._current_frames().items():
+                # threads blocked on a lock or queue are idle, not working on a stage
+                if thread_id != sampler_id and not _idle(frame):
+                    counts[_stack(frame)] += 1
+
+    sampler = threading.Thread(target=sample, name="coc-profiler", daemon=True)
+    start = time.perf_counter()
+    sampler.start()
+    try:
+        result = workload()
+    finally:
+        stop.set()
+        sampler.join()
+    elapsed = time.perf_counter() - start
+    samples = sum(counts.values())
+    # every round stands for the time between two rounds, for each thread that was busy
+    seconds = elapsed / rounds[0] if rounds[0] else 0.0
+    stages, stacks = defaultdict(float), defaultdict(float)
+    for (labels, stage), count in counts.items():
+        stages[stage] += count * seconds
+        stacks[labels] += count * seconds
+    return result, Profile(SAMPLING, elapsed, dict(stages), dict(stacks), samples)
+
+
+def profile(workload: Callable, mode: str = DETERMINISTIC, interval: float = SAMPLE_INTERVAL) -> tuple:
+    """
+    Run a workload under a profiler. The deterministic profiler traces every call of the calling thread, the
+    sampling profiler looks at the stacks of all threads every interval. Nothing is installed outside this call.
+    :param workload: function without arguments
+    :param mode: DETERMINISTIC or SAMPLING
+    :param interval: seconds between samples
+    :return: (result of the workload, Profile)
+    """
+    if mode == DETERMINISTIC:
+        return _run_deterministic(workload)
+    if mode == SAMPLING:
+        return _run_sampling(workload, interval)
+    raise ValueError(f"unknown profiling mode {mode}, use one of {', '.join(MODES)}")
+
+
+def profile_generation(count: int, mode: str = DETERMINISTIC, collapsed: Optional[str] = None, **kwargs) -> Profile:
+    """
+    Profile the generation of a number of investigators
+    :param count: number of investigators
+    :param mode: DETERMINISTIC or SAMPLING
+    :param collapsed: optional file to write the collapsed stacks to
+    :param kwargs: see generator.random_investigator
+    :return: Profile
+    """
+    _, result = profile(lambda: random_investigators(count, **kwargs), mode)
+    if collapsed is not None:
+        result.write_collapsed(collapsed)
+    LOGGER.info(f"Profiled generation of {count} investigators in {result.elapsed:.3f}s")
+    return result
+
+
+if __name__ == "__main__":
+    raise NotImplementedError(__file__)
@@ -0,0 +1,264 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+
+import math
+from collections import Counter
+from typing import Callable, Iterable, Optional
+
+from coc.lib.logger import LOGGER
+
+DEFAULT_ALPHA = 0.001
+CHUNK_SIZE = 65536
+
+
+class TestResult:
+    """
+    Outcome of a statistical test
+    """
+    __test__ = False  # not a unittest class
+
+    def __init__(self, name: str, statistic: float, p_value: float, samples: int, alpha: float = DEFAULT_ALPHA):
+        self.name = name
+        self.statistic = statistic
+        self.p_value = p_value
+        self.samples = samples
+        self.alpha = alpha
+
+    def __repr__(self):
+        return f"{self.name}: statistic={self.statistic:.4f} p={self.p_value:.4f} ({'PASS' if self.passed else 'FAIL'})"
+
+    @property
+    def passed(self) -> bool:
+        """
+        The test passes if the p-value is not below alpha
+        :return: True if the hypothesis of randomness is not rejected
+        """
+        return self.p_value >= self.alpha
+
+
+def _lower_gamma_series(s: float, x: float) -> float:
+    term = total = 1.0 / s
+    n = s
+    for _ in range(10000):
+        n += 1
+        term *= x / n
+        total += term
+        if abs(term) < abs(total) * 1e-15:
+            break
+    return total * math.exp(-x + s * math.log(x) - math.lgamma(s))
+
+
+def _upper_gamma_fraction(s: float, x: float) -> float:
+    # modified Lentz evaluation of the continued fraction
+    tiny = 1e-300
+    b = x + 1 - s
+    c = 1 / tiny
+    d = 1 / b
+    h = d
+    for i in range(1, 10000):
+        an = -i * (i - s)
+        b += 2
+        d = an * d + b
+        d = tiny if abs(d) < tiny else d
+        c = b + an / c
+        c = tiny if abs(c) < tiny else c
+        d = 1 / d
+        delta = d * c
+        h *= delta
+        if abs(delta - 1) < 1e-15:
+            break
+    return h * math.exp(-x + s * math.log(x) - math.lgamma(s))
+
+
+def chi2_sf(statistic: float, dof: int) -> float:
+    """
+    Survival function of the chi-square distribution
+    :param statistic: chi-square statistic
+    :param dof: degrees of freedom
+    :return: probability of a statistic at least this large
+    """
+    if dof < 1:
+        raise ValueError(f"degrees of freedom must be at least 1: {dof}")
+    if statistic <= 0:
+        return 1.0
+    s = dof / 2
+    x = statistic / 2
+    if x < s + 1:
+        return max(0.0, 1.0 - _lower_gamma_series(s, x))
+    return _upper_gamma_fraction(s, x)
+
+
+def chi_square(observed: Iterable[int], expected: Iterable[float]) -> (float, int, float):
+    """
+    Pearson chi-square goodness of fit
+    :param observed: observed counts per category
+    :param expected: expected counts per category
+    :return: statistic, degrees of freedom and p-value
+    """
+    observed = list(observed)
+    expected = list(expected)
+    if len(observed) != len(expected) or len(observed) < 2:
+        raise ValueError("observed and expected must have the same length of at least 2")
+    statistic = sum((o - e) ** 2 / e for o, e in zip(observed, expected))
+    dof = len(observed) - 1
+    return statistic, dof, chi2_sf(statistic, dof)
+
+
+def scalar_source(func: Callable[[], int]) -> Callable[[int], list]:
+    """
+    Turn a function that returns one value into a batch source
+    :param func: function without arguments, e.g. Die(6).value
+    :return: function that returns a list of n values
+    """
+    def batch(n: int) -> list:
+        return [func() for _ in range(n)]
+
+    return batch
+
+
+def _chunks(source: Callable[[int], list], samples: int):
+    remaining = samples
+    while remaining > 0:
+        n = min(CHUNK_SIZE, remaining)
+        remaining -= n
+        yield source(n)
+
+
+def uniformity_test(source: Callable[[int], list], sides: int, samples: int,
+                    alpha: float = DEFAULT_ALPHA) -> TestResult:
+    """
+    Chi-square test that the values 1..sides are equally likely
+    :param source: batch source, returns a list of n values between 1 and sides
+    :param sides: number of possible values
+    :param samples: number of samples to draw
+    :param alpha: significance level
+    :return: TestResult
+    """
+    counter = Counter()
+    for chunk in _chunks(source, samples):
+        counter.update(chunk)
+    unexpected = set(counter) - set(range(1, sides + 1))
+    if unexpected:
+        return TestResult(f"uniformity D{sides}", math.inf, 0.0, samples, alpha)
+    statistic, _, p_value = chi_square([counter[v] for v in range(1, sides + 1)], [samples / sides] * sides)
+    return TestResult(f"uniformity D{sides}", statistic, p_value, samples, alpha)
+
+
+def serial_test(source: Callable[[int], list], sides: int, samples: int, length: int = 2,
+                alpha: float = DEFAULT_ALPHA) -> TestResult:
+    """
+    Chi-square test on non overlapping n-grams: every sequence of length values must be equally likely
+    :param source: batch source, returns a list of n values between 1 and sides
+    :param sides: number of possible values
+    :param samples: number of values to draw, samples // length n-grams are counted
+    :param length: n-gram length
+    :param alpha: significance level
+    :return: TestResult
+    """
+    categories = sides ** length
+    counter = Counter()
+    carry = []
+    for chunk in _chunks(source, samples):
+        values = carry + chunk
+        usable = len(values) - len(values) % length
+        carry = values[usable:]
+        codes = [0] * (usable // length)
+        for offset in range(length):
+            codes = [code * sides + value - 1 for code, value in zip(codes, values[offset:usable:length])]
+        counter.update(codes)
+    grams = sum(counter.values())
+    statistic, _, p_value = chi_square([counter[code] for code in range(categories)], [grams / categories] * categories)
+    return TestResult(f"serial D{sides} n={length}", statistic, p_value, samples, alpha)
+
+
+def runs_test(source: Callable[[int], list], samples: int, alpha: float = DEFAULT_ALPHA,
+              center: Optional[float] = None) -> TestResult:
+    """
+    Wald-Wolfowitz runs test: values above and below the center must not cluster.
+    Values equal to the center are skipped.
+    :param source: batch source
+    :param samples: number of values to draw
+    :param alpha: significance level
+    :param center: threshold, if missing the mean of the first chunk is used
+    :return: TestResult
+    """
+    above = below = runs = 0
+    previous = None
+    for chunk in _chunks(source, samples):
+        if center is None:
+            center = sum(chunk) / len(chunk)
+        signs = [value > center for value in chunk if value != center]
+        if not signs:
+            continue
+        ups = sum(signs)
+        above += ups
+        below += len(signs) - ups
+        runs += sum(1 for a, b in zip(signs, signs[1:]) if a != b)
+        runs += 1 if previous is None or previous != signs[0] else 0
+        previous = signs[-1]
+    n = above + below
+    if above == 0 or below == 0:
+        return TestResult("runs", math.inf, 0.0, samples, alpha)
+    mean = 2 * above * below / n + 1
+    variance = (mean - 1) * (mean - 2) / (n - 1)
+    z = (runs - mean) / math.sqrt(variance)
+    return TestResult("runs", z, math.erfc(abs(z) / math.sqrt(2)), samples, alpha)
+
+
+def spread_test(spread: Callable[[int, int], list], value: int, size: int, calls: int,
+                alpha: float = DEFAULT_ALPHA) -> TestResult:
+    """
+    Chi-square test that a spread function distributes every point to a uniformly chosen bucket
+    :param spread: function like Roll.spread
+    :param value: value to spread per call
+    :param size: number of buckets
+    :param calls: number of calls
+    :param alpha: significance level
+    :return: TestResult
+    """
+    totals = [0] * size
+    for _ in range(calls):
+        for i, bucket in enumerate(spread(value, size)):
+            totals[i] += bucket
+    points = abs(value) * calls
+    totals = [abs(total) for total in totals]
+    if sum(totals) != points:
+        return TestResult(f"spread {value}/{size}", math.inf, 0.0, points, alpha)
+    statistic, _, p_value = chi_square(totals, [points / size] * size)
+    return TestResult(f"spread {value}/{size}", statistic, p_value, points, alpha)
+
+
+def validate(source: Callable[[int], list], sides: int, samples: int, alpha: float = DEFAULT_ALPHA) -> list:
+    """
+    Run the uniformity, serial and runs tests on a source
+    :param source: batch source, returns a list of n values between 1 and sides
+    :param sides: number of possible values
+    :param samples: samples per test
+    :param alpha: significance level
+    :return: list of TestResult
+    """
+    results = [uniformity_test(source, sides, samples, alpha),
+               serial_test(source, sides, samples, 2, alpha),
+               runs_test(source, samples, alpha, center=(sides + 1) / 2)]
+    for result in results:
+        LOGGER.info(result)
+    return results
+
+
+if __name__ == "__main__":
+    raise NotImplementedError(__file__)
@@ -0,0 +1,230 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+import functools
+import html
+from string import Formatter
+from typing import Callable, Optional
+
+from coc.core.gender import Gender, NOUN, PERSONAL_PRONOUN, POSSESSIVE_PRONOUN, OBJECT_PRONOUN, VERB_BE
+from coc.core.investigator import Investigator, CHARACTERISTICS
+from coc.lib.logger import LOGGER
+
+TEXT = "text"
+MARKDOWN = "markdown"
+HTML = "html"
+
+# sheets are written to the file in chunks of this many
+WRITE_BATCH = 256
+
+_MARKDOWN_ESCAPE = str.maketrans({character: "\\" + character for character in "\\`*_{}[]<>#|!"})
+
+ESCAPES = {TEXT: None,
+           MARKDOWN: lambda text: text.translate(_MARKDOWN_ESCAPE),
+           HTML: html.escape}
+
+# field -> (value of an investigator, True if the value is text that has to be escaped)
+FIELDS = dict({code: (lambda investigator, code=code: investigator.chars[code].regular, False)
+               for code, _, _, _ in CHARACTERISTICS},
+              **{"firstname": (lambda investigator: investigator.firstname, True),
+                 "surname": (lambda investigator: investigator.surname, True),
+                 "name": (lambda investigator: f"{investigator.firstname} {investigator.surname}", True),
+                 "age": (lambda investigator: investigator.age, False),
+                 "occupation": (lambda investigator: investigator.occupation, True),
+                 "birthplace": (lambda investigator: investigator.birthplace, True),
+                 "residence": (lambda investigator: investigator.residence, True),
+                 "HP": (lambda investigator: investigator.hit_max, False),
+                 "MOV": (lambda investigator: investigator.movement, False),
+                 "BUILD": (lambda investigator: investigator.build, False),
+                 "DB": (lambda investigator: investigator.damage_bonus, True),
+                 "SAN": (lambda investigator: investigator.sanity.regular, False)})
+
+# field -> gender table, replaced by text when the template is compiled. Capitalized fields give capitalized text.
+PRONOUNS = {"person": NOUN,
+            "he": PERSONAL_PRONOUN,
+            "his": POSSESSIVE_PRONOUN,
+            "him": OBJECT_PRONOUN,
+            "is": VERB_BE}
+
+SHEETS = {TEXT: """{name}, {age}, {occupation}
+{He} {is} a {person} born in {birthplace}, living in {residence}.
+STR {STR:>3}  CON {CON:>3}  SIZ {SIZ:>3}  DEX {DEX:>3}  APP {APP:>3}
+INT {INT:>3}  POW {POW:>3}  EDU {EDU:>3}  Luck {LUCK:>3}
+HP {HP:>3}  MOV {MOV:>2}  Build {BUILD:>2}  DB {DB}  SAN {SAN:>3}
+""",
+          MARKDOWN: """## {name}
+
+*{occupation}, {age}.* {He} {is} a {person} born in {birthplace}, living in {residence}.
+
+| STR | CON | SIZ | DEX | APP | INT | POW | EDU | Luck |
+|-----|-----|-----|-----|-----|-----|-----|-----|------|
+| {STR} | {CON} | {SIZ} | {DEX} | {APP} | {INT} | {POW} | {EDU} | {LUCK} |
+
+HP {HP} · MOV {MOV} · Build {BUILD} · DB {DB} · SAN {SAN}
+""",
+          HTML: """<section class="investigator">
+<h2>{name}</h2>
+<p><em>{occupation}, {age}.</em> {He} {is} a {person} born in {birthplace}, living in {residence}.</p>
+<table>
+<tr><th>STR</th><th>CON</th><th>SIZ</th><th>DEX</th><th>APP</th><th>INT</th><th>POW</th><th>EDU</th><th>Luck</th></tr>
+<tr><td>{STR}</td><td>{CON}</td><td>{SIZ}</td><td>{DEX}</td><td>{APP}</td><td>{INT}</td><td>{POW}</td><td>{EDU}</td><td>{LUCK}</td></tr>
+</table>
+<p>HP {HP} · MOV {MOV} · Build {BUILD} · DB {DB} · SAN {SAN}</p>
+</section>
+"""}
+
+DOCUMENTS = {TEXT: ("", ""),
+             MARKDOWN: ("# Investigators\n\n", ""),
+             HTML: ("<!DOCTYPE html>\n<html>\n<head><meta charset=\"utf-8\"><title>Investigators</title></head>\n"
+                    "<body>\n", "</body>\n</html>\n")}
+
+
+def _pronoun(field: str, gender: Gender) -> Optional[str]:
+    """
+    :param field: template field, e.g. he or His
+    :param gender: gender to resolve the field for
+    :return: the pronoun or noun, None if the field is no pronoun
+    """
+    table = PRONOUNS.get(field.lower())
+    if table is None:
+        return None
+    text = table[gender]
+    return text.capitalize() if field[0].isupper() else text
+
+
+def _getter(field: str, escape: Optional[Callable[[str], str]]) -> Callable:
+    """
+    :param field: template field
+    :param escape: escape function for text values, None for none
+    :return: function returning the (escaped) value of the field of an investigator
+    """
+    if field not in FIELDS:
+        raise ValueError(f"unknown field {field}, use one of {', '.join(list(FIELDS) + list(PRONOUNS))}")
+    value_of, is_text = FIELDS[field]
+    if escape is None or not is_text:
+        return value_of
+    return lambda investigator: escape(value_of(investigator))
+
+
+class Template:
+    """
+    Character sheet template using str.format fields, e.g. "{name} ({age}): STR {STR:>3}". The pronoun fields
+    he, his, him, person and the verb is (capitalized for capitalized text) are resolved for every gender when the
+    template is compiled, so rendering is one str.format call on the remaining fields.
+    """
+
+    def __init__(self, source: str, kind: str = TEXT):
+        """
+        :param source: template text
+        :param kind: TEXT, MARKDOWN or HTML, determines how text values are escaped
+        """
+        if kind not in ESCAPES:
+            raise ValueError(f"unknown template kind {kind}, use one of {', '.join(ESCAPES)}")
+        self.source = source
+        self.kind = kind
+        escape = ESCAPES[kind]
+        parsed = list(Formatter().parse(source))
+        self._compiled = {gender: self._compile(parsed, gender, escape) for gender in Gender}
+
+    @staticmethod
+    def _compile(parsed: list, gender: Gender, escape) -> tuple:
+        """
+        Fold the pronouns for a gender into the literal text and number the remaining fields
+        :param parsed: output of Formatter.parse
+        :param gender: gender
+        :param escape: escape function for text values
+        :return: (format string with positional fields, tuple of getters)
+        """
+        parts, getters = [], []
+        for literal, field, spec, conversion in parsed:
+            parts.append(literal.replace("{", "{{").replace("}", "}}"))
+            if field is None:
+                continue
+            pronoun = _pronoun(field, gender)
+            if pronoun is not None:
+                parts.append(pronoun.replace("{", "{{").replace("}", "}}"))
+                continue
+            getters.append(_getter(field, escape))
+            parts.append("{" + str(len(getters) - 1) + ("!" + conversion if conversion else "") +
+                         (":" + spec if spec else "") + "}")
+        return "".join(parts), tuple(getters)
+
+    def render(self, investigator: Investigator) -> str:
+        """
+        :param investigator: Investigator
+        :return: the sheet of the investigator
+        """
+        text, getters = self._compiled[investigator.gender]
+        return text.format(*[getter(investigator) for getter in getters])
+
+    def render_many(self, investigators):
+        """
+        :param investigators: iterable of Investigator
+        :return: generator of sheets
+        """
+        compiled = self._compiled
+        for investigator in investigators:
+            text, getters = compiled[investigator.gender]
+            yield text.format(*[getter(investigator) for getter in getters])
+
+
+@functools.lru_cache(maxsize=64)
+def compile_template(source: str, kind: str = TEXT) -> Template:
+    """
+    Compile a template once
+    :param source: template text
+    :param kind: TEXT, MARKDOWN or HTML
+    :return: Template
+    """
+    return Template(source, kind)
+
+
+def write_sheets(investigators, file, kind: str = TEXT, source: Optional[str] = None,
+                 separator: Optional[str] = None) -> int:
+    """
+    Render the sheets of a stream of investigators into a file, without keeping them in memory
+    :param investigators: iterable of Investigator, e.g. a generator
+    :param file: file path or writable text file
+    :param kind: TEXT, MARKDOWN or HTML
+    :param source: template text, by default the standard sheet of the kind
+    :param separator: text between sheets, by default a blank line
+    :return: number of sheets written
+    """
+    template = compile_template(SHEETS[kind] if source is None else source, kind)
+    header, footer = DOCUMENTS[kind]
+    separator = "\n" if separator is None else separator
+    if isinstance(file, str) or hasattr(file, "__fspath__"):
+        with open(file, 'w', encoding='utf-8') as output:
+            return write_sheets(investigators, output, kind, source, separator)
+    file.write(header)
+    count = 0
+    batch = []
+    for sheet in template.render_many(investigators):
+        batch.append(sheet)
+        count += 1
+        if len(batch) >= WRITE_BATCH:
+            file.write(separator.join(batch) + separator)
+            batch.clear()
+    if batch:
+        file.write(separator.join(batch) + separator)
+    file.write(footer)
+    LOGGER.info(f"Wrote {count} {kind} sheets")
+    return count
+
+
+if __name__ == "__main__":
+    raise NotImplementedError(__file__)
@@ -0,0 +1,113 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+import sys
+import threading
+from typing import Optional
+
+
+class SymbolTable:
+    """
+    Append-only table of interned strings. Every string gets a small integer ID once and keeps it for the life of
+    the process, so objects can store the shared ID instead of their own string and compare or group on integers.
+    """
+
+    def __init__(self, name: str):
+        """
+        :param name: what the strings are, for messages
+        """
+        self.name = name
+        self._ids = {}
+        self._strings = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._strings)
+
+    def __contains__(self, text: str) -> bool:
+        return text in self._ids
+
+    def __getitem__(self, symbol: int) -> str:
+        """
+        :param symbol: ID
+        :return: the string of the ID
+        """
+        return self._strings[symbol]
+
+    def intern(self, text: str) -> int:
+        """
+        :param text: string
+        :return: ID of the string, added to the table if it is new
+        """
+        ret = self._ids.get(text)
+        if ret is None:
+            with self._lock:
+                ret = self._ids.get(text)
+                if ret is None:
+                    ret = len(self._strings)
+                    self._strings.append(sys.intern(text))
+                    self._ids[text] = ret
+        return ret
+
+    def find(self, text: str) -> Optional[int]:
+        """
+        :param text: string
+        :return: ID of the string, None if it was never interned
+        """
+        return self._ids.get(text)
+
+
+NAMES = SymbolTable("names")
+OCCUPATIONS = SymbolTable("occupations")
+PLACES = SymbolTable("places")
+
+
+class Interned:
+    """
+    Descriptor for a text attribute stored as the ID of a SymbolTable and resolved to the string on access.
+    None is stored as is.
+    """
+
+    def __init__(self, table: SymbolTable):
+        """
+        :param table: SymbolTable of the attribute
+        """
+        self.table = table
+        self.slot = None
+
+    def __set_name__(self, owner, name: str):
+        self.slot = f"_{name}_id"
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        symbol = getattr(instance, self.slot)
+        return None if symbol is None else self.table[symbol]
+
+    def __set__(self, instance, value: Optional[str]):
+        setattr(instance, self.slot, None if value is None else self.table.intern(value))
+
+    def symbol(self, instance) -> Optional[int]:
+        """
+        :param instance: object holding the attribute
+        :return: ID of its value, None if the value is None
+        """
+        return getattr(instance, self.slot)
+
+
+if __name__ == "__main__":
+    raise NotImplementedError(__file__)
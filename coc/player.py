@@ -16,6 +16,300 @@
 
 """
 
+import json
+import os
+import re
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Optional
 
-if __name__ == "__name__":
+from coc.core.investigator import Investigator
+from coc.lib.logger import LOGGER
+
+CAPACITY = 256
+PLAYERS_FILE = "players.json"
+KEY_PATTERN = re.compile(r"^[A-Za-z0-9_-]+$")
+
+
+def _check_key(key: str) -> str:
+    if not isinstance(key, str) or not KEY_PATTERN.match(key):
+        raise ValueError(f"Invalid key {key!r}: only letters, digits, _ and - are allowed")
+    return key
+
+
+class InvestigatorStore:
+    """
+    Local store: one JSON file per investigator plus one file mapping players to their investigators
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{_check_key(key)}.json")
+
+    def load(self, key: str) -> Optional[dict]:
+        """
+        :param key: investigator key
+        :return: investigator record or None if unknown
+        """
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as source:
+                return json.load(source)
+        except FileNotFoundError:
+            return None
+
+    def save(self, key: str, record: dict) -> None:
+        """
+        Write an investigator record. The file is replaced atomically.
+        :param key: investigator key
+        :param record: investigator record
+        """
+        self._write(self._path(key), record)
+
+    def load_players(self) -> dict:
+        """
+        :return: player name -> list of investigator keys
+        """
+        try:
+            with open(os.path.join(self.directory, PLAYERS_FILE), "r", encoding="utf-8") as source:
+                return json.load(source)
+        except FileNotFoundError:
+            return {}
+
+    def save_players(self, players: dict) -> None:
+        """
+        :param players: player name -> list of investigator keys
+        """
+        self._write(os.path.join(self.directory, PLAYERS_FILE), players)
+
+    @staticmethod
+    def _write(file_path: str, data) -> None:
+        temporary = f"{file_path}.{threading.get_ident()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as out:
+            json.dump(data, out, separators=(",", ":"))
+        os.replace(temporary, file_path)
+
+
+class _Entry:
+    __slots__ = ("investigator", "size", "dirty")
+
+    def __init__(self, investigator: Investigator, size: int, dirty: bool):
+        self.investigator = investigator
+        self.size = size
+        self.dirty = dirty
+
+
+class PlayerRegistry:
+    """
+    Maps players to their investigators. Active investigators are kept in a bounded LRU cache, evicted ones
+    are written back to the store when they were changed, cold ones are loaded lazily. Thread safe: the store is
+    written after the cache lock is released, so a slow disk does not block lookups of other investigators.
+    """
+
+    def __init__(self, store: InvestigatorStore, capacity: int = CAPACITY, max_bytes: Optional[int] = None):
+        """
+        :param store: InvestigatorStore
+        :param capacity: maximum number of cached investigators
+        :param max_bytes: maximum total size of the cached investigators, measured as serialized JSON
+        """
+        if capacity < 1:
+            raise ValueError(f"capacity must be at least 1: {capacity}")
+        self.store = store
+        self.capacity = capacity
+        self.max_bytes = max_bytes
+        self._lock = threading.RLock()
+        # held by the one thread writing to the store, taken before the cache lock when both are needed
+        self._io_lock = threading.Lock()
+        self._cache = OrderedDict()
+        # key -> record of changed investigators evicted or flushed but not written yet
+        self._writing = {}
+        self._bytes = 0
+        self._players = store.load_players()
+        self._owners = {key: player for player, keys in self._players.items() for key in keys}
+        self._players_dirty = False
+        self.hits = 0
+        self.misses = 0
+
+    def __repr__(self):
+        return f"PlayerRegistry({len(self._players)} players, {len(self._cache)} cached, {self._bytes} bytes)"
+
+    @staticmethod
+    def _size(investigator: Investigator) -> int:
+        return len(json.dumps(investigator.as_dict(), separators=(",", ":")))
+
+    def players(self) -> list:
+        """
+        :return: names of all players
+        """
+        with self._lock:
+            return list(self._players)
+
+    def investigators(self, player: str) -> list:
+        """
+        :param player: player name
+        :return: keys of the investigators of the player
+        """
+        with self._lock:
+            return list(self._players.get(player, []))
+
+    def add_investigator(self, player: str, investigator: Investigator, key: Optional[str] = None) -> str:
+        """
+        Register an investigator for a player. The player is created if needed.
+        :param player: player name
+        :param investigator: Investigator
+        :param key: investigator key, generated if missing
+        :return: key
+        """
+        key = uuid.uuid4().hex if key is None else _check_key(key)
+        with self._lock:
+            if key in self._owners:
+                raise KeyError(f"Investigator {key} already exists")
+            self._players.setdefault(player, []).append(key)
+            self._owners[key] = player
+            self._players_dirty = True
+            self._insert(key, investigator, dirty=True)
+        self._write_back()
+        return key
+
+    def get(self, key: str, for_update: bool = False) -> Investigator:
+        """
+        Get an investigator, from the cache or else from the store
+        :param key: investigator key
+        :param for_update: mark the investigator as changed, so it is written back on eviction or flush
+        :return: Investigator
+        """
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+                entry.dirty = entry.dirty or for_update
+                self.hits += 1
+                return entry.investigator
+            self.misses += 1
+            record = self._writing.get(key)
+        if record is None:
+            record = self.store.load(key)
+        if record is None:
+            raise KeyError(f"Unknown investigator {key}")
+        investigator = Investigator.from_dict(record)
+        with self._lock:
+            # another thread may have loaded it in the meantime
+            entry = self._cache.get(key)
+            if entry is not None:
+                self._cache.move_to_end(key)
+                entry.dirty = entry.dirty or for_update
+                return entry.investigator
+            self._insert(key, investigator, dirty=for_update)
+        self._write_back()
+        return investigator
+
+    def mark_dirty(self, key: str) -> None:
+        """
+        Register that a cached investigator was changed
+        :param key: investigator key
+        """
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry is None:
+                raise KeyError(f"Investigator {key} is not cached")
+            self._bytes -= entry.size
+            entry.size = self._size(entry.investigator)
+            self._bytes += entry.size
+            entry.dirty = True
+            self._evict()
+        self._write_back()
+
+    def flush(self) -> None:
+        """
+        Write all changed investigators and the player index to the store
+        """
+        with self._lock:
+            for key, entry in self._cache.items():
+                if entry.dirty:
+                    self._writing[key] = entry.investigator.as_dict()
+                    entry.dirty = False
+        self._write_back(wait=True)
+
+    def owner(self, key: str) -> Optional[str]:
+        """
+        :param key: investigator key
+        :return: name of the player owning the investigator, None if unknown
+        """
+        with self._lock:
+            return self._owners.get(key)
+
+    def _write_back(self, wait: bool = False) -> None:
+        """
+        Write the pending investigators to the store, preceded by the player index when it changed. Must be called
+        without holding the cache lock. While another thread is writing, its loop picks up the records queued here.
+        :param wait: block until everything is written, also when another thread is writing, and write a changed
+        player index even without pending investigators
+        """
+        while True:
+            if not self._io_lock.acquire(blocking=wait):
+                return
+            try:
+                self._drain(wait)
+            finally:
+                self._io_lock.release()
+            with self._lock:
+                # records queued after the last check of the drain loop, but before the lock was released
+                if not self._pending(wait):
+                    return
+
+    def _pending(self, players: bool) -> bool:
+        """
+        :param players: count a changed player index as pending
+        :return: True if there is something to write
+        """
+        return bool(self._writing) or (players and self._players_dirty)
+
+    def _drain(self, players: bool) -> None:
+        """
+        Write until nothing is pending, holding the I/O lock
+        :param players: write a changed player index even without pending investigators
+        """
+        while True:
+            with self._lock:
+                if not self._pending(players):
+                    return
+                pending = dict(self._writing)
+                index = {player: list(keys) for player, keys in self._players.items()} \
+                    if self._players_dirty else None
+                self._players_dirty = False
+            if index is not None:
+                try:
+                    self.store.save_players(index)
+                except Exception:
+                    with self._lock:
+                        self._players_dirty = True
+                    raise
+            for key, record in pending.items():
+                LOGGER.debug(f"Writing back investigator {key}")
+                self.store.save(key, record)
+            with self._lock:
+                for key, record in pending.items():
+                    # a newer record of the same investigator may have been queued in the meantime
+                    if self._writing.get(key) is record:
+                        del self._writing[key]
+
+    def _insert(self, key: str, investigator: Investigator, dirty: bool) -> None:
+        entry = _Entry(investigator, self._size(investigator), dirty)
+        self._cache[key] = entry
+        self._bytes += entry.size
+        self._evict()
+
+    def _evict(self) -> None:
+        while len(self._cache) > 1 and (len(self._cache) > self.capacity or
+                                        (self.max_bytes is not None and self._bytes > self.max_bytes)):
+            key, entry = self._cache.popitem(last=False)
+            self._bytes -= entry.size
+            if entry.dirty:
+                self._writing[key] = entry.investigator.as_dict()
+
+
+if __name__ == "__main__":
     raise NotImplementedError(__file__)
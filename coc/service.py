@@ -0,0 +1,228 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+
+import asyncio
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, Optional
+
+from coc.core.gender import Gender
+from coc.core.generator import random_investigators
+from coc.core.roll import Roll
+from coc.lib import database, metrics
+from coc.lib.logger import LOGGER
+
+MAX_BATCH = 256
+MAX_DELAY = 0.002
+
+
+def _roll_batch(expression: str, count: int) -> list:
+    return Roll(expression).roll_many(count)
+
+
+def _generate_batch(key: tuple, count: int) -> list:
+    return random_investigators(count, **dict(key))
+
+
+def _first_name_batch(key: tuple, count: int) -> list:
+    gender, language = key
+    return [database.get_first_name(gender=gender, language=language) for _ in range(count)]
+
+
+def _last_name_batch(language: Optional[str], count: int) -> list:
+    return [database.get_last_name(language=language) for _ in range(count)]
+
+
+def _run_batch(handler: Callable[[object, int], list], requests: list) -> list:
+    """
+    Run a batch of grouped requests. Runs in the executor.
+    :param handler: function(key, count) returning count results
+    :param requests: list of (key, count)
+    :return: list of (exception or None, results) in the same order as requests
+    """
+    ret = []
+    for key, count in requests:
+        try:
+            ret.append((None, handler(key, count)))
+        except Exception as e:
+            ret.append((e, None))
+    return ret
+
+
+class _Batcher:
+    """
+    Collects concurrent requests of one kind and hands them to the executor as one batch,
+    either when max_batch results are asked for or max_delay seconds after the first request arrived.
+    """
+
+    def __init__(self, name: str, handler: Callable[[object, int], list], service):
+        self.name = name
+        self.handler = handler
+        self.service = service
+        self.pending = []
+        self.weight = 0
+        self.timer = None
+
+    def submit(self, key, count: Optional[int] = None) -> asyncio.Future:
+        """
+        :param key: request key passed to the handler
+        :param count: number of results as one request, None for a single result
+        :return: future of the result, or of the list of count results
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.pending.append((key, count, future))
+        self.weight += 1 if count is None else count
+        if self.weight >= self.service.max_batch:
+            self.flush()
+        elif self.timer is None:
+            self.timer = loop.call_later(self.service.max_delay, self.flush)
+        return future
+
+    def flush(self) -> None:
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        if not self.pending:
+            return
+        groups = {}
+        for key, count, future in self.pending:
+            groups.setdefault(key, []).append((count, future))
+        self.pending = []
+        self.weight = 0
+        metrics.record(f"service.{self.name}.batches")
+        metrics.record(f"service.{self.name}.requests", count=sum(len(futures) for futures in groups.values()))
+        task = asyncio.get_running_loop().create_task(self._run(groups))
+        self.service.tasks.add(task)
+        task.add_done_callback(self.service.tasks.discard)
+
+    async def _run(self, groups: dict) -> None:
+        requests = [(key, sum(1 if count is None else count for count, _ in futures))
+                    for key, futures in groups.items()]
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(self.service.executor, _run_batch,
+                                                                       self.handler, requests)
+        except Exception as e:
+            LOGGER.error(f"Batch {self.name} failed => {e}")
+            results = [(e, None)] * len(requests)
+        for futures, (error, values) in zip(groups.values(), results):
+            start = 0
+            for count, future in futures:
+                end = start + (1 if count is None else count)
+                if future.done():
+                    pass
+                elif error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(values[start] if count is None else values[start:end])
+                start = end
+
+
+class Service:
+    """
+    Asynchronous front for rolls, investigator generation and name lookups.
+    Concurrent requests are coalesced in micro batches that run in an executor, so the event loop stays responsive.
+    The batch functions are module level, so a ProcessPoolExecutor can be used as well.
+
+        async with Service() as service:
+            value, investigator = await asyncio.gather(service.roll("D100b1"), service.generate(language="NL"))
+    """
+
+    def __init__(self, executor: Optional[Executor] = None, max_batch: int = MAX_BATCH, max_delay: float = MAX_DELAY):
+        if max_batch < 1:
+            raise ValueError(f"max_batch must be at least 1: {max_batch}")
+        self._own_executor = executor is None
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="coc-service") if executor is None \
+            else executor
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.tasks = set()
+        self._rolls = _Batcher("roll", _roll_batch, self)
+        self._investigators = _Batcher("generate", _generate_batch, self)
+        self._first_names = _Batcher("first_name", _first_name_batch, self)
+        self._last_names = _Batcher("last_name", _last_name_batch, self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def roll(self, expression: str) -> int:
+        """
+        Roll a dice expression
+        :param expression: dice expression, e.g. 3D6*5
+        :return: result
+        """
+        return await self._rolls.submit(expression)
+
+    async def roll_many(self, expression: str, count: int) -> list:
+        """
+        Roll a dice expression a number of times
+        :param expression: dice expression
+        :param count: number of rolls
+        :return: list of results
+        """
+        if count < 1:
+            return []
+        return await self._rolls.submit(expression, count)
+
+    async def generate(self, **kwargs):
+        """
+        Generate an investigator
+        :param kwargs: see coc.core.generator.random_investigator
+        :return: Investigator
+        """
+        return await self._investigators.submit(tuple(sorted(kwargs.items())))
+
+    async def first_name(self, gender: Optional[Gender] = None, language: Optional[str] = None) -> str:
+        """
+        Get a random first name
+        :param gender: selection criterium 1
+        :param language: selection criterium 2
+        :return: str
+        """
+        return await self._first_names.submit((gender, language))
+
+    async def last_name(self, language: Optional[str] = None) -> str:
+        """
+        Get a random last name
+        :param language: selection criterium
+        :return: str
+        """
+        return await self._last_names.submit(language)
+
+    async def flush(self) -> None:
+        """
+        Start all pending batches and wait until every batch is done
+        """
+        for batcher in (self._rolls, self._investigators, self._first_names, self._last_names):
+            batcher.flush()
+        while self.tasks:
+            await asyncio.gather(*list(self.tasks))
+
+    async def close(self) -> None:
+        """
+        Finish outstanding requests and release the executor if the service created it
+        """
+        await self.flush()
+        if self._own_executor:
+            self.executor.shutdown(wait=True)
+
+
+if __name__ == "__main__":
+    raise NotImplementedError(__file__)
@@ -15,6 +15,28 @@
     along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 """
+import random
+import unittest
+
+from coc.core import roll
+from coc.lib.logger import LOGGER
+
+
+def isolate(test: unittest.TestCase, level: str = "WARNING", seed=None) -> None:
+    """
+    Quiet the logger for one test and optionally seed the random generators. The logger level and the state of the
+    random module are restored when the test ends, so they do not leak into other tests.
+    :param test: test case, from its setUp
+    :param level: logger level during the test
+    :param seed: seed for roll.seed, None to keep the random state
+    """
+    test.addCleanup(LOGGER.setLevel, LOGGER.level)
+    LOGGER.setLevel(level)
+    test.addCleanup(random.setstate, random.getstate())
+    if seed is not None:
+        test.addCleanup(roll.seed)
+        roll.seed(seed)
+
 
 if __name__ == "__name__":
     raise NotImplementedError()
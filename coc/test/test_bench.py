@@ -0,0 +1,48 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+
+import json
+import random
+import unittest
+
+from coc.bench.suite import Benchmark, default_benchmarks, run_benchmarks
+
+
+class BenchTestCase(unittest.TestCase):
+    def test_run_benchmarks(self):
+        report = run_benchmarks(scale=0.001, repeat=1, name_filter="roll")
+        names = [result["name"] for result in report["results"]]
+        self.assertIn("roll.parse", names)
+        self.assertNotIn("investigator.create", names)
+        for result in report["results"]:
+            self.assertGreaterEqual(result["number"], 1)
+            self.assertGreater(result["best_s"], 0)
+        # report must be machine readable
+        self.assertEqual(report, json.loads(json.dumps(report)))
+
+    def test_reproducible(self):
+        values = []
+        benchmark = Benchmark("collect", lambda: values.append(random.random()), 3)
+        benchmark.run(seed=1, repeat=1)
+        # one timed repetition plus one allocation run, both seeded identically
+        self.assertEqual(6, len(values))
+        self.assertEqual(values[:3], values[3:])
+        self.assertTrue(len(default_benchmarks()) > 5)
+
+if __name__ == '__main__':
+    unittest.main()
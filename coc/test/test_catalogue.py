@@ -0,0 +1,144 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+import os
+import tempfile
+import time
+import unittest
+from collections import Counter
+from pathlib import Path
+from unittest import mock
+
+from coc import config
+from coc.core.gender import Gender
+from coc.core.generator import random_investigator
+from coc.core.rules import Era
+from coc.lib import database
+from coc.lib.catalogue import AliasTable, CatalogueManager, catalogues, set_data_directory
+from coc.test import isolate
+
+
+def _write(path: Path, text: str, tick: int) -> None:
+    path.write_text(text, encoding='utf-8')
+    # make sure the modification time changes, whatever the resolution of the file system
+    os.utime(path, ns=(tick * 10 ** 9, tick * 10 ** 9))
+
+
+class TestCatalogue(unittest.TestCase):
+
+    def setUp(self):
+        isolate(self, "ERROR")
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = Path(self.directory.name) / "first_names.csv"
+        _write(self.path, "first_name:gender:lang\nAnna:F:NL\nPiet:M:NL\nJohn:M:EN\n", 1)
+
+    def tearDown(self):
+        set_data_directory(config.DIR_DATA)
+        self.directory.cleanup()
+
+    def test_select(self):
+        catalogue = CatalogueManager(self.directory.name).get("first_names.csv")
+        self.assertEqual(("FIRST_NAME", "GENDER", "LANG"), catalogue.headers)
+        self.assertEqual((("Piet", "M", "NL"),), catalogue.select(gender="M", lang="NL"))
+        self.assertEqual(3, len(catalogue.select(lang=None)))
+        self.assertEqual((), catalogue.select(lang="DA"))
+        self.assertEqual([("John", "M", "EN")], catalogue.query("lang = 'EN'"))
+        with self.assertRaises(KeyError):
+            catalogue.select(era="Modern")
+
+    def test_refresh(self):
+        manager = CatalogueManager(self.directory.name)
+        old = manager.get("first_names.csv")
+        self.assertEqual([], manager.refresh())
+        _write(self.path, "first_name:gender:lang\nMies:F:NL\n", 2)
+        self.assertEqual([self.path.resolve()], manager.refresh())
+        new = manager.get("first_names.csv")
+        self.assertEqual((("Mies", "F", "NL"),), new.rows)
+        # readers holding the old version keep a complete table
+        self.assertEqual(3, len(old.rows))
+
+    def test_default_manager_watches(self):
+        with mock.patch("coc.lib.catalogue._manager", None):
+            manager = catalogues()
+            self.addCleanup(manager.stop)
+            self.assertEqual(config.DIR_DATA, manager.directory)
+            self.assertTrue(manager._thread.is_alive())
+
+    def test_watcher(self):
+        manager = set_data_directory(self.directory.name, watch=0.01)
+        self.assertEqual("Anna", database.get_first_name(gender=Gender.FEMALE))
+        _write(self.path, "first_name:gender:lang\nMies:F:NL\n", 3)
+        deadline = time.time() + 5
+        while manager.get("first_names.csv").rows[0][0] != "Mies" and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertEqual("Mies", database.get_first_name(gender=Gender.FEMALE))
+
+    def test_weighted_names(self):
+        _write(self.path, "first_name:gender:lang:weight\nAnna:F:NL:1\nMies:F:NL:3\nPiet:M:NL:\nJohn:M:EN:996\n", 4)
+        catalogue = CatalogueManager(self.directory.name).get("first_names.csv")
+        sampler = catalogue.sampler(lang="NL")
+        self.assertIs(sampler, catalogue.sampler(lang="NL", gender=None))
+        counts = Counter(row[0] for row in sampler.draw_many(50000))
+        self.assertAlmostEqual(0.2, counts["Anna"] / 50000, delta=0.02)
+        self.assertAlmostEqual(0.6, counts["Mies"] / 50000, delta=0.02)
+        self.assertAlmostEqual(0.2, counts["Piet"] / 50000, delta=0.02)
+        # 1 in 1000 chance for Anna among all names
+        counts = Counter(row[0] for row in catalogue.sampler().draw_many(50000))
+        self.assertLess(counts["Anna"], 150)
+        self.assertGreater(counts["John"], 49000)
+        with self.assertRaises(LookupError):
+            catalogue.sampler(lang="DA")
+        set_data_directory(self.directory.name)
+        self.assertEqual(["John"] * 3, database.random_first_names(3, gender=Gender.MALE, language="EN"))
+
+    def test_era(self):
+        set_data_directory(self.directory.name)
+        # the file has no ERA column, so its names fit every era
+        self.assertEqual("John", database.get_first_name(gender=Gender.MALE, language="EN", era=Era.Modern))
+        _write(self.path, "first_name:gender:lang:era\nJohn:M:EN:Modern\nJack:M:EN:NineteenTwenty\n", 5)
+        set_data_directory(self.directory.name)
+        self.assertEqual(["Jack"] * 3,
+                         database.random_first_names(3, gender=Gender.MALE, language="EN", era=Era.NineteenTwenty))
+        _write(self.path.with_name("names.csv"), "surname:lang\nCarter:EN\n", 5)
+        investigator = random_investigator(gender=Gender.MALE, language="EN", occupation="Writer",
+                                           era=Era.NineteenTwenty)
+        self.assertEqual(("Jack", "Carter"), (investigator.firstname, investigator.surname))
+
+    def test_alias_table(self):
+        rows = tuple((i,) for i in range(4))
+        table = AliasTable(rows, [0.0, 1.0, 2.0, 1.0])
+        # a draw is one random number: the slot and the coin of the slot
+        draws = iter(range(1, 4 * 2 ** 32 + 1, 2 ** 28))
+        counts = Counter(table.draw(lambda limit: next(draws))[0] for _ in range(64))
+        self.assertEqual({1: 16, 2: 32, 3: 16}, dict(counts))
+        uniform = AliasTable(rows)
+        self.assertEqual((2,), uniform.draw(lambda limit: 3))
+        with self.assertRaises(ValueError):
+            AliasTable(rows, [1.0, -1.0, 1.0, 1.0])
+        with self.assertRaises(LookupError):
+            AliasTable(())
+
+    def test_occupations(self):
+        occupations = database.read_occupations()
+        self.assertIn("Accountant", occupations)
+        self.assertIn("Computer Programmer/Technician/Hacker", occupations)
+        self.assertNotIn("Bank Robber", occupations)
+        self.assertEqual(len(occupations), len(set(occupations)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+
+import random
+import unittest
+
+from coc.core.chase import Hazard, Participant, pass_table, simulate, speed_rolls
+from coc.core.check import HARD
+from coc.core.gender import Gender
+from coc.core.investigator import Investigator
+
+
+class ChaseTestCase(unittest.TestCase):
+    def test_pass_table(self):
+        table = pass_table(50)
+        self.assertEqual(50, sum(table))
+        self.assertEqual(25, sum(pass_table(50, HARD)))
+        participant = Participant("runner", 8, 50, 60, {"Climb": 30})
+        self.assertIs(participant.check_table(Hazard()), participant.check_table(Hazard()))
+        self.assertEqual(60, sum(participant.check_table(Hazard())))
+        self.assertEqual(30, sum(participant.check_table(Hazard("Climb"))))
+        # unknown skill: DEX one level harder
+        self.assertEqual(30, sum(participant.check_table(Hazard("Swim"))))
+
+    def test_speed_rolls(self):
+        random.seed(33)
+        values = speed_rolls(Participant("runner", 8, 50, 50), 1000, lambda limit: random.randint(1, limit))
+        self.assertEqual({7, 8, 9}, set(values))
+
+    def test_simulate(self):
+        random.seed(33)
+        rand = (lambda limit: random.randint(1, limit))
+        slow, fast = Participant("slow", 6, 50, 50), Participant("fast", 10, 50, 50)
+        self.assertEqual(1.0, simulate(slow, fast, 500, rand=rand).caught_probability)
+        self.assertEqual(1.0, simulate(fast, slow, 500, rand=rand).escape_probability)
+
+        quarry, pursuer = Participant("quarry", 8, 50, 60), Participant("pursuer", 8, 50, 40)
+        clear = simulate(quarry, pursuer, 3000, rand=rand)
+        blocked = simulate(quarry, pursuer, 3000, rand=rand, hazards={4: Hazard(difficulty=HARD, delay="2D3")})
+        self.assertGreater(clear.escape_probability, blocked.escape_probability)
+        self.assertAlmostEqual(1.0, clear.escape_probability + clear.caught_probability + clear.undecided / 3000)
+        self.assertRaises(ValueError, simulate, quarry, pursuer, 10, lead=0)
+
+    def test_movement_drops_with_age(self):
+        young = Investigator("Jessy", "Williams", Gender.FEMALE, "Writer", "Boston", "Arkham", 25)
+        old = Investigator("Jessy", "Williams", Gender.FEMALE, "Writer", "Boston", "Arkham", 85)
+        self.assertTrue(7 <= young.movement <= 9)
+        self.assertTrue(2 <= old.movement <= 4)
+        self.assertEqual(young.movement, Participant.from_investigator(young).movement)
+
+
+if __name__ == '__main__':
+    unittest.main()
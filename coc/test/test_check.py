@@ -0,0 +1,71 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+
+import random
+import unittest
+
+from coc.core import check
+from coc.core.check import SuccessLevel
+from coc.core.investigator import Attribute
+
+
+class CheckTestCase(unittest.TestCase):
+    def test_levels(self):
+        self.assertEqual([SuccessLevel.CRITICAL, SuccessLevel.EXTREME, SuccessLevel.HARD, SuccessLevel.REGULAR,
+                          SuccessLevel.FAIL, SuccessLevel.FUMBLE, SuccessLevel.FAIL],
+                         check.resolve_levels([60] * 7, [1, 12, 30, 60, 61, 100, 96]))
+        self.assertEqual(SuccessLevel.FUMBLE, check.success_level(40, 96))
+        self.assertEqual(SuccessLevel.HARD, Attribute("Climb", "CLB", 50).success_level(25))
+        self.assertRaises(ValueError, check.resolve_levels, [50, 50], [1])
+        for roll in (0, -1, 101):
+            self.assertRaises(ValueError, check.success_level, 50, roll)
+            self.assertRaises(ValueError, check.resolve_levels, [50, 50], [1, roll])
+
+    def test_level_probabilities(self):
+        self.assertAlmostEqual(1.0, sum(check.level_probabilities(50, 2)))
+        plain = check.level_probabilities(50)
+        self.assertAlmostEqual(0.01, plain[SuccessLevel.FUMBLE])
+        self.assertAlmostEqual(0.25, sum(plain[SuccessLevel.HARD:]))
+        bonus = check.level_probabilities(50, 1)
+        penalty = check.level_probabilities(50, -1)
+        self.assertGreater(sum(bonus[SuccessLevel.REGULAR:]), sum(plain[SuccessLevel.REGULAR:]))
+        self.assertLess(sum(penalty[SuccessLevel.REGULAR:]), sum(plain[SuccessLevel.REGULAR:]))
+
+    def test_opposed(self):
+        self.assertEqual(check.A_WINS, check.opposed(40, SuccessLevel.HARD, 80, SuccessLevel.REGULAR))
+        self.assertEqual(check.B_WINS, check.opposed(40, SuccessLevel.REGULAR, 80, SuccessLevel.REGULAR))
+        self.assertEqual(check.DRAW, check.opposed(40, SuccessLevel.FAIL, 80, SuccessLevel.FUMBLE))
+        self.assertEqual(check.DRAW, check.opposed(50, SuccessLevel.HARD, 50, SuccessLevel.HARD))
+
+        strong, weak = Attribute("Brawl", "BRL", 70), Attribute("Brawl", "BRL", 30)
+        win, draw, lose = strong.opposed_probabilities(weak)
+        self.assertAlmostEqual(1.0, win + draw + lose)
+        self.assertGreater(win, lose)
+        self.assertIs(check.opposed_probabilities(70, 30), check.opposed_probabilities(strong, weak))
+        self.assertEqual(check.A_WINS, strong.opposed(weak, 10, 20))
+
+        random.seed(34)
+        outcomes = check.resolve_opposed([(strong, weak)] * 20000, bonus_b=1,
+                                         rand=lambda limit: random.randint(1, limit))
+        win, draw, lose = check.opposed_probabilities(strong, weak, 0, 1)
+        self.assertAlmostEqual(win, outcomes.count(check.A_WINS) / 20000, delta=0.02)
+        self.assertAlmostEqual(lose, outcomes.count(check.B_WINS) / 20000, delta=0.02)
+
+
+if __name__ == '__main__':
+    unittest.main()
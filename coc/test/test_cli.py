@@ -0,0 +1,85 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+import csv
+import io
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+
+from coc import cli
+from coc.test import isolate
+
+
+class TestCli(unittest.TestCase):
+
+    def setUp(self):
+        isolate(self)
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _run(self, *argv) -> str:
+        file_path = os.path.join(self.directory.name, "out")
+        quiet = [] if argv[0] == "roll" else ["--progress", "0"]
+        self.assertEqual(0, cli.main(list(argv) + quiet + ["--output", file_path]))
+        with open(file_path, encoding="utf-8") as output:
+            return output.read()
+
+    def test_generate_jsonl(self):
+        text = self._run("generate", "-n", "150", "--seed", "45", "--language", "NL", "--min-age", "20",
+                         "--max-age", "29", "--workers", "3", "--chunk-size", "16")
+        records = [json.loads(line) for line in text.splitlines()]
+        self.assertEqual(150, len(records))
+        self.assertTrue(all(20 <= record["age"] <= 29 for record in records))
+        self.assertTrue(all(record["era"] == "NineteenTwenty" for record in records))
+        # the same seed gives the same investigators, whatever the number of workers
+        self.assertEqual(text, self._run("generate", "-n", "150", "--seed", "45", "--language", "NL",
+                                         "--min-age", "20", "--max-age", "29", "--chunk-size", "16"))
+
+    def test_generate_csv(self):
+        rows = list(csv.reader(io.StringIO(self._run("generate", "-n", "5", "-f", "csv", "--gender", "F"))))
+        self.assertEqual(cli.CSV_COLUMNS, rows[0])
+        self.assertEqual(6, len(rows))
+        self.assertTrue(all(row[2] == "FEMALE" for row in rows[1:]))
+
+    def test_roll(self):
+        lines = self._run("roll", "3D6", "-n", "1000", "--stats", "--seed", "1").splitlines()
+        self.assertEqual(1001, len(lines))
+        stats = json.loads(lines[-1])
+        self.assertEqual(1000, stats["count"])
+        self.assertAlmostEqual(10.5, stats["exact_mean"])
+        self.assertTrue(3 <= stats["min"] <= stats["max"] <= 18)
+
+    def test_names(self):
+        lines = self._run("names", "-n", "50", "--unique", "--language", "NL").splitlines()
+        self.assertEqual(50, len(set(lines)))
+        self.assertEqual(2, cli.main(["roll", "2D", "--output", os.path.join(self.directory.name, "x")]))
+
+    def test_invalid_sizes(self):
+        for option in ("-n", "--workers", "--chunk-size"):
+            for value in ("0", "-3", "many"):
+                with self.assertRaises(SystemExit), contextlib.redirect_stderr(io.StringIO()):
+                    cli.parser().parse_args(["generate", option, value])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+
+import random
+import unittest
+
+from coc.core.check import success_levels, CRITICAL, EXTREME, HARD, REGULAR, FAIL, FUMBLE
+from coc.core.combat import Combatant, simulate
+from coc.core.gender import Gender
+from coc.core.investigator import Investigator
+
+
+class CombatTestCase(unittest.TestCase):
+    def test_success_levels(self):
+        levels = success_levels(60)
+        self.assertEqual(CRITICAL, levels[1])
+        self.assertEqual(EXTREME, levels[12])
+        self.assertEqual(HARD, levels[30])
+        self.assertEqual(REGULAR, levels[60])
+        self.assertEqual(FAIL, levels[99])
+        self.assertEqual(FUMBLE, levels[100])
+        self.assertEqual(FUMBLE, success_levels(40)[96])
+
+    def test_simulate(self):
+        random.seed(31)
+        strong = Combatant("strong", 15, 70, 70, weapon="1D8", damage_bonus="D4")
+        weak = Combatant("weak", 8, 40, 30, weapon="1D3", damage_bonus="-1")
+        result = simulate(strong, weak, 2000)
+        self.assertEqual(2000, result.fights)
+        self.assertGreater(result.win_rate_first, 0.9)
+        self.assertAlmostEqual(1.0, result.win_rate_first + result.win_rate_second + result.draw_rate)
+        self.assertGreaterEqual(result.expected_rounds, 1)
+
+        armored = Combatant("armored", 10, 50, 50, armor=10)
+        stalemate = simulate(armored, Combatant("armored too", 10, 50, 50, armor=10), 10, max_rounds=5)
+        self.assertEqual(1.0, stalemate.draw_rate)
+        self.assertEqual(5, stalemate.expected_rounds)
+        self.assertRaises(ValueError, simulate, armored, armored)
+
+    def test_from_investigator(self):
+        investigator = Investigator("Jessy", "Williams", Gender.FEMALE, "Writer", "Boston", "Arkham", 25)
+        combatant = Combatant.from_investigator(investigator, weapon="1D4")
+        self.assertEqual(investigator.hit_max, combatant.hit_points)
+        self.assertEqual(investigator.dexterity // 2, combatant.dodge)
+        self.assertEqual(f"1D4+{investigator.damage_bonus}", combatant.damage.text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+import sys
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from coc.core import roll
+from coc.core.generator import generate_parallel
+from coc.core.investigator import Attribute
+from coc.test import isolate
+
+THREADS = 8
+
+
+def _run(threads: int, target) -> list:
+    """
+    Start a number of threads at the same moment and collect their results
+    """
+    barrier = threading.Barrier(threads)
+
+    def task(index):
+        barrier.wait()
+        return target(index)
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        return list(executor.map(task, range(threads)))
+
+
+class TestConcurrency(unittest.TestCase):
+
+    def setUp(self):
+        isolate(self)
+        self.switch_interval = sys.getswitchinterval()
+        # switch threads as often as possible to provoke races
+        sys.setswitchinterval(1e-6)
+
+    def tearDown(self):
+        sys.setswitchinterval(self.switch_interval)
+
+    def test_attribute_never_torn(self):
+        attribute = Attribute("Stress", "STR", 50, maximum=1000)
+        torn = []
+
+        def work(index):
+            for i in range(3000):
+                if index % 2:
+                    attribute.regular = (index * 37 + i) % 1000
+                else:
+                    regular, half, fifth = attribute.values
+                    if half != regular // 2 or fifth != regular // 5:
+                        torn.append((regular, half, fifth))
+
+        _run(THREADS, work)
+        self.assertEqual([], torn)
+
+    def test_concurrent_deductions(self):
+        attribute = Attribute("Stress", "STR", 100000, maximum=100000)
+        _run(THREADS, lambda index: [attribute.deduct(1) for _ in range(1000)])
+        self.assertEqual(100000 - THREADS * 1000, attribute.regular)
+        self.assertEqual((attribute.regular, attribute.regular // 2, attribute.regular // 5), attribute.values)
+
+    def test_independent_streams(self):
+        roll.seed(44)
+        draws = _run(THREADS, lambda index: roll.D100.roll_many(2000))
+        for i in range(THREADS):
+            for j in range(i + 1, THREADS):
+                matches = sum(a == b for a, b in zip(draws[i], draws[j]))
+                # independent streams agree on about 1 in 100 positions
+                self.assertLess(matches, 60)
+        shared = set(map(tuple, draws))
+        self.assertEqual(THREADS, len(shared))
+        roll.seed(44)
+        self.assertEqual(shared, set(map(tuple, _run(THREADS, lambda index: roll.D100.roll_many(2000)))))
+
+    def test_dice_shared_between_threads(self):
+        die = roll.Die(6)
+        values = _run(THREADS, lambda index: [die.value() for _ in range(2000)])
+        self.assertTrue(all(1 <= value <= 6 for chunk in values for value in chunk))
+        self.assertFalse(hasattr(die, "_value"))
+
+    def test_parallel_generation(self):
+        first = generate_parallel(200, workers=THREADS, seed=44, language="NL")
+        second = generate_parallel(200, workers=3, seed=44, chunk_size=64, language="NL")
+        self.assertEqual(200, len(first))
+        self.assertEqual([investigator.as_dict() for investigator in first],
+                         [investigator.as_dict() for investigator in second])
+        for investigator in first:
+            self.assertEqual((investigator.constitution + investigator.size) // 10, investigator.hit_max)
+            for characteristic in investigator.chars.values():
+                regular, half, fifth = characteristic.values
+                self.assertEqual((regular // 2, regular // 5), (half, fifth))
+        self.assertRaises(ValueError, generate_parallel, 10, workers=2, chunk_size=0)
+
+    def test_parallel_unique_names(self):
+        investigators = generate_parallel(300, workers=THREADS, seed=7, unique=True, chunk_size=10, language="NL")
+        self.assertEqual(300, len({(i.firstname, i.surname) for i in investigators}))
+        for workers in (1, 2):
+            again = generate_parallel(300, workers=workers, seed=7, unique=True, chunk_size=10, language="NL")
+            self.assertEqual([investigator.as_dict() for investigator in investigators],
+                             [investigator.as_dict() for investigator in again])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+import unittest
+
+from coc.core.development import Development, forecast, expected_curve, improvement_chance
+from coc.core.gender import Gender
+from coc.core.investigator import Investigator
+from coc.test import isolate
+
+SKILLS = (("Spot Hidden", 25), ("Library Use", 20), ("Dodge", 30), ("Listen", 20), ("Stealth", 20),
+          ("Psychology", 10), ("Occult", 5), ("Firearms", 25))
+
+
+def _investigators(count: int) -> list:
+    ret = []
+    for i in range(count):
+        investigator = Investigator("Jessy", f"Williams{i}", Gender.FEMALE, "Writer", "Boston", "Arkham", 25)
+        for name, value in SKILLS:
+            investigator.set_skill(name, value)
+        ret.append(investigator)
+    return ret
+
+
+class TestDevelopment(unittest.TestCase):
+
+    def setUp(self):
+        isolate(self, seed=47)
+
+    def test_step(self):
+        investigators = _investigators(2)
+        investigators[0].set_skill("Dodge", 88)
+        investigators[0].tick("Dodge")
+        investigators[1].tick("Occult")
+        development = Development(investigators)
+        development.tick(1, "Listen")
+        rolls = iter([89, 96, 4,     # improvement checks of Dodge, Listen and Occult in store order
+                      2, 3, 8,       # their 1D10 gains
+                      6, 6])         # 2D6 sanity for Dodge reaching 90
+        self.assertEqual(2, development.step(lambda limit: next(rolls)))
+        self.assertEqual((90, 23, 5), (development.value(0, "Dodge"), development.value(1, "Listen"),
+                                       development.value(1, "Occult")))
+        self.assertEqual(0, development.ticks.count(1))
+        self.assertEqual(88, investigators[0].skills["Dodge"].regular)
+        sanity = investigators[0].sanity.regular
+        development.write_back()
+        self.assertEqual(90, investigators[0].skills["Dodge"].regular)
+        self.assertEqual(min(99, sanity + 12), investigators[0].sanity.regular)
+        self.assertFalse(investigators[1].ticks)
+
+    def test_forecast(self):
+        self.assertEqual(0.05, improvement_chance(99))
+        self.assertEqual(0.01, improvement_chance(99, floor=None))
+        distributions = forecast(20, 3, uses=1)
+        self.assertEqual(4, len(distributions))
+        for distribution in distributions:
+            self.assertAlmostEqual(1.0, sum(distribution.values()))
+        self.assertEqual({20: 1.0}, distributions[0])
+        # ticked with chance 0.2, improved with chance 0.8, then 1D10
+        self.assertAlmostEqual(0.84, distributions[1][20])
+        self.assertAlmostEqual(0.016, distributions[1][25])
+        # EDU never passes 99
+        self.assertEqual(99, max(forecast({90: 0.5, 95: 0.5}, 20, uses=None, floor=None, maximum=99)[-1]))
+        curve = expected_curve(20, 50)
+        self.assertEqual(51, len(curve))
+        self.assertTrue(all(a < b for a, b in zip(curve, curve[1:])))
+
+    def test_simulation_follows_forecast(self):
+        development = Development(_investigators(1000))
+        curve = development.run(50)
+        self.assertEqual(51, len(curve))
+        for name, value in SKILLS:
+            expected = expected_curve(value, 50)
+            self.assertAlmostEqual(expected[-1], curve[-1][name], delta=2.0)
+            self.assertAlmostEqual(expected[10], curve[10][name], delta=2.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
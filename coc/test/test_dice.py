@@ -0,0 +1,102 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+
+import itertools
+import random
+import unittest
+
+from coc.core.dice import compile_expression, tokenize
+from coc.core.roll import Roll
+
+
+def scripted(*values):
+    """
+    rand replacement that returns the given values in order
+    """
+    iterator = iter(values)
+    return lambda limit: next(iterator)
+
+
+class DiceTestCase(unittest.TestCase):
+    def test_tokenize(self):
+        self.assertEqual([("dice", (3, 6)), ("operator", "*"), ("number", 5)], tokenize("3D6 * 5"))
+        self.assertEqual([("dice", (1, 100)), ("modifier", ("b", "1"))], tokenize("D%B1"))
+        self.assertRaises(ValueError, tokenize, "3D6 ^ 2")
+
+    def test_parse_errors(self):
+        for text in ["", "3D6+", "(3D6", "3D6)", "D6b1", "4D6kh5", "4D6kh", "D0", "2 3", "4D6kh1dl1", "D6/0"]:
+            self.assertRaises(ValueError, compile_expression, text)
+
+    def test_evaluate(self):
+        self.assertEqual(15, compile_expression("(3D6)*5").roll(scripted(1, 1, 1)))
+        self.assertEqual(70, compile_expression("(2D6+6)*5").roll(scripted(3, 5)))
+        self.assertEqual(7, compile_expression(" 2D6 - 3 + 4 ").roll(scripted(3, 3)))
+        self.assertEqual(-3, compile_expression("-D4").roll(scripted(3)))
+        self.assertEqual(2, compile_expression("D6/2").roll(scripted(5)))
+        self.assertEqual(1, compile_expression("1D3+-2").roll(scripted(3)))
+        self.assertEqual(13, compile_expression("4D6kh3").roll(scripted(1, 6, 4, 3)))
+        self.assertEqual(4, compile_expression("4D6kl2").roll(scripted(1, 6, 4, 3)))
+        self.assertEqual(7, compile_expression("4D6dh2").roll(scripted(5, 6, 4, 3)))
+        self.assertEqual(10, compile_expression("4D6dl2").roll(scripted(1, 6, 4, 3)))
+
+    def test_bonus_penalty(self):
+        # units 5, tens 3 and 7
+        self.assertEqual(25, compile_expression("D100b1").roll(scripted(6, 3, 7)))
+        self.assertEqual(65, compile_expression("D100p1").roll(scripted(6, 3, 7)))
+        # 00 + 0 is 100
+        self.assertEqual(100, compile_expression("D%p1").roll(scripted(1, 1, 4)))
+        self.assertEqual(15, compile_expression("D100b2").roll(scripted(6, 9, 2, 5)))
+        # bonus and penalty cancel
+        self.assertEqual(str(compile_expression("D100").tree), str(compile_expression("D100b1p1").tree))
+
+    def test_batch(self):
+        random.seed(5)
+        for text in ["3D6*5", "(2D6+6)*5", "4D6kh3", "D100b1", "D100p2", "D6-D4", "-D8"]:
+            expression = compile_expression(text)
+            values = expression.roll_many(2000, lambda limit: random.randint(1, limit))
+            self.assertEqual(2000, len(values))
+            scalar = [expression.roll(lambda limit: random.randint(1, limit)) for _ in range(2000)]
+            self.assertEqual(min(values), min(scalar), text)
+            self.assertEqual(max(values), max(scalar), text)
+
+    def test_distribution(self):
+        three_d6 = compile_expression("3D6").distribution()
+        self.assertAlmostEqual(1.0, sum(three_d6.values()))
+        self.assertAlmostEqual(27 / 216, three_d6[10])
+        self.assertEqual((40, 90), (compile_expression("(2D6+6)*5").minimum, compile_expression("(2D6+6)*5").maximum))
+        self.assertAlmostEqual(1 / 1296, compile_expression("4D6kh3").distribution()[3])
+        # bonus and penalty order statistics against brute force enumeration
+        for text in ["D100b1", "D100p1", "D100b2"]:
+            expression = compile_expression(text)
+            dice = 2 if text[-1] == "1" else 3
+            counts = {}
+            for outcome in itertools.product(range(1, 11), repeat=dice + 1):
+                value = expression.roll(scripted(*outcome))
+                counts[value] = counts.get(value, 0) + 1
+            for value, count in counts.items():
+                self.assertAlmostEqual(count / 10 ** (dice + 1), expression.distribution()[value], msg=text)
+        self.assertRaises(ValueError, compile_expression("20D20kh1").distribution)
+
+    def test_cache(self):
+        self.assertIs(compile_expression("3D6"), compile_expression("3D6"))
+        self.assertIs(Roll("2D6+6").expression, Roll("2D6+6").expression)
+        self.assertEqual(5, len(Roll("D6").roll_many(5)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+
+import os
+import tempfile
+import unittest
+
+from coc.core.check import SuccessLevel
+from coc.core.game import Session, ROLL, SNAPSHOT_SUFFIX
+from coc.core.gender import Gender
+from coc.core.investigator import Investigator, STR
+
+
+class GameTestCase(unittest.TestCase):
+    def setUp(self):
+        self.investigator = Investigator("Jessy", "Williams", Gender.FEMALE, "Writer", "Boston", "Arkham", 25)
+
+    def test_replay(self):
+        session = Session(snapshot_interval=3)
+        key = session.add_investigator(self.investigator)
+        strength = self.investigator.strength
+        for i in range(10):
+            session.change(key, STR, i)
+        session.roll("3D6", key, "test")
+        self.assertEqual(SuccessLevel.CRITICAL, session.check(key, STR, roll=1))
+        self.assertEqual(9, session.investigator(key).strength)
+        self.assertEqual(strength, session.investigator(key, 1).strength)
+        self.assertEqual(4, session.investigator(key, 6).strength)
+        self.assertEqual(1, len(session.audit(key, ROLL)))
+        self.assertRaises(KeyError, session.investigator, key, 0)
+        self.assertRaises(KeyError, session.change, key, "chars", 3)
+
+    def test_undo(self):
+        session = Session()
+        key = session.add_investigator(self.investigator)
+        session.change(key, "age", 30)
+        session.change(key, "SAN", 10)
+        self.assertEqual(10, session.investigator(key).sanity.regular)
+        session.undo()
+        session.undo()
+        self.assertEqual(25, session.investigator(key).age)
+        self.assertEqual(self.investigator.sanity.regular, session.investigator(key).sanity.regular)
+        self.assertEqual(30, session.investigator(key, 2).age)
+        session.undo()
+        self.assertEqual({}, session.state())
+        self.assertIsNone(session.undo())
+
+    def test_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "session.jsonl")
+            with Session(file_path, snapshot_interval=4) as session:
+                key = session.add_investigator(self.investigator, "jessy")
+                for i in range(9):
+                    session.change(key, "age", 20 + i)
+                session.undo()
+            loaded = Session.load(file_path, snapshot_interval=4)
+            self.assertEqual(session.state(), loaded.state())
+            self.assertEqual(27, loaded.investigator("jessy").age)
+            self.assertEqual(session.state(5), loaded.state(5))
+            # the file keeps the latest snapshot only
+            self.assertEqual([0, 8], sorted(loaded.snapshots))
+            with open(file_path + SNAPSHOT_SUFFIX, encoding="utf-8") as snapshots:
+                self.assertEqual(1, len(snapshots.readlines()))
+            loaded.change(key, "age", 99)
+            self.assertEqual(99, Session.load(file_path).investigator("jessy").age)
+            loaded.close()
+
+    def test_rejected_change(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "session.jsonl")
+            with Session(file_path) as session:
+                key = session.add_investigator(self.investigator, "jessy")
+                for field in ("chars", "sanity", "unknown"):
+                    self.assertRaises(KeyError, session.change, key, field, 5)
+                self.assertEqual([1], [event.seq for event in session.events])
+                session.change(key, "age", 40)
+                session.undo()
+            self.assertEqual([1, 2, 3], [event.seq for event in session.events])
+            loaded = Session.load(file_path)
+            self.assertEqual(session.state(), loaded.state())
+            self.assertEqual(25, loaded.investigator("jessy").age)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+import unittest
+
+from coc.core import generator
+from coc.core.gender import Gender
+from coc.core.investigator import STR, EDU, APP
+from coc.test import isolate
+
+
+class TestGenerator(unittest.TestCase):
+
+    def setUp(self):
+        isolate(self, seed=38)
+
+    def test_truncated_table(self):
+        values, cumulative = generator.truncated_table("3D6*5", 70, 80)
+        self.assertEqual((70, 75, 80), values)
+        # 3D6 = 14, 15, 16 occur 15, 10 and 6 times out of 216
+        self.assertAlmostEqual(15 / 31, cumulative[0] / generator.RESOLUTION, places=6)
+        self.assertEqual(generator.RESOLUTION, cumulative[-1])
+        for _ in range(100):
+            self.assertIn(generator.truncated_roll("3D6*5", 70, 80), values)
+        with self.assertRaises(ValueError):
+            generator.truncated_table("3D6*5", 95)
+
+    def test_constrained_investigator(self):
+        for investigator in generator.constrained_investigators(50, constraints={STR: 70, EDU: (80, None),
+                                                                                 APP: (None, 40)},
+                                                                age=(40, 49), gender=Gender.FEMALE,
+                                                                language="NL"):
+            self.assertGreaterEqual(investigator.strength, 70)
+            self.assertGreaterEqual(investigator.education, 80)
+            self.assertLessEqual(investigator.appearance, 40)
+            self.assertTrue(40 <= investigator.age <= 49)
+            self.assertEqual(Gender.FEMALE, investigator.gender)
+
+    def test_young_investigator(self):
+        investigator = generator.constrained_investigator(constraints={EDU: (60, 60)}, age=17)
+        self.assertEqual(60, investigator.education)
+        self.assertEqual(17, investigator.age)
+
+    def test_impossible(self):
+        with self.assertRaises(ValueError):
+            generator.constrained_investigator(constraints={"STR": (80, 70)})
+        with self.assertRaises(ValueError):
+            generator.constrained_investigator(constraints={"XYZ": 10})
+        with self.assertRaises(ValueError):
+            generator.constrained_investigator(constraints={"STR": 85, "CON": 85, "DEX": 85}, age=85,
+                                               max_attempts=10)
+
+
+if __name__ == '__main__':
+    unittest.main()
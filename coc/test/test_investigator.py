@@ -0,0 +1,110 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+
+import unittest
+from unittest import mock
+
+from coc.core.gender import Gender
+from coc.core.investigator import Investigator
+
+
+class InvestigatorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.investigator = Investigator("Jessy", "Williams", Gender.FEMALE, "Writer", "Boston", "Arkham", 25)
+        self.investigator.strength = 50
+        self.investigator.size = 50
+        self.investigator.constitution = 50
+        self.investigator.dexterity = 50
+
+    def test_derived_values_follow_changes(self):
+        investigator = self.investigator
+        self.assertEqual(("0", 0, 10, 8), (investigator.damage_bonus, investigator.build, investigator.hit_max,
+                                          investigator.movement))
+        investigator.strength = 90
+        investigator.size = 80
+        self.assertEqual(("D6", 2), (investigator.damage_bonus, investigator.build))
+        self.assertEqual(13, investigator.hit_max)
+        self.assertEqual(8, investigator.movement)
+        investigator.chars["DEX"].deduct(40)
+        investigator.chars["STR"].deduct(30)
+        self.assertEqual(7, investigator.movement)
+        investigator.age = 65
+        self.assertEqual(4, investigator.movement)
+
+    def test_recompute_only_on_access(self):
+        investigator = self.investigator
+        investigator.movement
+        with mock.patch.object(Investigator, "set_movement", autospec=True,
+                               side_effect=Investigator.set_movement) as set_movement:
+            for value in range(40, 60):
+                investigator.strength = value
+                investigator.dexterity = value
+                investigator.age = value
+            self.assertEqual(0, set_movement.call_count)
+            investigator.movement
+            investigator.movement
+            self.assertEqual(1, set_movement.call_count)
+            # appearance does not influence movement
+            investigator.appearance = 20
+            investigator.movement
+            self.assertEqual(1, set_movement.call_count)
+
+    def test_from_dict(self):
+        copy = Investigator.from_dict(self.investigator.as_dict())
+        self.assertEqual(self.investigator.as_dict(), copy.as_dict())
+        self.assertEqual(self.investigator.movement, copy.movement)
+        copy.size = 90
+        self.assertEqual(14, copy.hit_max)
+
+    def test_education_improvement(self):
+        investigator = self.investigator
+        investigator.education = 60
+        with mock.patch("coc.core.roll.random_func", side_effect=[40, 80, 7, 100, 10]):
+            investigator.education_improvement(3)
+        # 40 is no improvement, 80 adds 7, 100 adds 10 up to the maximum of 99
+        self.assertEqual(77, investigator.education)
+        investigator.education = 95
+        with mock.patch("coc.core.roll.random_func", side_effect=[100, 10]):
+            investigator.education_improvement()
+        self.assertEqual(99, investigator.education)
+
+    def test_skill_improvement(self):
+        investigator = self.investigator
+        investigator.set_skill("Spot Hidden", 85)
+        investigator.set_skill("Dodge", 97)
+        investigator.set_skill("Listen", 30)
+        with self.assertRaises(KeyError):
+            investigator.tick("Occult")
+        for name in ("Spot Hidden", "Dodge", "Listen"):
+            investigator.tick(name)
+        sanity = investigator.sanity.regular
+        investigator.sanity.regular = 50
+        # sorted: Dodge (96 > 95 improves), Listen (20 fails), Spot Hidden (90 improves to 90, 2D6 sanity)
+        with mock.patch("coc.core.roll.random_func", side_effect=[96, 3, 20, 90, 5, 4, 6]):
+            self.assertEqual(["Dodge", "Spot Hidden"], investigator.skill_improvement())
+        self.assertEqual((100, 30, 90), tuple(investigator.skills[name].regular
+                                              for name in ("Dodge", "Listen", "Spot Hidden")))
+        self.assertEqual(60, investigator.sanity.regular)
+        self.assertFalse(investigator.ticks)
+        investigator.sanity.regular = sanity
+        copy = Investigator.from_dict(investigator.as_dict())
+        self.assertEqual(investigator.as_dict(), copy.as_dict())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+import tempfile
+import unittest
+from pathlib import Path
+
+from coc.core import sanity
+from coc.core.dice import set_journal
+from coc.core.game import Session
+from coc.core.gender import Gender
+from coc.core.investigator import Investigator, POW
+from coc.core.roll import Roll
+from coc.lib import journal
+from coc.test import isolate
+
+
+class TestJournal(unittest.TestCase):
+
+    def setUp(self):
+        isolate(self, seed=50)
+
+    def tearDown(self):
+        set_journal(None)
+
+    def test_record_and_replay(self):
+        rolls = journal.start(capacity=8)
+        totals = [Roll("3D6*5").roll() for _ in range(3)]
+        with rolls.context("Harvey vs Deep One"):
+            fight = Roll("D100b1").roll()
+        journal.stop(rolls)
+        Roll("D6").roll()
+        entries = list(rolls.entries())
+        self.assertEqual(4, len(entries))
+        self.assertEqual(totals, [entry.total for entry in entries[:3]])
+        self.assertEqual(3, len(entries[0].dice))
+        self.assertEqual(sum(entries[0].dice) * 5, entries[0].total)
+        self.assertTrue(all(journal.verify(entry) for entry in entries))
+        disputed, = rolls.entries(context="Harvey vs Deep One")
+        self.assertEqual((3, "D100b1", fight), (disputed.sequence, disputed.expression, disputed.total))
+        self.assertEqual(fight, journal.replay(disputed))
+        self.assertEqual([], list(rolls.entries(expression="D20")))
+        self.assertEqual(3, len(list(rolls.entries(expression="3D6*5"))))
+        # tampered dice do not give the recorded total
+        dice = entries[0].dice
+        self.assertFalse(journal.verify(entries[0]._replace(dice=[dice[0] % 6 + 1] + dice[1:])))
+        self.assertFalse(journal.verify(entries[0]._replace(dice=[7, 1, 1])))
+        self.assertFalse(journal.verify(entries[0]._replace(dice=[1, 1])))
+
+    def test_game_rolls(self):
+        investigator = Investigator("Jessy", "Williams", Gender.FEMALE, "Writer", "Boston", "Arkham", 25)
+        session = Session()
+        key = session.add_investigator(investigator)
+        rolls = journal.start()
+        with rolls.context("POW check"):
+            level = session.check(key, POW, bonus=1)
+        with rolls.context("Deep One"):
+            lost = sanity.check(investigator.sanity, "1D2/1D6")
+        many = Roll("2D6").roll_many(5)
+        journal.stop(rolls)
+        check_roll, = rolls.entries(context="POW check")
+        self.assertEqual("D100b1", check_roll.expression)
+        self.assertEqual(session.audit(key)[-1].data["roll"], journal.replay(check_roll))
+        self.assertEqual(int(level), session.audit(key)[-1].data["level"])
+        sanity_rolls = list(rolls.entries(context="Deep One"))
+        # the SAN roll and the loss
+        self.assertEqual(2, len(sanity_rolls))
+        self.assertEqual("D100", sanity_rolls[0].expression)
+        self.assertIn(sanity_rolls[1].expression, ("1D2", "1D6"))
+        self.assertEqual(lost, sanity_rolls[-1].total)
+        self.assertTrue(all(journal.verify(entry) for entry in sanity_rolls))
+        self.assertEqual(many, [entry.total for entry in rolls.entries(expression="2D6")])
+
+    def test_ring_and_spill(self):
+        with tempfile.TemporaryDirectory() as directory:
+            spill = Path(directory) / "rolls.journal"
+            rolls = journal.start(capacity=4, spill=spill)
+            totals = [Roll("2D6+6").roll() for _ in range(10)]
+            Roll("20D6").roll()
+            rolls.flush()
+            self.assertEqual(totals, [entry.total for entry in journal.read(spill)][:10])
+            totals.append(Roll("D10").roll())
+            journal.stop(rolls)
+            # the ring keeps the last four rolls, the file all of them
+            self.assertEqual([8, 9, 10, 11], [entry.sequence for entry in rolls.entries()])
+            recorded = list(journal.read(spill))
+            self.assertEqual(12, len(recorded))
+            self.assertEqual(totals[:10], [entry.total for entry in recorded[:10]])
+            self.assertIsNone(recorded[10].dice)
+            self.assertEqual(("D10", totals[10]), (recorded[11].expression, recorded[11].total))
+            self.assertTrue(journal.verify(recorded[11]))
+            with self.assertRaises(ValueError):
+                journal.replay(recorded[10])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+
+import json
+import os
+import tempfile
+import unittest
+
+from coc.core import roll, sanity
+from coc.core.roll import Roll
+from coc.lib import metrics
+
+
+class MetricsTestCase(unittest.TestCase):
+    def tearDown(self):
+        metrics.disable()
+        metrics.reset()
+
+    def test_disabled(self):
+        metrics.reset()
+        Roll("3D6").roll()
+        self.assertEqual({}, metrics.snapshot())
+
+    def test_swap(self):
+        self.assertFalse(hasattr(roll.random_func, "__wrapped__"))
+        metrics.enable()
+        self.assertTrue(hasattr(roll.random_func, "__wrapped__"))
+        self.assertIs(roll.random_func, sanity.random_func)
+        self.assertTrue(hasattr(Roll.roll, "__wrapped__"))
+        metrics.disable()
+        self.assertFalse(hasattr(sanity.random_func, "__wrapped__"))
+        self.assertFalse(hasattr(Roll.spread, "__wrapped__"))
+
+    def test_enabled(self):
+        metrics.reset()
+        metrics.enable()
+        die = Roll("3D6")
+        for _ in range(10):
+            die.roll()
+        Roll.spread(10, 3)
+        metrics.record("custom")
+        snapshot = metrics.snapshot()
+        self.assertEqual(1, snapshot["roll.parse"]["count"])
+        self.assertEqual(10, snapshot["roll.roll"]["count"])
+        self.assertEqual(30, snapshot["roll.random_func"]["count"])
+        self.assertEqual(1, snapshot["roll.spread"]["count"])
+        self.assertEqual(10, sum(snapshot["roll.roll"]["histogram_ns"].values()))
+        self.assertGreater(snapshot["roll.roll"]["total_s"], 0)
+        self.assertEqual(1, snapshot["custom"]["count"])
+        self.assertIsNone(snapshot["custom"]["mean_s"])
+
+    def test_dump(self):
+        metrics.enable()
+        Roll("D6").roll()
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "metrics.jsonl")
+            metrics.start_periodic_dump(60, file_path)
+            metrics.stop_periodic_dump()
+            with open(file_path, encoding="utf-8") as lines:
+                dumped = [json.loads(line) for line in lines]
+        self.assertEqual(1, len(dumped))
+        self.assertIn("roll.roll", dumped[0]["metrics"])
+        self.assertRaises(ValueError, metrics.start_periodic_dump, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
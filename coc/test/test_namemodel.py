@@ -0,0 +1,76 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+import tempfile
+import unittest
+from pathlib import Path
+
+from coc import config
+from coc.core.gender import Gender
+from coc.lib import database, namemodel
+from coc.lib.namemodel import NameModel, load_model
+from coc.test import isolate
+
+NAMES = ["Anna", "Anne", "Annie", "Hanna", "Johanna", "Marianne"]
+
+
+class TestNameModel(unittest.TestCase):
+
+    def setUp(self):
+        isolate(self, seed=41)
+        cache = tempfile.TemporaryDirectory()
+        self.addCleanup(cache.cleanup)
+        self.addCleanup(setattr, config, "DIR_CACHE", config.DIR_CACHE)
+        config.DIR_CACHE = Path(cache.name)
+        # models loaded before would not be written to the temporary cache
+        database._name_model.cache_clear()
+        self.addCleanup(database._name_model.cache_clear)
+
+    def test_train(self):
+        model = NameModel.train(NAMES)
+        # after "An" the names continue with "n" three times
+        self.assertEqual(("n", (3,)), model.table["An"])
+        self.assertEqual(("AHJM", (3, 4, 5, 6)), model.table["^^"])
+        with self.assertRaises(ValueError):
+            NameModel.train([])
+
+    def test_generate(self):
+        model = NameModel.train(NAMES)
+        names = model.generate_many(200)
+        for name in names:
+            self.assertTrue(namemodel.MIN_LENGTH <= len(name) <= namemodel.MAX_LENGTH)
+            self.assertNotIn(name, NAMES)
+            self.assertIn(name[0], "AHJM")
+        self.assertGreater(len(set(names)), 3)
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache_path = Path(directory) / "model.json"
+            model = load_model(cache_path, NAMES, [1, 2])
+            self.assertTrue(cache_path.exists())
+            self.assertEqual(model.table, load_model(cache_path, [], [1, 2]).table)
+            retrained = load_model(cache_path, ["Bert", "Bart"], [1, 3])
+            self.assertEqual(("B", (2,)), retrained.table["^^"])
+
+    def test_synthetic_source(self):
+        self.assertTrue(database.get_first_name(gender=Gender.FEMALE, language="NL", source=database.SYNTHETIC))
+        self.assertTrue(database.get_last_name(language="NL", source=database.SYNTHETIC))
+        self.assertEqual(2, len(list(config.DIR_CACHE.glob("*.json"))))
+
+
+if __name__ == '__main__':
+    unittest.main()
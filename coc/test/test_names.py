@@ -0,0 +1,85 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+import threading
+import unittest
+
+from coc.core.gender import Gender
+from coc.core.generator import random_investigators
+from coc.lib import database
+from coc.lib.names import UniqueNames, NamespaceExhausted, BloomFilter, visited_set
+from coc.test import isolate
+
+
+class TestNames(unittest.TestCase):
+
+    def setUp(self):
+        isolate(self, "ERROR", seed=40)
+
+    def test_exhaust_namespace(self):
+        names = UniqueNames(gender=Gender.FEMALE, language="NL")
+        self.assertEqual(len(set(database.first_names(Gender.FEMALE, "NL"))) * len(set(database.last_names("NL"))),
+                         names.size)
+        issued = names.take(names.size)
+        self.assertEqual(names.size, len(set(issued)))
+        self.assertTrue(names.exhausted)
+        self.assertEqual(0, names.remaining)
+        with self.assertRaises(NamespaceExhausted):
+            names.next_name()
+
+    def test_shared_visited_set(self):
+        taken = visited_set(10000)
+        first = UniqueNames(language="NL", taken=taken)
+        issued = first.take(500)
+        second = UniqueNames(language="NL", taken=taken)
+        rest = list(second)
+        self.assertEqual(first.size - 500, len(rest))
+        self.assertFalse(set(issued) & set(rest))
+
+    def test_bloom_filter(self):
+        bloom = BloomFilter(1000, error_rate=0.01)
+        for i in range(1000):
+            bloom.add(f"name {i}")
+        self.assertTrue(all(f"name {i}" in bloom for i in range(1000)))
+        false_positives = sum(f"other {i}" in bloom for i in range(10000))
+        self.assertLess(false_positives, 300)
+        self.assertEqual(1000, len(bloom))
+
+    def test_concurrent_iteration(self):
+        names = UniqueNames(gender=Gender.FEMALE, language="NL")
+        results = [[] for _ in range(4)]
+        threads = [threading.Thread(target=results[i].extend, args=(names,)) for i in range(3)]
+        for thread in threads:
+            thread.start()
+        try:
+            while True:
+                results[3].append(names.next_name())
+        except NamespaceExhausted:
+            pass
+        for thread in threads:
+            thread.join()
+        issued = [name for result in results for name in result]
+        self.assertEqual(names.size, len(issued))
+        self.assertEqual(names.size, len(set(issued)))
+
+    def test_unique_investigators(self):
+        investigators = random_investigators(100, unique=True, language="NL")
+        self.assertEqual(100, len({(i.firstname, i.surname) for i in investigators}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+
+import tempfile
+import threading
+import unittest
+
+from coc.core.gender import Gender
+from coc.core.investigator import Investigator
+from coc.player import InvestigatorStore, PlayerRegistry
+
+
+def new_investigator(age: int = 25) -> Investigator:
+    return Investigator("Jessy", "Williams", Gender.FEMALE, "Writer", "Boston", "Arkham", age)
+
+
+class SlowStore(InvestigatorStore):
+    """
+    Store whose investigator writes wait until they are released
+    """
+
+    def __init__(self, directory: str):
+        super().__init__(directory)
+        self.writing = threading.Event()
+        self.release = threading.Event()
+
+    def save(self, key: str, record: dict) -> None:
+        self.writing.set()
+        self.release.wait(10)
+        super().save(key, record)
+
+
+class PlayerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = InvestigatorStore(self.directory.name)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_lru_write_back(self):
+        registry = PlayerRegistry(self.store, capacity=2)
+        keys = [registry.add_investigator("alice", new_investigator(20 + i), f"inv{i}") for i in range(3)]
+        self.assertEqual(keys, registry.investigators("alice"))
+        self.assertEqual("alice", registry.owner("inv1"))
+        # inv0 was evicted and written back
+        self.assertEqual(20, self.store.load("inv0")["age"])
+        self.assertIsNone(self.store.load("inv2"))
+        self.assertEqual(20, registry.get("inv0").age)
+        self.assertEqual(1, registry.misses)
+        registry.get("inv0", for_update=True).age = 60
+        registry.flush()
+        self.assertEqual(60, self.store.load("inv0")["age"])
+
+        reopened = PlayerRegistry(InvestigatorStore(self.directory.name))
+        self.assertEqual(keys, reopened.investigators("alice"))
+        self.assertEqual(60, reopened.get("inv0").age)
+        self.assertRaises(KeyError, reopened.get, "unknown")
+        self.assertRaises(KeyError, registry.add_investigator, "bob", new_investigator(), "inv0")
+        self.assertRaises(ValueError, registry.add_investigator, "bob", new_investigator(), "../escape")
+
+    def test_size_based_eviction(self):
+        registry = PlayerRegistry(self.store, capacity=100, max_bytes=1)
+        registry.add_investigator("alice", new_investigator(), "a")
+        registry.add_investigator("alice", new_investigator(), "b")
+        # the most recent entry is always kept
+        self.assertEqual(1, len(registry._cache))
+
+    def test_threads(self):
+        registry = PlayerRegistry(self.store, capacity=8)
+        keys = [registry.add_investigator(f"player{i % 5}", new_investigator(), f"k{i}") for i in range(30)]
+        errors = []
+
+        def work(offset):
+            try:
+                for i in range(200):
+                    registry.get(keys[(i * 7 + offset) % 30])
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=work, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual([], errors)
+        self.assertLessEqual(len(registry._cache), 8)
+
+    def test_write_back_outside_lock(self):
+        store = SlowStore(self.directory.name)
+        registry = PlayerRegistry(store, capacity=1)
+        registry.add_investigator("alice", new_investigator(30), "a")
+        adding = threading.Thread(target=registry.add_investigator, args=("alice", new_investigator(40), "b"))
+        adding.start()
+        self.assertTrue(store.writing.wait(10))
+        results = []
+        reader = threading.Thread(target=lambda: results.extend((registry.get("b").age, registry.get("a").age)))
+        reader.start()
+        # lookups finish while the evicted investigator is still being written
+        reader.join(10)
+        self.assertEqual([40, 30], results)
+        store.release.set()
+        adding.join()
+        registry.flush()
+        self.assertEqual(30, store.load("a")["age"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+import random
+import unittest
+
+from coc.core.gender import Gender
+from coc.core.investigator import Investigator
+from coc.core.population import Population
+from coc.test import isolate
+
+OCCUPATIONS = ("Writer", "Doctor", "Priest", "Tramp")
+
+
+class TestPopulation(unittest.TestCase):
+
+    def setUp(self):
+        isolate(self, seed=39)
+        self.investigators = [Investigator(firstname="A", surname="B", gender=random.choice((Gender.MALE, Gender.FEMALE)),
+                                           occupation=random.choice(OCCUPATIONS), birthplace="Boston",
+                                           residence="Arkham", age=random.randint(15, 89))
+                              for _ in range(300)]
+        self.population = Population(self.investigators[:200])
+        self.population.extend(self.investigators[200:])
+
+    def test_range(self):
+        expected = [i for i in self.investigators if i.dexterity > 60 and i.age < 30]
+        self.assertEqual(expected, self.population.query({"DEX": (61, None), "AGE": (None, 29)}))
+        self.assertEqual(len(expected), self.population.count({"DEX": (61, None), "AGE": (None, 29)}))
+        self.assertEqual(sum(1 for i in self.investigators if 40 <= i.strength <= 60),
+                         self.population.count({"STR": (40, 60)}))
+        self.assertEqual([], self.population.query({"STR": (60, 40)}))
+
+    def test_equality(self):
+        expected = [i for i in self.investigators if i.gender == Gender.FEMALE and i.occupation in ("Writer", "Tramp")]
+        self.assertEqual(expected, self.population.query(equals={"gender": Gender.FEMALE,
+                                                                 "occupation": ("Writer", "Tramp")}))
+        self.assertEqual(len(expected), self.population.count(equals={"gender": Gender.FEMALE,
+                                                                      "occupation": ("Writer", "Tramp")}))
+        expected = [i for i in self.investigators if i.occupation == "Priest" and i.hit_max >= 12]
+        self.assertEqual(expected, self.population.query({"HP": (12, None)}, {"occupation": "Priest"}))
+        self.assertEqual([], self.population.query(equals={"occupation": "Plumber"}))
+
+    def test_top(self):
+        top = self.population.top("EDU", 5)
+        self.assertEqual(sorted((i.education for i in self.investigators), reverse=True)[:5],
+                         [i.education for i in top])
+        doctors = self.population.top("SAN", 3, equals={"occupation": "Doctor"}, lowest=True)
+        self.assertEqual(sorted(i.sanity.regular for i in self.investigators if i.occupation == "Doctor")[:3],
+                         [i.sanity.regular for i in doctors])
+        self.assertTrue(all(i.occupation == "Doctor" for i in doctors))
+
+    def test_add_after_query(self):
+        population = Population(self.investigators[:100])
+        self.assertEqual(sum(1 for i in self.investigators[:100] if i.age < 40), population.count({"AGE": (None, 39)}))
+        for investigator in self.investigators[100:]:
+            population.add(investigator)
+        expected = [i for i in self.investigators if i.age < 40 and i.occupation == "Tramp"]
+        self.assertEqual(expected, population.query({"AGE": (None, 39)}, {"occupation": "Tramp"}))
+        self.assertEqual(min(i.age for i in self.investigators), population.top("AGE", 1, lowest=True)[0].age)
+
+    def test_interleaved_add_and_query(self):
+        population = Population(self.investigators[:100])
+        for n, investigator in enumerate(self.investigators[100:150], 101):
+            population.add(investigator)
+            added = self.investigators[:n]
+            self.assertEqual([i for i in added if 40 <= i.age <= 60 and i.gender == Gender.FEMALE],
+                             population.query({"AGE": (40, 60)}, {"gender": Gender.FEMALE}))
+            self.assertEqual(max(i.dexterity for i in added), population.top("DEX", 1)[0].dexterity)
+
+    def test_unknown_column(self):
+        with self.assertRaises(KeyError):
+            self.population.query({"XYZ": (1, 2)})
+        with self.assertRaises(KeyError):
+            self.population.query(equals={"XYZ": 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+from coc.core.roll import Roll
+from coc.lib import profiling
+from coc.test import isolate
+
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        isolate(self)
+
+    def test_deterministic(self):
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "stacks.collapsed")
+            result = profiling.profile_generation(30, collapsed=file_path, language="NL")
+            with open(file_path, encoding="utf-8") as collapsed:
+                lines = collapsed.read().splitlines()
+        self.assertIsNone(sys.getprofile())
+        for stage in ("roll", "spread", "age rules", "name lookup", "logging"):
+            self.assertGreater(result.stages[stage], 0, stage)
+        self.assertLessEqual(sum(result.stages.values()), result.elapsed)
+        self.assertTrue(lines)
+        for line in lines:
+            stack, _, microseconds = line.rpartition(" ")
+            self.assertTrue(stack)
+            self.assertGreater(int(microseconds), 0)
+        summary = result.summary()
+        self.assertIn("age rules", summary)
+        self.assertIn("deterministic", summary)
+
+    def test_stage_of_callee(self):
+        # time in the random module counts for rolling, time in logging inside rolling for logging
+        _, result = profiling.profile(lambda: [Roll("3D6").roll() for _ in range(200)])
+        self.assertGreater(result.stages["roll"], 0)
+        self.assertGreater(result.stages["parse"], 0)
+        self.assertFalse(any(result.stages.get(stage) for stage in ("spread", "age rules", "name lookup")))
+
+    def test_sampling(self):
+        value, result = profiling.profile(lambda: sum(Roll("3D6").roll_many(200000)), profiling.SAMPLING,
+                                          interval=0.0005)
+        self.assertTrue(600000 <= value <= 3600000)
+        self.assertGreater(result.samples, 0)
+        self.assertGreater(result.stages.get("roll", 0), 0)
+        with self.assertRaises(ValueError):
+            profiling.profile(lambda: None, "magic")
+
+
+if __name__ == '__main__':
+    unittest.main()
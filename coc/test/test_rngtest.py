@@ -0,0 +1,45 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+
+import unittest
+
+from coc.lib import rngtest
+
+
+class RngTestTestCase(unittest.TestCase):
+    def test_chi2_sf(self):
+        self.assertAlmostEqual(0.05, rngtest.chi2_sf(3.84146, 1), places=5)
+        self.assertAlmostEqual(0.05, rngtest.chi2_sf(11.0705, 5), places=5)
+        self.assertAlmostEqual(0.05, rngtest.chi2_sf(124.342, 100), places=5)
+        self.assertEqual(1.0, rngtest.chi2_sf(0, 4))
+        self.assertRaises(ValueError, rngtest.chi2_sf, 1.0, 0)
+
+    def test_detects_bad_sources(self):
+        cycle = (lambda n: [i % 6 + 1 for i in range(n)])
+        self.assertFalse(rngtest.serial_test(cycle, 6, 6000).passed)
+        self.assertFalse(rngtest.runs_test(cycle, 6000, center=3.5).passed)
+        constant = (lambda n: [1] * n)
+        self.assertFalse(rngtest.uniformity_test(constant, 6, 6000).passed)
+        out_of_range = (lambda n: [7] * n)
+        self.assertFalse(rngtest.uniformity_test(out_of_range, 6, 600).passed)
+        lopsided = (lambda value, size: [value] + [0] * (size - 1))
+        self.assertFalse(rngtest.spread_test(lopsided, 10, 4, 100).passed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -16,10 +16,11 @@
 
 """
 
-import math
+import random
 import unittest
 
-from coc.core.roll import Die, Roll
+from coc.core.roll import Die, Roll, random_func
+from coc.lib import rngtest
 
 
 class MyTestCase(unittest.TestCase):
@@ -62,40 +63,17 @@ class MyTestCase(unittest.TestCase):
                     else:
                         self.assertTrue(res[k] >= 0)
 
-    def test_zz(self):
-        count = 10000000
-        sequence_max = min(max(2, int(math.log10(count) - 2)), 6)
-        seq = ""
-        die = Roll('D6')
-        d = dict()
-        s = dict()
-        for _ in range(count):
-            roll = die.roll()
-            """
-            tel frequentie van waarde
-            """
-            count = d.get(roll, 0)
-            count += 1
-            d[roll] = count
-
-            """
-            tel frequentie van sequenties 
-            """
-            seq = f"{seq}{roll}"
-            if len(seq) < sequence_max:
-                continue
-            if len(seq) > sequence_max:
-                seq = seq[1:]
-            count = s.get(seq, 0)
-            count += 1
-            s[seq] = count
-
-        for x in sorted(d.keys()):
-            print(f"{x} : {d[x]} => {d[x] * 100 / count:.2f}%")
-
-        for x in sorted(s.keys()):
-            print(f"{x} : {s[x]} => {s[x] * 100 / count:.2f}%")
-
+    def test_randomness(self):
+        random.seed(20240501)
+        samples = 30000
+        sources = {"random_func": (lambda n: [random_func(6) for _ in range(n)]),
+                   "Die": rngtest.scalar_source(Die(6).value),
+                   "Roll": rngtest.scalar_source(Roll('D6').roll)}
+        for name, source in sources.items():
+            for result in rngtest.validate(source, 6, samples):
+                self.assertTrue(result.passed, f"{name} {result}")
+        self.assertTrue(rngtest.spread_test(Roll.spread, 40, 3, 500).passed)
+        self.assertTrue(rngtest.spread_test(Roll.spread, -7, 5, 500).passed)
 
 if __name__ == '__main__':
     unittest.main()
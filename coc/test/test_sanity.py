@@ -0,0 +1,69 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+
+import random
+import unittest
+
+from coc.core import sanity
+from coc.core.dice import compile_expression
+from coc.core.investigator import Sanity
+
+
+class SanityTestCase(unittest.TestCase):
+    def test_parse_loss(self):
+        loss = sanity.parse_loss("1/1D6")
+        self.assertEqual(1, loss.success.maximum)
+        self.assertEqual(6, loss.failure.maximum)
+        self.assertIs(loss, sanity.parse_loss("1/1D6"))
+        self.assertRaises(ValueError, sanity.parse_loss, "1D6")
+        self.assertRaises(ValueError, sanity.parse_loss, "1/1D6/2")
+
+    def test_check(self):
+        san = Sanity(60)
+        self.assertEqual(60, san.regular)
+        self.assertEqual(1, sanity.check(san, "1/1D6", roll=20))
+        self.assertEqual(59, san.regular)
+        # fumble loses the maximum
+        self.assertEqual(10, sanity.check(san, "1/1D10", roll=100))
+        self.assertTrue(san.temporary_insanity)
+        self.assertFalse(san.indefinite_insanity)
+        self.assertEqual(49, san.regular)
+        # a fifth of the sanity at the start of the day is gone
+        sanity.check(san, "0/2", roll=99)
+        self.assertTrue(san.indefinite_insanity)
+        sanity.check(san, "0/100", roll=99)
+        self.assertTrue(san.permanent_insanity)
+        self.assertEqual(0, san.regular)
+        self.assertEqual(90, Sanity(95, mythos=9).regular)
+
+    def test_markov_matches_simulation(self):
+        random.seed(32)
+        encounters = ["0/1D2", "1/1D6", "1D3/1D10", "1D10/1D100"]
+        starting = compile_expression("3D6*5")
+        exact = sanity.markov(starting.distribution(), encounters)
+        self.assertAlmostEqual(1.0, sum(exact.probabilities))
+        estimate = sanity.simulate(starting.roll_many(20000, lambda limit: random.randint(1, limit)), encounters)
+        self.assertAlmostEqual(exact.mean, estimate.mean, delta=0.5)
+        self.assertAlmostEqual(exact.permanent_insanity, estimate.permanent_insanity, delta=0.02)
+        self.assertAlmostEqual(exact.temporary_insanity, estimate.temporary_insanity, delta=0.02)
+        self.assertEqual(1.0, sanity.markov(50, []).at_least(50))
+        self.assertEqual(sanity.markov(150, []).probabilities, sanity.simulate([150], []).probabilities)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+
+import asyncio
+import unittest
+
+from coc.core.gender import Gender
+from coc.core.investigator import Investigator
+from coc.lib import metrics
+from coc.service import Service
+
+
+class ServiceTestCase(unittest.TestCase):
+    def tearDown(self):
+        metrics.disable()
+        metrics.reset()
+
+    def test_rolls_are_batched(self):
+        async def client():
+            async with Service(max_batch=50) as service:
+                values = await asyncio.gather(*[service.roll("3D6*5") for _ in range(120)])
+                many = await service.roll_many("D100b1", 10)
+            return values, many
+
+        metrics.enable()
+        values, many = asyncio.run(client())
+        self.assertEqual(120, len(values))
+        self.assertTrue(all(15 <= value <= 90 and value % 5 == 0 for value in values))
+        self.assertEqual(10, len(many))
+        self.assertTrue(all(1 <= value <= 100 for value in many))
+        snapshot = metrics.snapshot()
+        # roll_many is one request
+        self.assertEqual(121, snapshot["service.roll.requests"]["count"])
+        self.assertLessEqual(3, snapshot["service.roll.batches"]["count"])
+        self.assertGreater(20, snapshot["service.roll.batches"]["count"])
+
+    def test_roll_many_shares_a_batch(self):
+        async def client():
+            async with Service() as service:
+                return await asyncio.gather(service.roll("D6"), service.roll_many("D6", 100), service.roll("D6"),
+                                            service.roll_many("D6", 0))
+
+        metrics.enable()
+        first, many, last, none = asyncio.run(client())
+        self.assertTrue(1 <= first <= 6 and 1 <= last <= 6)
+        self.assertEqual(100, len(many))
+        self.assertEqual([], none)
+        self.assertEqual(1, metrics.snapshot()["service.roll.batches"]["count"])
+
+    def test_generate_and_names(self):
+        async def client():
+            async with Service() as service:
+                return await asyncio.gather(service.generate(language="NL", age=30),
+                                            service.generate(gender=Gender.FEMALE),
+                                            service.first_name(gender=Gender.MALE, language="EN"),
+                                            service.last_name(language="NL"))
+
+        dutch, woman, first_name, last_name = asyncio.run(client())
+        self.assertIsInstance(dutch, Investigator)
+        self.assertEqual(30, dutch.age)
+        self.assertEqual(Gender.FEMALE, woman.gender)
+        self.assertTrue(len(first_name) > 0)
+        self.assertTrue(len(last_name) > 0)
+
+    def test_errors_stay_in_their_request(self):
+        async def client():
+            async with Service() as service:
+                return await asyncio.gather(service.roll("3D6+"), service.roll("D6"), return_exceptions=True)
+
+        error, value = asyncio.run(client())
+        self.assertIsInstance(error, ValueError)
+        self.assertTrue(1 <= value <= 6)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+import io
+import os
+import tempfile
+import unittest
+
+from coc.core.gender import Gender
+from coc.core.investigator import Investigator
+from coc.lib import sheet
+from coc.test import isolate
+
+
+def _investigator(gender: Gender, surname: str = "Williams") -> Investigator:
+    return Investigator(firstname="Jessy", surname=surname, gender=gender, occupation="Writer", birthplace="Boston",
+                        residence="Arkham", age=30, characteristics={"STR": 50, "SIZ": 65, "EDU": 70})
+
+
+class TestSheet(unittest.TestCase):
+
+    def setUp(self):
+        isolate(self)
+
+    def test_pronouns(self):
+        template = sheet.Template("{He} is a {person}, {his} name is {firstname}. Ask {him}. {{STR}} {STR:>4}")
+        self.assertEqual("She is a woman, her name is Jessy. Ask her. {STR}   50",
+                         template.render(_investigator(Gender.FEMALE)))
+        self.assertEqual("He is a man, his name is Jessy. Ask him. {STR}   50",
+                         template.render(_investigator(Gender.MALE)))
+        self.assertEqual("They are a person, their name is Jessy. Ask them. {STR}   50",
+                         sheet.Template("{He} {is} a {person}, {his} name is {firstname}. Ask {him}. {{STR}} {STR:>4}")
+                         .render(_investigator(Gender.X)))
+        for kind, source in sheet.SHEETS.items():
+            self.assertIn("They are a person born in", sheet.Template(source, kind).render(_investigator(Gender.X)))
+        # pronouns are part of the compiled text, only the real fields are left
+        text, getters = template._compiled[Gender.MALE]
+        self.assertEqual(2, len(getters))
+        self.assertIn("his name", text)
+
+    def test_escape(self):
+        investigator = _investigator(Gender.FEMALE, surname="<O'Brien & *Sons*>")
+        self.assertEqual("Jessy &lt;O&#x27;Brien &amp; *Sons*&gt; 70",
+                         sheet.Template("{name} {EDU}", sheet.HTML).render(investigator))
+        self.assertEqual("Jessy \\<O'Brien & \\*Sons\\*\\> 70",
+                         sheet.Template("{name} {EDU}", sheet.MARKDOWN).render(investigator))
+        self.assertEqual("Jessy <O'Brien & *Sons*> 70", sheet.Template("{name} {EDU}").render(investigator))
+
+    def test_unknown_field(self):
+        with self.assertRaises(ValueError):
+            sheet.Template("{nickname}")
+        with self.assertRaises(ValueError):
+            sheet.Template("{name}", "pdf")
+
+    def test_write_sheets(self):
+        investigators = (_investigator(gender) for gender in (Gender.MALE, Gender.FEMALE) * 300)
+        with tempfile.TemporaryDirectory() as directory:
+            file_path = os.path.join(directory, "sheets.html")
+            self.assertEqual(600, sheet.write_sheets(investigators, file_path, sheet.HTML))
+            with open(file_path, encoding='utf-8') as file:
+                text = file.read()
+        self.assertTrue(text.startswith("<!DOCTYPE html>"))
+        self.assertEqual(600, text.count("<section"))
+        self.assertEqual(300, text.count("She is a woman"))
+        output = io.StringIO()
+        sheet.write_sheets([_investigator(Gender.MALE)], output, sheet.MARKDOWN, source="{name}", separator="\n")
+        self.assertEqual("# Investigators\n\nJessy Williams\n", output.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
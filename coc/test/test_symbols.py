@@ -0,0 +1,69 @@
+"""
+    This file is part of callofcthulhu.
+
+    callofcthulhu is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+import unittest
+
+from coc.core.gender import Gender
+from coc.core.investigator import Investigator, CHARACTERISTIC_META, STR
+from coc.lib.symbols import SymbolTable, PLACES
+from coc.test import isolate
+
+
+class TestSymbols(unittest.TestCase):
+
+    def setUp(self):
+        isolate(self)
+
+    def test_table(self):
+        table = SymbolTable("test")
+        self.assertEqual(0, table.intern("Arkham"))
+        self.assertEqual(1, table.intern("Boston"))
+        self.assertEqual(0, table.intern("Ark" + "ham"))
+        self.assertEqual("Boston", table[1])
+        self.assertIsNone(table.find("Dunwich"))
+        self.assertNotIn("Dunwich", table)
+        self.assertEqual(2, len(table))
+
+    def test_investigator_fields(self):
+        first = Investigator("Jessy", "Williams", Gender.FEMALE, "Writer", "Boston", "Arkham", 25)
+        second = Investigator("Harvey", "Walters", Gender.MALE, "Journalist", "Arkham", "Boston", 42)
+        self.assertEqual(("Jessy", "Writer", "Boston", "Arkham"),
+                         (first.firstname, first.occupation, first.birthplace, first.residence))
+        self.assertEqual(first.symbol("birthplace"), second.symbol("residence"))
+        self.assertEqual("Boston", PLACES[first.symbol("birthplace")])
+        self.assertNotEqual(first.symbol("occupation"), second.symbol("occupation"))
+        second.occupation = "Writer"
+        self.assertEqual(first.symbol("occupation"), second.symbol("occupation"))
+        second.occupation = None
+        self.assertIsNone(second.occupation)
+        with self.assertRaises(KeyError):
+            first.symbol("age")
+        copy = Investigator.from_dict(first.as_dict())
+        self.assertEqual(first.symbol("surname"), copy.symbol("surname"))
+
+    def test_characteristic_metadata(self):
+        first = Investigator("Jessy", "Williams", Gender.FEMALE, "Writer", "Boston", "Arkham", 25)
+        second = Investigator("Harvey", "Walters", Gender.MALE, "Journalist", "Arkham", "Boston", 42)
+        strength = first.chars[STR]
+        self.assertEqual(("Strength", STR, 99), (strength.description, strength.code, strength.maximum))
+        self.assertIs(CHARACTERISTIC_META[STR], strength._meta)
+        self.assertIs(strength._meta, second.chars[STR]._meta)
+        self.assertFalse(hasattr(strength, "__dict__"))
+
+
+if __name__ == '__main__':
+    unittest.main()